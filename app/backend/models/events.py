@@ -29,6 +29,31 @@ class ProgressUpdateEvent(BaseEvent):
     timestamp: Optional[str] = None
     analysis: Optional[str] = None
 
+class LLMCallEvent(BaseEvent):
+    """Event containing the metrics of a completed LLM call"""
+
+    type: Literal["llm_call"] = "llm_call"
+    run_id: Optional[str] = None
+    agent: Optional[str] = None
+    ticker: Optional[str] = None
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_seconds: float
+    attempts: int
+    retries: int
+    parse_failures: int
+    repairs: int = 0
+    fallback: bool
+    cache_hit: bool
+    batched: bool
+    hedges: int = 0
+    failovers: int = 0
+    served_by: Optional[str] = None
+    deferred: bool = False
+    timestamp: Optional[str] = None
+
 class ErrorEvent(BaseEvent):
     """Event indicating an error occurred"""
 
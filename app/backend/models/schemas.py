@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from src.llm.models import ModelProvider
 
 
@@ -30,6 +30,7 @@ class HedgeFundRequest(BaseModel):
     model_provider: ModelProvider = ModelProvider.OPENAI
     initial_cash: float = 100000.0
     margin_requirement: float = 0.0
+    reasoning_mode: Literal["full", "brief", "none"] = "full"
 
     def get_start_date(self) -> str:
         """Calculate start date if not provided"""
@@ -3,9 +3,12 @@ from fastapi.responses import StreamingResponse
 import asyncio
 
 from app.backend.models.schemas import ErrorResponse, HedgeFundRequest
-from app.backend.models.events import StartEvent, ProgressUpdateEvent, ErrorEvent, CompleteEvent
+from app.backend.models.events import StartEvent, ProgressUpdateEvent, LLMCallEvent, ErrorEvent, CompleteEvent
 from app.backend.services.graph import create_graph, parse_hedge_fund_response, run_graph_async
 from app.backend.services.portfolio import create_portfolio
+from src.graph.cache import get_compiled_graph
+from src.llm.metrics import get_llm_metrics, new_run_id
+from src.llm.router import get_run_spend
 from src.utils.progress import progress
 
 router = APIRouter(prefix="/hedge-fund")
@@ -24,9 +27,8 @@ async def run_hedge_fund(request: HedgeFundRequest):
         # Create the portfolio
         portfolio = create_portfolio(request.initial_cash, request.margin_requirement, request.tickers)
 
-        # Construct agent graph
-        graph = create_graph(request.selected_agents)
-        graph = graph.compile()
+        # Get the compiled agent graph, built once per agent selection and shared across requests
+        graph = get_compiled_graph(create_graph, request.selected_agents)
 
         # Log a test progress update for debugging
         progress.update_status("system", None, "Preparing hedge fund run")
@@ -46,8 +48,18 @@ async def run_hedge_fund(request: HedgeFundRequest):
                 event = ProgressUpdateEvent(agent=agent_name, ticker=ticker, status=status, timestamp=timestamp, analysis=analysis)
                 progress_queue.put_nowait(event)
 
-            # Register our handler with the progress tracker
+            # LLM call metrics are recorded on the LLM event loop thread, so hand them over thread-safely.
+            # Handlers see the calls of every concurrent run, so only this run's calls are streamed.
+            loop = asyncio.get_running_loop()
+            run_id = new_run_id()
+
+            def llm_call_handler(record):
+                if record["run_id"] == run_id:
+                    loop.call_soon_threadsafe(progress_queue.put_nowait, LLMCallEvent(**record))
+
+            # Register our handlers with the progress tracker and the LLM metrics
             progress.register_handler(progress_handler)
+            get_llm_metrics().register_handler(llm_call_handler)
 
             try:
                 # Start the graph execution in a background task
@@ -61,6 +73,8 @@ async def run_hedge_fund(request: HedgeFundRequest):
                         model_name=request.model_name,
                         model_provider=model_provider,
                         request=request,  # Pass the full request for agent-specific model access
+                        reasoning_mode=request.reasoning_mode,
+                        run_id=run_id,
                     )
                 )
                 # Send initial message
@@ -87,7 +101,7 @@ async def run_hedge_fund(request: HedgeFundRequest):
                 final_data = CompleteEvent(
                     data={
                         "decisions": parse_hedge_fund_response(result.get("messages", [])[-1].content),
-                        "analyst_signals": result.get("data", {}).get("analyst_signals", {}),
+                        "analyst_signals": result.get("analyst_signals", {}),
                     }
                 )
                 yield final_data.to_sse()
@@ -95,6 +109,9 @@ async def run_hedge_fund(request: HedgeFundRequest):
             finally:
                 # Clean up
                 progress.unregister_handler(progress_handler)
+                get_llm_metrics().unregister_handler(llm_call_handler)
+                get_llm_metrics().discard_run(run_id)
+                get_run_spend().discard_run(run_id)
                 if "run_task" in locals() and not run_task.done():
                     run_task.cancel()
 
@@ -6,8 +6,11 @@ from langgraph.graph import END, StateGraph
 from src.agents.portfolio_manager import portfolio_management_agent
 from src.agents.risk_manager import risk_management_agent
 from src.main import start
-from src.utils.analysts import ANALYST_CONFIG
+from src.utils.analysts import ANALYST_CONFIG, get_analyst_nodes
+from src.graph.fanout import add_analyst_fan_out
 from src.graph.state import AgentState
+from src.llm.router import get_run_deadline
+from src.utils.concurrency import get_graph_concurrency
 
 
 # Helper function to create the agent graph
@@ -20,23 +23,15 @@ def create_graph(selected_agents: list[str]) -> StateGraph:
     selected_agents = [agent for agent in selected_agents if agent in ANALYST_CONFIG]
 
     # Get analyst nodes from the configuration
-    analyst_nodes = {key: (f"{key}_agent", config["agent_func"]) for key, config in ANALYST_CONFIG.items()}
+    analyst_nodes = get_analyst_nodes(selected_agents)
 
-    # Add selected analyst nodes
-    for agent_name in selected_agents:
-        node_name, node_func = analyst_nodes[agent_name]
-        graph.add_node(node_name, node_func)
-        graph.add_edge("start_node", node_name)
+    # Add selected analyst nodes, fanned out per (analyst, ticker) and joined at risk management
+    add_analyst_fan_out(graph, [analyst_nodes[agent_name] for agent_name in selected_agents])
 
     # Always add risk and portfolio management (for now)
     graph.add_node("risk_management_agent", risk_management_agent)
     graph.add_node("portfolio_manager", portfolio_management_agent)
 
-    # Connect selected agents to risk management
-    for agent_name in selected_agents:
-        node_name = analyst_nodes[agent_name][0]
-        graph.add_edge(node_name, "risk_management_agent")
-
     # Connect the risk management agent to the portfolio management agent
     graph.add_edge("risk_management_agent", "portfolio_manager")
 
@@ -48,12 +43,12 @@ def create_graph(selected_agents: list[str]) -> StateGraph:
     return graph
 
 
-async def run_graph_async(graph, portfolio, tickers, start_date, end_date, model_name, model_provider, request=None):
+async def run_graph_async(graph, portfolio, tickers, start_date, end_date, model_name, model_provider, request=None, reasoning_mode="full", run_id=None):
     """Async wrapper for run_graph to work with asyncio."""
     # Use run_in_executor to run the synchronous function in a separate thread
     # so it doesn't block the event loop
     loop = asyncio.get_running_loop()
-    result = await loop.run_in_executor(None, lambda: run_graph(graph, portfolio, tickers, start_date, end_date, model_name, model_provider, request))  # Use default executor
+    result = await loop.run_in_executor(None, lambda: run_graph(graph, portfolio, tickers, start_date, end_date, model_name, model_provider, request, reasoning_mode, run_id))  # Use default executor
     return result
 
 
@@ -66,6 +61,8 @@ def run_graph(
     model_name: str,
     model_provider: str,
     request=None,
+    reasoning_mode: str = "full",
+    run_id: str | None = None,
 ) -> dict:
     """
     Run the graph with the given portfolio, tickers,
@@ -84,15 +81,18 @@ def run_graph(
                 "portfolio": portfolio,
                 "start_date": start_date,
                 "end_date": end_date,
-                "analyst_signals": {},
             },
             "metadata": {
                 "show_reasoning": False,
                 "model_name": model_name,
                 "model_provider": model_provider,
                 "request": request,  # Pass the request for agent-specific model access
+                "reasoning_mode": reasoning_mode,
+                "deadline": get_run_deadline(),
+                "run_id": run_id,  # Tags the run's LLM call metrics
             },
         },
+        config={"max_concurrency": get_graph_concurrency()},
     )
 
 
@@ -136,6 +136,9 @@ export const api = {
                         message: 'Analysis complete'
                       });
                       break;
+                    case 'llm_call':
+                      // Per-call LLM metrics are streamed for API clients; the flow view does not display them
+                      break;
                     case 'error':
                       // Mark all agents as error when there's an error
                       nodeContext.updateAgentNodes(params.selected_agents || [], 'ERROR');
@@ -1,26 +1,26 @@
 from __future__ import annotations
 
-import json
 from typing_extensions import Literal
 from pydantic import BaseModel
 
 from src.graph.state import AgentState, show_agent_reasoning
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 
 from src.tools.api import (
     get_financial_metrics,
     get_market_cap,
     search_line_items,
 )
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 from src.utils.progress import progress
 
 
 class AswathDamodaranSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float          # 0‒100
-    reasoning: str
+    reasoning: str = ""
 
 
 def aswath_damodaran_agent(state: AgentState):
@@ -38,6 +38,7 @@ def aswath_damodaran_agent(state: AgentState):
 
     analysis_data: dict[str, dict] = {}
     damodaran_signals: dict[str, dict] = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         # ─── Fetch core data ────────────────────────────────────────────────────
@@ -113,26 +114,24 @@ def aswath_damodaran_agent(state: AgentState):
 
         # ─── LLM: craft Damodaran-style narrative ──────────────────────────────
         progress.update_status("aswath_damodaran_agent", ticker, "Generating Damodaran analysis")
-        damodaran_output = generate_damodaran_output(
+        llm_calls[ticker] = generate_damodaran_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, damodaran_output in run_llm_calls(llm_calls, state).items():
         damodaran_signals[ticker] = damodaran_output.model_dump()
 
         progress.update_status("aswath_damodaran_agent", ticker, "Done", analysis=damodaran_output.reasoning)
 
-    # ─── Push message back to graph state ──────────────────────────────────────
-    message = HumanMessage(content=json.dumps(damodaran_signals), name="aswath_damodaran_agent")
-
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(damodaran_signals, "Aswath Damodaran Agent")
 
-    state["data"]["analyst_signals"]["aswath_damodaran_agent"] = damodaran_signals
     progress.update_status("aswath_damodaran_agent", None, "Done")
 
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"aswath_damodaran_agent": damodaran_signals}}
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -356,22 +355,11 @@ def estimate_cost_of_equity(beta: float | None) -> float:
 # ────────────────────────────────────────────────────────────────────────────────
 # LLM generation
 # ────────────────────────────────────────────────────────────────────────────────
-def generate_damodaran_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> AswathDamodaranSignal:
-    """
-    Ask the LLM to channel Prof. Damodaran's analytical style:
-      • Story → Numbers → Value narrative
-      • Emphasize risk, growth, and cash-flow assumptions
-      • Cite cost of capital, implied MOS, and valuation cross-checks
-    """
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are Aswath Damodaran, Professor of Finance at NYU Stern.
+DAMODARAN_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are Aswath Damodaran, Professor of Finance at NYU Stern.
                 Use your valuation framework to issue trading signals on US equities.
 
                 Speak with your usual clear, data-driven tone:
@@ -380,10 +368,10 @@ def generate_damodaran_output(
                   ◦ Conclude with value: your FCFF DCF estimate, margin of safety, and relative valuation sanity checks
                   ◦ Highlight major uncertainties and how they affect value
                 Return ONLY the JSON specified below.""",
-            ),
-            (
-                "human",
-                """Ticker: {ticker}
+        ),
+        (
+            "human",
+            """Ticker: {ticker}
 
                 Analysis data:
                 {analysis_data}
@@ -394,11 +382,23 @@ def generate_damodaran_output(
                   "confidence": float (0-100),
                   "reasoning": "string"
                 }}""",
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+async def generate_damodaran_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> AswathDamodaranSignal:
+    """
+    Ask the LLM to channel Prof. Damodaran's analytical style:
+      • Story → Numbers → Value narrative
+      • Emphasize risk, growth, and cash-flow assumptions
+      • Cite cost of capital, implied MOS, and valuation cross-checks
+    """
+    prompt = build_ticker_prompt(DAMODARAN_PROMPT, ticker, analysis_data, agent_name="aswath_damodaran_agent")
 
     def default_signal():
         return AswathDamodaranSignal(
@@ -407,10 +407,11 @@ def generate_damodaran_output(
             reasoning="Parsing error; defaulting to neutral",
         )
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=AswathDamodaranSignal,
         agent_name="aswath_damodaran_agent",
         state=state,
         default_factory=default_signal,
+        ticker=ticker,
     )
@@ -1,19 +1,19 @@
 from src.graph.state import AgentState, show_agent_reasoning
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 import math
 
 
 class BenGrahamSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def ben_graham_agent(state: AgentState):
@@ -30,6 +30,7 @@ def ben_graham_agent(state: AgentState):
 
     analysis_data = {}
     graham_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         progress.update_status("ben_graham_agent", ticker, "Fetching financial metrics")
@@ -66,29 +67,25 @@ def ben_graham_agent(state: AgentState):
         analysis_data[ticker] = {"signal": signal, "score": total_score, "max_score": max_possible_score, "earnings_analysis": earnings_analysis, "strength_analysis": strength_analysis, "valuation_analysis": valuation_analysis}
 
         progress.update_status("ben_graham_agent", ticker, "Generating Ben Graham analysis")
-        graham_output = generate_graham_output(
+        llm_calls[ticker] = generate_graham_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, graham_output in run_llm_calls(llm_calls, state).items():
         graham_analysis[ticker] = {"signal": graham_output.signal, "confidence": graham_output.confidence, "reasoning": graham_output.reasoning}
 
         progress.update_status("ben_graham_agent", ticker, "Done", analysis=graham_output.reasoning)
 
-    # Wrap results in a single message for the chain
-    message = HumanMessage(content=json.dumps(graham_analysis), name="ben_graham_agent")
-
     # Optionally display reasoning
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(graham_analysis, "Ben Graham Agent")
 
-    # Store signals in the overall state
-    state["data"]["analyst_signals"]["ben_graham_agent"] = graham_analysis
-
     progress.update_status("ben_graham_agent", None, "Done")
 
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"ben_graham_agent": graham_analysis}}
 
 
 def analyze_earnings_stability(metrics: list, financial_line_items: list) -> dict:
@@ -276,22 +273,11 @@ def analyze_valuation_graham(financial_line_items: list, market_cap: float) -> d
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_graham_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> BenGrahamSignal:
-    """
-    Generates an investment decision in the style of Benjamin Graham:
-    - Value emphasis, margin of safety, net-nets, conservative balance sheet, stable earnings.
-    - Return the result in a JSON structure: { signal, confidence, reasoning }.
-    """
-
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are a Benjamin Graham AI agent, making investment decisions using his principles:
+GRAHAM_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a Benjamin Graham AI agent, making investment decisions using his principles:
             1. Insist on a margin of safety by buying below intrinsic value (e.g., using Graham Number, net-net).
             2. Emphasize the company's financial strength (low leverage, ample current assets).
             3. Prefer stable earnings over multiple years.
@@ -311,10 +297,10 @@ def generate_graham_output(
                         
             Return a rational recommendation: bullish, bearish, or neutral, with a confidence level (0-100) and thorough reasoning.
             """,
-            ),
-            (
-                "human",
-                """Based on the following analysis, create a Graham-style investment signal:
+        ),
+        (
+            "human",
+            """Based on the following analysis, create a Graham-style investment signal:
 
             Analysis Data for {ticker}:
             {analysis_data}
@@ -326,19 +312,32 @@ def generate_graham_output(
               "reasoning": "string"
             }}
             """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
+
+async def generate_graham_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> BenGrahamSignal:
+    """
+    Generates an investment decision in the style of Benjamin Graham:
+    - Value emphasis, margin of safety, net-nets, conservative balance sheet, stable earnings.
+    - Return the result in a JSON structure: { signal, confidence, reasoning }.
+    """
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = build_ticker_prompt(GRAHAM_PROMPT, ticker, analysis_data, agent_name="ben_graham_agent")
 
     def create_default_ben_graham_signal():
         return BenGrahamSignal(signal="neutral", confidence=0.0, reasoning="Error in generating analysis; defaulting to neutral.")
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=BenGrahamSignal,
         agent_name="ben_graham_agent",
         state=state,
         default_factory=create_default_ben_graham_signal,
+        ticker=ticker,
     )
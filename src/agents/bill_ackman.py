@@ -1,19 +1,18 @@
-from langchain_openai import ChatOpenAI
 from src.graph.state import AgentState, show_agent_reasoning
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 
 
 class BillAckmanSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def bill_ackman_agent(state: AgentState):
@@ -28,6 +27,7 @@ def bill_ackman_agent(state: AgentState):
     
     analysis_data = {}
     ackman_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
     
     for ticker in tickers:
         progress.update_status("bill_ackman_agent", ticker, "Fetching financial metrics")
@@ -97,11 +97,14 @@ def bill_ackman_agent(state: AgentState):
         }
         
         progress.update_status("bill_ackman_agent", ticker, "Generating Bill Ackman analysis")
-        ackman_output = generate_ackman_output(
+        llm_calls[ticker] = generate_ackman_output(
             ticker=ticker, 
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
+
+    # Run the LLM calls for all tickers concurrently
+    for ticker, ackman_output in run_llm_calls(llm_calls, state).items():
         
         ackman_analysis[ticker] = {
             "signal": ackman_output.signal,
@@ -111,25 +114,13 @@ def bill_ackman_agent(state: AgentState):
         
         progress.update_status("bill_ackman_agent", ticker, "Done", analysis=ackman_output.reasoning)
     
-    # Wrap results in a single message for the chain
-    message = HumanMessage(
-        content=json.dumps(ackman_analysis),
-        name="bill_ackman_agent"
-    )
-    
     # Show reasoning if requested
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(ackman_analysis, "Bill Ackman Agent")
     
-    # Add signals to the overall state
-    state["data"]["analyst_signals"]["bill_ackman_agent"] = ackman_analysis
-
     progress.update_status("bill_ackman_agent", None, "Done")
 
-    return {
-        "messages": [message],
-        "data": state["data"]
-    }
+    return {"analyst_signals": {"bill_ackman_agent": ackman_analysis}}
 
 
 def analyze_business_quality(metrics: list, financial_line_items: list) -> dict:
@@ -394,20 +385,10 @@ def analyze_valuation(financial_line_items: list, market_cap: float) -> dict:
     }
 
 
-def generate_ackman_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> BillAckmanSignal:
-    """
-    Generates investment decisions in the style of Bill Ackman.
-    Includes more explicit references to brand strength, activism potential, 
-    catalysts, and management changes in the system prompt.
-    """
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Bill Ackman AI agent, making investment decisions using his principles:
+ACKMAN_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a Bill Ackman AI agent, making investment decisions using his principles:
 
             1. Seek high-quality businesses with durable competitive advantages (moats), often in well-known consumer or service brands.
             2. Prioritize consistent free cash flow and growth potential over the long term.
@@ -426,10 +407,10 @@ def generate_ackman_output(
 
             Return your final recommendation (signal: bullish, neutral, or bearish) with a 0-100 confidence and a thorough reasoning section.
             """
-        ),
-        (
-            "human",
-            """Based on the following analysis, create an Ackman-style investment signal.
+    ),
+    (
+        "human",
+        """Based on the following analysis, create an Ackman-style investment signal.
 
             Analysis Data for {ticker}:
             {analysis_data}
@@ -441,13 +422,21 @@ def generate_ackman_output(
               "reasoning": "string"
             }}
             """
-        )
-    ])
+    )
+])
+
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+async def generate_ackman_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> BillAckmanSignal:
+    """
+    Generates investment decisions in the style of Bill Ackman.
+    Includes more explicit references to brand strength, activism potential, 
+    catalysts, and management changes in the system prompt.
+    """
+    prompt = build_ticker_prompt(ACKMAN_PROMPT, ticker, analysis_data, agent_name="bill_ackman_agent")
 
     def create_default_bill_ackman_signal():
         return BillAckmanSignal(
@@ -456,10 +445,11 @@ def generate_ackman_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt, 
         pydantic_model=BillAckmanSignal, 
         agent_name="bill_ackman_agent", 
         state=state,
         default_factory=create_default_bill_ackman_signal,
+        ticker=ticker,
     )
@@ -1,18 +1,18 @@
 from src.graph.state import AgentState, show_agent_reasoning
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 
 
 class CathieWoodSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def cathie_wood_agent(state: AgentState):
@@ -29,6 +29,7 @@ def cathie_wood_agent(state: AgentState):
 
     analysis_data = {}
     cw_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         progress.update_status("cathie_wood_agent", ticker, "Fetching financial metrics")
@@ -83,26 +84,24 @@ def cathie_wood_agent(state: AgentState):
         analysis_data[ticker] = {"signal": signal, "score": total_score, "max_score": max_possible_score, "disruptive_analysis": disruptive_analysis, "innovation_analysis": innovation_analysis, "valuation_analysis": valuation_analysis}
 
         progress.update_status("cathie_wood_agent", ticker, "Generating Cathie Wood analysis")
-        cw_output = generate_cathie_wood_output(
+        llm_calls[ticker] = generate_cathie_wood_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, cw_output in run_llm_calls(llm_calls, state).items():
         cw_analysis[ticker] = {"signal": cw_output.signal, "confidence": cw_output.confidence, "reasoning": cw_output.reasoning}
 
         progress.update_status("cathie_wood_agent", ticker, "Done", analysis=cw_output.reasoning)
 
-    message = HumanMessage(content=json.dumps(cw_analysis), name="cathie_wood_agent")
-
     if state["metadata"].get("show_reasoning"):
         show_agent_reasoning(cw_analysis, "Cathie Wood Agent")
 
-    state["data"]["analyst_signals"]["cathie_wood_agent"] = cw_analysis
-
     progress.update_status("cathie_wood_agent", None, "Done")
 
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"cathie_wood_agent": cw_analysis}}
 
 
 def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> dict:
@@ -357,19 +356,11 @@ def analyze_cathie_wood_valuation(financial_line_items: list, market_cap: float)
     return {"score": score, "details": "; ".join(details), "intrinsic_value": intrinsic_value, "margin_of_safety": margin_of_safety}
 
 
-def generate_cathie_wood_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> CathieWoodSignal:
-    """
-    Generates investment decisions in the style of Cathie Wood.
-    """
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are a Cathie Wood AI agent, making investment decisions using her principles:
+CATHIE_WOOD_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a Cathie Wood AI agent, making investment decisions using her principles:
 
             1. Seek companies leveraging disruptive innovation.
             2. Emphasize exponential growth potential, large TAM.
@@ -396,10 +387,10 @@ def generate_cathie_wood_output(
             For example, if bullish: "The company's AI-driven platform is transforming the $500B healthcare analytics market, with evidence of platform adoption accelerating from 40% to 65% YoY. Their R&D investments of 22% of revenue are creating a technological moat that positions them to capture a significant share of this expanding market. The current valuation doesn't reflect the exponential growth trajectory we expect as..."
             For example, if bearish: "While operating in the genomics space, the company lacks truly disruptive technology and is merely incrementally improving existing techniques. R&D spending at only 8% of revenue signals insufficient investment in breakthrough innovation. With revenue growth slowing from 45% to 20% YoY, there's limited evidence of the exponential adoption curve we look for in transformative companies..."
             """,
-            ),
-            (
-                "human",
-                """Based on the following analysis, create a Cathie Wood-style investment signal.
+        ),
+        (
+            "human",
+            """Based on the following analysis, create a Cathie Wood-style investment signal.
 
             Analysis Data for {ticker}:
             {analysis_data}
@@ -411,21 +402,31 @@ def generate_cathie_wood_output(
               "reasoning": "string"
             }}
             """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+async def generate_cathie_wood_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> CathieWoodSignal:
+    """
+    Generates investment decisions in the style of Cathie Wood.
+    """
+    prompt = build_ticker_prompt(CATHIE_WOOD_PROMPT, ticker, analysis_data, agent_name="cathie_wood_agent")
 
     def create_default_cathie_wood_signal():
         return CathieWoodSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=CathieWoodSignal,
         agent_name="cathie_wood_agent",
         state=state,
         default_factory=create_default_cathie_wood_signal,
+        ticker=ticker,
     )
 
 
@@ -1,17 +1,17 @@
 from src.graph.state import AgentState, show_agent_reasoning
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items, get_insider_trades, get_company_news
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 
 class CharlieMungerSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def charlie_munger_agent(state: AgentState):
@@ -25,6 +25,7 @@ def charlie_munger_agent(state: AgentState):
     
     analysis_data = {}
     munger_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
     
     for ticker in tickers:
         progress.update_status("charlie_munger_agent", ticker, "Fetching financial metrics")
@@ -121,11 +122,14 @@ def charlie_munger_agent(state: AgentState):
         }
         
         progress.update_status("charlie_munger_agent", ticker, "Generating Charlie Munger analysis")
-        munger_output = generate_munger_output(
+        llm_calls[ticker] = generate_munger_output(
             ticker=ticker, 
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
+
+    # Run the LLM calls for all tickers concurrently
+    for ticker, munger_output in run_llm_calls(llm_calls, state).items():
         
         munger_analysis[ticker] = {
             "signal": munger_output.signal,
@@ -135,25 +139,13 @@ def charlie_munger_agent(state: AgentState):
         
         progress.update_status("charlie_munger_agent", ticker, "Done", analysis=munger_output.reasoning)
     
-    # Wrap results in a single message for the chain
-    message = HumanMessage(
-        content=json.dumps(munger_analysis),
-        name="charlie_munger_agent"
-    )
-    
     # Show reasoning if requested
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(munger_analysis, "Charlie Munger Agent")
 
     progress.update_status("charlie_munger_agent", None, "Done")
     
-    # Add signals to the overall state
-    state["data"]["analyst_signals"]["charlie_munger_agent"] = munger_analysis
-
-    return {
-        "messages": [message],
-        "data": state["data"]
-    }
+    return {"analyst_signals": {"charlie_munger_agent": munger_analysis}}
 
 
 def analyze_moat_strength(metrics: list, financial_line_items: list) -> dict:
@@ -673,18 +665,10 @@ def analyze_news_sentiment(news_items: list) -> str:
     return f"Qualitative review of {len(news_items)} recent news items would be needed"
 
 
-def generate_munger_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> CharlieMungerSignal:
-    """
-    Generates investment decisions in the style of Charlie Munger.
-    """
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Charlie Munger AI agent, making investment decisions using his principles:
+MUNGER_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a Charlie Munger AI agent, making investment decisions using his principles:
 
             1. Focus on the quality and predictability of the business.
             2. Rely on mental models from multiple disciplines to analyze investments.
@@ -717,10 +701,10 @@ def generate_munger_output(
             For example, if bullish: "The high ROIC of 22% demonstrates the company's moat. When applying basic microeconomics, we can see that competitors would struggle to..."
             For example, if bearish: "I see this business making a classic mistake in capital allocation. As I've often said about [relevant Mungerism], this company appears to be..."
             """
-        ),
-        (
-            "human",
-            """Based on the following analysis, create a Munger-style investment signal.
+    ),
+    (
+        "human",
+        """Based on the following analysis, create a Munger-style investment signal.
 
             Analysis Data for {ticker}:
             {analysis_data}
@@ -732,13 +716,19 @@ def generate_munger_output(
               "reasoning": "string"
             }}
             """
-        )
-    ])
+    )
+])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+
+async def generate_munger_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> CharlieMungerSignal:
+    """
+    Generates investment decisions in the style of Charlie Munger.
+    """
+    prompt = build_ticker_prompt(MUNGER_PROMPT, ticker, analysis_data, agent_name="charlie_munger_agent")
 
     def create_default_charlie_munger_signal():
         return CharlieMungerSignal(
@@ -747,10 +737,11 @@ def generate_munger_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         state=state,
         pydantic_model=CharlieMungerSignal, 
         agent_name="charlie_munger_agent", 
         default_factory=create_default_charlie_munger_signal,
+        ticker=ticker,
     )
\ No newline at end of file
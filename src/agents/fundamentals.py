@@ -1,4 +1,3 @@
-from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.progress import progress
 import json
@@ -140,22 +139,10 @@ def fundamentals_analyst_agent(state: AgentState):
 
         progress.update_status("fundamentals_analyst_agent", ticker, "Done", analysis=json.dumps(reasoning, indent=4))
 
-    # Create the fundamental analysis message
-    message = HumanMessage(
-        content=json.dumps(fundamental_analysis),
-        name="fundamentals_analyst_agent",
-    )
-
     # Print the reasoning if the flag is set
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(fundamental_analysis, "Fundamental Analysis Agent")
 
-    # Add the signal to the analyst_signals list
-    state["data"]["analyst_signals"]["fundamentals_analyst_agent"] = fundamental_analysis
-
     progress.update_status("fundamentals_analyst_agent", None, "Done")
     
-    return {
-        "messages": [message],
-        "data": data,
-    }
+    return {"analyst_signals": {"fundamentals_analyst_agent": fundamental_analysis}}
@@ -1,11 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-import json
 from typing_extensions import Literal
 
 from src.graph.state import AgentState, show_agent_reasoning
-from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel
 
@@ -16,7 +14,9 @@ from src.tools.api import (
     get_market_cap,
     search_line_items,
 )
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 from src.utils.progress import progress
 
 __all__ = [
@@ -34,7 +34,7 @@ class MichaelBurrySignal(BaseModel):
 
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float  # 0–100
-    reasoning: str
+    reasoning: str = ""
 
 
 ###############################################################################
@@ -54,6 +54,7 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
 
     analysis_data: dict[str, dict] = {}
     burry_analysis: dict[str, dict] = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         # ------------------------------------------------------------------
@@ -140,12 +141,14 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
         }
 
         progress.update_status("michael_burry_agent", ticker, "Generating LLM output")
-        burry_output = _generate_burry_output(
+        llm_calls[ticker] = _generate_burry_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, burry_output in run_llm_calls(llm_calls, state).items():
         burry_analysis[ticker] = {
             "signal": burry_output.signal,
             "confidence": burry_output.confidence,
@@ -157,16 +160,12 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
     # ----------------------------------------------------------------------
     # Return to the graph
     # ----------------------------------------------------------------------
-    message = HumanMessage(content=json.dumps(burry_analysis), name="michael_burry_agent")
-
     if state["metadata"].get("show_reasoning"):
         show_agent_reasoning(burry_analysis, "Michael Burry Agent")
 
-    state["data"]["analyst_signals"]["michael_burry_agent"] = burry_analysis
-
     progress.update_status("michael_burry_agent", None, "Done")
 
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"michael_burry_agent": burry_analysis}}
 
 
 ###############################################################################
@@ -324,18 +323,11 @@ def _analyze_contrarian_sentiment(news):
 # LLM generation
 ###############################################################################
 
-def _generate_burry_output(
-    ticker: str,
-    analysis_data: dict,
-    state: AgentState,
-) -> MichaelBurrySignal:
-    """Call the LLM to craft the final trading signal in Burry's voice."""
-
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are an AI agent emulating Dr. Michael J. Burry. Your mandate:
+BURRY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are an AI agent emulating Dr. Michael J. Burry. Your mandate:
                 - Hunt for deep value in US equities using hard numbers (free cash flow, EV/EBIT, balance sheet)
                 - Be contrarian: hatred in the press can be your friend if fundamentals are solid
                 - Focus on downside first – avoid leveraged balance sheets
@@ -352,10 +344,10 @@ def _generate_burry_output(
                 For example, if bullish: "FCF yield 12.8%. EV/EBIT 6.2. Debt-to-equity 0.4. Net insider buying 25k shares. Market missing value due to overreaction to recent litigation. Strong buy."
                 For example, if bearish: "FCF yield only 2.1%. Debt-to-equity concerning at 2.3. Management diluting shareholders. Pass."
                 """,
-            ),
-            (
-                "human",
-                """Based on the following data, create the investment signal as Michael Burry would:
+        ),
+        (
+            "human",
+            """Based on the following data, create the investment signal as Michael Burry would:
 
                 Analysis Data for {ticker}:
                 {analysis_data}
@@ -367,20 +359,29 @@ def _generate_burry_output(
                   "reasoning": "string"
                 }}
                 """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
+
+async def _generate_burry_output(
+    ticker: str,
+    analysis_data: dict,
+    state: AgentState,
+) -> MichaelBurrySignal:
+    """Call the LLM to craft the final trading signal in Burry's voice."""
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = build_ticker_prompt(BURRY_PROMPT, ticker, analysis_data, agent_name="michael_burry_agent")
 
     # Default fallback signal in case parsing fails
     def create_default_michael_burry_signal():
         return MichaelBurrySignal(signal="neutral", confidence=0.0, reasoning="Parsing error – defaulting to neutral")
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=MichaelBurrySignal,
         agent_name="michael_burry_agent",
         state=state,
         default_factory=create_default_michael_burry_signal,
+        ticker=ticker,
     )
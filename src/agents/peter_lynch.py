@@ -8,12 +8,12 @@ from src.tools.api import (
     get_prices,
 )
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 
 
 class PeterLynchSignal(BaseModel):
@@ -22,7 +22,7 @@ class PeterLynchSignal(BaseModel):
     """
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def peter_lynch_agent(state: AgentState):
@@ -47,6 +47,7 @@ def peter_lynch_agent(state: AgentState):
 
     analysis_data = {}
     lynch_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         progress.update_status("peter_lynch_agent", ticker, "Fetching financial metrics")
@@ -136,12 +137,14 @@ def peter_lynch_agent(state: AgentState):
         }
 
         progress.update_status("peter_lynch_agent", ticker, "Generating Peter Lynch analysis")
-        lynch_output = generate_lynch_output(
+        llm_calls[ticker] = generate_lynch_output(
             ticker=ticker,
             analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, lynch_output in run_llm_calls(llm_calls, state).items():
         lynch_analysis[ticker] = {
             "signal": lynch_output.signal,
             "confidence": lynch_output.confidence,
@@ -150,18 +153,12 @@ def peter_lynch_agent(state: AgentState):
 
         progress.update_status("peter_lynch_agent", ticker, "Done", analysis=lynch_output.reasoning)
 
-    # Wrap up results
-    message = HumanMessage(content=json.dumps(lynch_analysis), name="peter_lynch_agent")
-
     if state["metadata"].get("show_reasoning"):
         show_agent_reasoning(lynch_analysis, "Peter Lynch Agent")
 
-    # Save signals to state
-    state["data"]["analyst_signals"]["peter_lynch_agent"] = lynch_analysis
-
     progress.update_status("peter_lynch_agent", None, "Done")
 
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"peter_lynch_agent": lynch_analysis}}
 
 
 def analyze_lynch_growth(financial_line_items: list) -> dict:
@@ -437,19 +434,11 @@ def analyze_insider_activity(insider_trades: list) -> dict:
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_lynch_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> PeterLynchSignal:
-    """
-    Generates a final JSON signal in Peter Lynch's voice & style.
-    """
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are a Peter Lynch AI agent. You make investment decisions based on Peter Lynch's well-known principles:
+LYNCH_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a Peter Lynch AI agent. You make investment decisions based on Peter Lynch's well-known principles:
                 
                 1. Invest in What You Know: Emphasize understandable businesses, possibly discovered in everyday life.
                 2. Growth at a Reasonable Price (GARP): Rely on the PEG ratio as a prime metric.
@@ -473,21 +462,30 @@ def generate_lynch_output(
                   "reasoning": "string"
                 }}
                 """,
-            ),
-            (
-                "human",
-                """Based on the following analysis data for {ticker}, produce your Peter Lynch–style investment signal.
+        ),
+        (
+            "human",
+            """Based on the following analysis data for {ticker}, produce your Peter Lynch–style investment signal.
 
                 Analysis Data:
                 {analysis_data}
 
                 Return only valid JSON with "signal", "confidence", and "reasoning".
                 """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+async def generate_lynch_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> PeterLynchSignal:
+    """
+    Generates a final JSON signal in Peter Lynch's voice & style.
+    """
+    prompt = build_ticker_prompt(LYNCH_PROMPT, ticker, analysis_data, agent_name="peter_lynch_agent")
 
     def create_default_signal():
         return PeterLynchSignal(
@@ -496,10 +494,11 @@ def generate_lynch_output(
             reasoning="Error in analysis; defaulting to neutral"
         )
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=PeterLynchSignal,
         agent_name="peter_lynch_agent",
         state=state,
         default_factory=create_default_signal,
+        ticker=ticker,
     )
@@ -7,19 +7,19 @@ from src.tools.api import (
     get_company_news,
 )
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 import statistics
 
 
 class PhilFisherSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def phil_fisher_agent(state: AgentState):
@@ -40,6 +40,7 @@ def phil_fisher_agent(state: AgentState):
 
     analysis_data = {}
     fisher_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         progress.update_status("phil_fisher_agent", ticker, "Fetching financial metrics")
@@ -139,12 +140,14 @@ def phil_fisher_agent(state: AgentState):
         }
 
         progress.update_status("phil_fisher_agent", ticker, "Generating Phil Fisher-style analysis")
-        fisher_output = generate_fisher_output(
+        llm_calls[ticker] = generate_fisher_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, fisher_output in run_llm_calls(llm_calls, state).items():
         fisher_analysis[ticker] = {
             "signal": fisher_output.signal,
             "confidence": fisher_output.confidence,
@@ -153,17 +156,12 @@ def phil_fisher_agent(state: AgentState):
 
         progress.update_status("phil_fisher_agent", ticker, "Done", analysis=fisher_output.reasoning)
 
-    # Wrap results in a single message
-    message = HumanMessage(content=json.dumps(fisher_analysis), name="phil_fisher_agent")
-
     if state["metadata"].get("show_reasoning"):
         show_agent_reasoning(fisher_analysis, "Phil Fisher Agent")
 
-    state["data"]["analyst_signals"]["phil_fisher_agent"] = fisher_analysis
-
     progress.update_status("phil_fisher_agent", None, "Done")
     
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"phil_fisher_agent": fisher_analysis}}
 
 
 def analyze_fisher_growth_quality(financial_line_items: list) -> dict:
@@ -526,19 +524,11 @@ def analyze_sentiment(news_items: list) -> dict:
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_fisher_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> PhilFisherSignal:
-    """
-    Generates a JSON signal in the style of Phil Fisher.
-    """
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-              "system",
-              """You are a Phil Fisher AI agent, making investment decisions using his principles:
+FISHER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+          "system",
+          """You are a Phil Fisher AI agent, making investment decisions using his principles:
   
               1. Emphasize long-term growth potential and quality of management.
               2. Focus on companies investing in R&D for future products/services.
@@ -563,10 +553,10 @@ def generate_fisher_output(
                 - "confidence": a float between 0 and 100
                 - "reasoning": a detailed explanation
               """,
-            ),
-            (
-              "human",
-              """Based on the following analysis, create a Phil Fisher-style investment signal.
+        ),
+        (
+          "human",
+          """Based on the following analysis, create a Phil Fisher-style investment signal.
 
               Analysis Data for {ticker}:
               {analysis_data}
@@ -578,11 +568,20 @@ def generate_fisher_output(
                 "reasoning": "string"
               }}
               """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+async def generate_fisher_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> PhilFisherSignal:
+    """
+    Generates a JSON signal in the style of Phil Fisher.
+    """
+    prompt = build_ticker_prompt(FISHER_PROMPT, ticker, analysis_data, agent_name="phil_fisher_agent")
 
     def create_default_signal():
         return PhilFisherSignal(
@@ -591,10 +590,11 @@ def generate_fisher_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=PhilFisherSignal,
         state=state,
         agent_name="phil_fisher_agent",
         default_factory=create_default_signal,
+        ticker=ticker,
     )
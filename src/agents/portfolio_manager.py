@@ -7,13 +7,14 @@ from pydantic import BaseModel, Field
 from typing_extensions import Literal
 from src.utils.progress import progress
 from src.utils.llm import call_llm
+from src.utils.prompts import serialize_analysis
 
 
 class PortfolioDecision(BaseModel):
     action: Literal["buy", "sell", "short", "cover", "hold"]
     quantity: int = Field(description="Number of shares to trade")
     confidence: float = Field(description="Confidence in the decision, between 0.0 and 100.0")
-    reasoning: str = Field(description="Reasoning for the decision")
+    reasoning: str = Field(default="", description="Reasoning for the decision")
 
 
 class PortfolioManagerOutput(BaseModel):
@@ -26,7 +27,7 @@ def portfolio_management_agent(state: AgentState):
 
     # Get the portfolio and analyst signals
     portfolio = state["data"]["portfolio"]
-    analyst_signals = state["data"]["analyst_signals"]
+    analyst_signals = state["analyst_signals"]
     tickers = state["data"]["tickers"]
 
     # Get position limits, current prices, and signals for every ticker
@@ -79,27 +80,14 @@ def portfolio_management_agent(state: AgentState):
 
     progress.update_status("portfolio_manager", None, "Done")
 
-    return {
-        "messages": state["messages"] + [message],
-        "data": state["data"],
-    }
+    return {"messages": [message]}
 
 
-def generate_trading_decision(
-    tickers: list[str],
-    signals_by_ticker: dict[str, dict],
-    current_prices: dict[str, float],
-    max_shares: dict[str, int],
-    portfolio: dict[str, float],
-    state: AgentState,
-) -> PortfolioManagerOutput:
-    """Attempts to get a decision from the LLM with retry logic"""
-    # Create the prompt template
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are a portfolio manager making final trading decisions based on multiple tickers.
+PORTFOLIO_MANAGER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a portfolio manager making final trading decisions based on multiple tickers.
 
               Trading Rules:
               - For long positions:
@@ -134,10 +122,10 @@ def generate_trading_decision(
               - margin_requirement: current margin requirement for short positions (e.g., 0.5 means 50%)
               - total_margin_used: total margin currently in use
               """,
-            ),
-            (
-                "human",
-                """Based on the team's analysis, make your trading decisions for each ticker.
+        ),
+        (
+            "human",
+            """Based on the team's analysis, make your trading decisions for each ticker.
 
               Here are the signals by ticker:
               {signals_by_ticker}
@@ -169,18 +157,28 @@ def generate_trading_decision(
                 }}
               }}
               """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
 
+
+def generate_trading_decision(
+    tickers: list[str],
+    signals_by_ticker: dict[str, dict],
+    current_prices: dict[str, float],
+    max_shares: dict[str, int],
+    portfolio: dict[str, float],
+    state: AgentState,
+) -> PortfolioManagerOutput:
+    """Attempts to get a decision from the LLM with retry logic"""
     # Generate the prompt
-    prompt = template.invoke(
+    prompt = PORTFOLIO_MANAGER_PROMPT.invoke(
         {
-            "signals_by_ticker": json.dumps(signals_by_ticker, indent=2),
-            "current_prices": json.dumps(current_prices, indent=2),
-            "max_shares": json.dumps(max_shares, indent=2),
+            "signals_by_ticker": serialize_analysis(signals_by_ticker),
+            "current_prices": serialize_analysis(current_prices),
+            "max_shares": serialize_analysis(max_shares),
             "portfolio_cash": f"{portfolio.get('cash', 0):.2f}",
-            "portfolio_positions": json.dumps(portfolio.get("positions", {}), indent=2),
+            "portfolio_positions": serialize_analysis(portfolio.get("positions", {})),
             "margin_requirement": f"{portfolio.get('margin_requirement', 0):.2f}",
             "total_margin_used": f"{portfolio.get('margin_used', 0):.2f}",
         }
@@ -1,17 +1,17 @@
 from src.graph.state import AgentState, show_agent_reasoning
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 from src.utils.progress import progress
 
 class RakeshJhunjhunwalaSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 def rakesh_jhunjhunwala_agent(state: AgentState):
     """Analyzes stocks using Rakesh Jhunjhunwala's principles and LLM reasoning."""
@@ -22,6 +22,7 @@ def rakesh_jhunjhunwala_agent(state: AgentState):
     # Collect all analysis for LLM reasoning
     analysis_data = {}
     jhunjhunwala_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
 
@@ -134,26 +135,24 @@ def rakesh_jhunjhunwala_agent(state: AgentState):
 
         # ─── LLM: craft Jhunjhunwala‑style narrative ──────────────────────────────
         progress.update_status("rakesh_jhunjhunwala_agent", ticker, "Generating Jhunjhunwala analysis")
-        jhunjhunwala_output = generate_jhunjhunwala_output(
+        llm_calls[ticker] = generate_jhunjhunwala_output(
             ticker=ticker,
             analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, jhunjhunwala_output in run_llm_calls(llm_calls, state).items():
         jhunjhunwala_analysis[ticker] = jhunjhunwala_output.model_dump()
 
         progress.update_status("rakesh_jhunjhunwala_agent", ticker, "Done", analysis=jhunjhunwala_output.reasoning)
 
-    # ─── Push message back to graph state ──────────────────────────────────────
-    message = HumanMessage(content=json.dumps(jhunjhunwala_analysis), name="rakesh_jhunjhunwala_agent")
-
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(jhunjhunwala_analysis, "Rakesh Jhunjhunwala Agent")
 
-    state["data"]["analyst_signals"]["rakesh_jhunjhunwala_agent"] = jhunjhunwala_analysis
     progress.update_status("rakesh_jhunjhunwala_agent", None, "Done")
 
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"rakesh_jhunjhunwala_agent": jhunjhunwala_analysis}}
 
 
 def analyze_profitability(financial_line_items: list) -> dict[str, any]:
@@ -638,17 +637,11 @@ def analyze_rakesh_jhunjhunwala_style(
 # ────────────────────────────────────────────────────────────────────────────────
 # LLM generation
 # ────────────────────────────────────────────────────────────────────────────────
-def generate_jhunjhunwala_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> RakeshJhunjhunwalaSignal:
-    """Get investment decision from LLM with Jhunjhunwala's principles"""
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are a Rakesh Jhunjhunwala AI agent. Decide on investment signals based on Rakesh Jhunjhunwala's principles:
+JHUNJHUNWALA_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a Rakesh Jhunjhunwala AI agent. Decide on investment signals based on Rakesh Jhunjhunwala's principles:
                 - Circle of Competence: Only invest in businesses you understand
                 - Margin of Safety (> 30%): Buy at a significant discount to intrinsic value
                 - Economic Moat: Look for durable competitive advantages
@@ -670,10 +663,10 @@ def generate_jhunjhunwala_output(
 
                 Follow these guidelines strictly.
                 """,
-            ),
-            (
-                "human",
-                """Based on the following data, create the investment signal as Rakesh Jhunjhunwala would:
+        ),
+        (
+            "human",
+            """Based on the following data, create the investment signal as Rakesh Jhunjhunwala would:
 
                 Analysis Data for {ticker}:
                 {analysis_data}
@@ -685,20 +678,28 @@ def generate_jhunjhunwala_output(
                   "reasoning": "string"
                 }}
                 """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+
+async def generate_jhunjhunwala_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> RakeshJhunjhunwalaSignal:
+    """Get investment decision from LLM with Jhunjhunwala's principles"""
+    prompt = build_ticker_prompt(JHUNJHUNWALA_PROMPT, ticker, analysis_data, agent_name="rakesh_jhunjhunwala_agent")
 
     # Default fallback signal in case parsing fails
     def create_default_rakesh_jhunjhunwala_signal():
         return RakeshJhunjhunwalaSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=RakeshJhunjhunwalaSignal,
         state=state,
         agent_name="rakesh_jhunjhunwala_agent",
         default_factory=create_default_rakesh_jhunjhunwala_signal,
+        ticker=ticker,
     )
\ No newline at end of file
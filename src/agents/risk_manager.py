@@ -1,8 +1,6 @@
-from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.progress import progress
-from src.tools.api import get_prices, prices_to_df
-import json
+from src.tools.api import get_price_data
 
 
 ##### Risk Management Agent #####
@@ -22,24 +20,18 @@ def risk_management_agent(state: AgentState):
     for ticker in all_tickers:
         progress.update_status("risk_management_agent", ticker, "Fetching price data")
         
-        prices = get_prices(
+        prices_df = get_price_data(
             ticker=ticker,
             start_date=data["start_date"],
             end_date=data["end_date"],
         )
 
-        if not prices:
-            progress.update_status("risk_management_agent", ticker, "Warning: No price data found")
-            continue
-
-        prices_df = prices_to_df(prices)
-        
         if not prices_df.empty:
             current_price = prices_df["close"].iloc[-1]
             current_prices[ticker] = current_price
             progress.update_status("risk_management_agent", ticker, f"Current price: {current_price}")
         else:
-            progress.update_status("risk_management_agent", ticker, "Warning: Empty price data")
+            progress.update_status("risk_management_agent", ticker, "Warning: No price data found")
 
     # Calculate total portfolio value based on current market prices (Net Liquidation Value)
     total_portfolio_value = portfolio.get("cash", 0.0)
@@ -99,18 +91,7 @@ def risk_management_agent(state: AgentState):
         
         progress.update_status("risk_management_agent", ticker, "Done")
 
-    message = HumanMessage(
-        content=json.dumps(risk_analysis),
-        name="risk_management_agent",
-    )
-
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(risk_analysis, "Risk Management Agent")
 
-    # Add the signal to the analyst_signals list
-    state["data"]["analyst_signals"]["risk_management_agent"] = risk_analysis
-
-    return {
-        "messages": state["messages"] + [message],
-        "data": data,
-    }
+    return {"analyst_signals": {"risk_management_agent": risk_analysis}}
@@ -1,4 +1,3 @@
-from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.progress import progress
 import pandas as pd
@@ -81,22 +80,10 @@ def sentiment_analyst_agent(state: AgentState):
 
         progress.update_status("sentiment_analyst_agent", ticker, "Done", analysis=json.dumps(reasoning, indent=4))
 
-    # Create the sentiment message
-    message = HumanMessage(
-        content=json.dumps(sentiment_analysis),
-        name="sentiment_analyst_agent",
-    )
-
     # Print the reasoning if the flag is set
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(sentiment_analysis, "Sentiment Analysis Agent")
 
-    # Add the signal to the analyst_signals list
-    state["data"]["analyst_signals"]["sentiment_agent"] = sentiment_analysis
-
     progress.update_status("sentiment_analyst_agent", None, "Done")
 
-    return {
-        "messages": [message],
-        "data": data,
-    }
+    return {"analyst_signals": {"sentiment_agent": sentiment_analysis}}
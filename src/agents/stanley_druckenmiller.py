@@ -8,19 +8,19 @@ from src.tools.api import (
     get_prices,
 )
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.utils.progress import progress
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 import statistics
 
 
 class StanleyDruckenmillerSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def stanley_druckenmiller_agent(state: AgentState):
@@ -40,6 +40,7 @@ def stanley_druckenmiller_agent(state: AgentState):
 
     analysis_data = {}
     druck_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching financial metrics")
@@ -134,12 +135,14 @@ def stanley_druckenmiller_agent(state: AgentState):
         }
 
         progress.update_status("stanley_druckenmiller_agent", ticker, "Generating Stanley Druckenmiller analysis")
-        druck_output = generate_druckenmiller_output(
+        llm_calls[ticker] = generate_druckenmiller_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, druck_output in run_llm_calls(llm_calls, state).items():
         druck_analysis[ticker] = {
             "signal": druck_output.signal,
             "confidence": druck_output.confidence,
@@ -148,17 +151,12 @@ def stanley_druckenmiller_agent(state: AgentState):
 
         progress.update_status("stanley_druckenmiller_agent", ticker, "Done", analysis=druck_output.reasoning)
 
-    # Wrap results in a single message
-    message = HumanMessage(content=json.dumps(druck_analysis), name="stanley_druckenmiller_agent")
-
     if state["metadata"].get("show_reasoning"):
         show_agent_reasoning(druck_analysis, "Stanley Druckenmiller Agent")
 
-    state["data"]["analyst_signals"]["stanley_druckenmiller_agent"] = druck_analysis
-
     progress.update_status("stanley_druckenmiller_agent", None, "Done")
     
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"stanley_druckenmiller_agent": druck_analysis}}
 
 
 def analyze_growth_and_momentum(financial_line_items: list, prices: list) -> dict:
@@ -520,19 +518,11 @@ def analyze_druckenmiller_valuation(financial_line_items: list, market_cap: floa
     return {"score": final_score, "details": "; ".join(details)}
 
 
-def generate_druckenmiller_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> StanleyDruckenmillerSignal:
-    """
-    Generates a JSON signal in the style of Stanley Druckenmiller.
-    """
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-              "system",
-              """You are a Stanley Druckenmiller AI agent, making investment decisions using his principles:
+DRUCKENMILLER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+          "system",
+          """You are a Stanley Druckenmiller AI agent, making investment decisions using his principles:
             
               1. Seek asymmetric risk-reward opportunities (large upside, limited downside).
               2. Emphasize growth, momentum, and market sentiment.
@@ -558,10 +548,10 @@ def generate_druckenmiller_output(
               For example, if bullish: "The company shows exceptional momentum with revenue accelerating from 22% to 35% YoY and the stock up 28% over the past three months. Risk-reward is highly asymmetric with 70% upside potential based on FCF multiple expansion and only 15% downside risk given the strong balance sheet with 3x cash-to-debt. Insider buying and positive market sentiment provide additional tailwinds..."
               For example, if bearish: "Despite recent stock momentum, revenue growth has decelerated from 30% to 12% YoY, and operating margins are contracting. The risk-reward proposition is unfavorable with limited 10% upside potential against 40% downside risk. The competitive landscape is intensifying, and insider selling suggests waning confidence. I'm seeing better opportunities elsewhere with more favorable setups..."
               """,
-            ),
-            (
-              "human",
-              """Based on the following analysis, create a Druckenmiller-style investment signal.
+        ),
+        (
+          "human",
+          """Based on the following analysis, create a Druckenmiller-style investment signal.
 
               Analysis Data for {ticker}:
               {analysis_data}
@@ -573,11 +563,20 @@ def generate_druckenmiller_output(
                 "reasoning": "string"
               }}
               """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+async def generate_druckenmiller_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> StanleyDruckenmillerSignal:
+    """
+    Generates a JSON signal in the style of Stanley Druckenmiller.
+    """
+    prompt = build_ticker_prompt(DRUCKENMILLER_PROMPT, ticker, analysis_data, agent_name="stanley_druckenmiller_agent")
 
     def create_default_signal():
         return StanleyDruckenmillerSignal(
@@ -586,10 +585,11 @@ def generate_druckenmiller_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=StanleyDruckenmillerSignal,
         agent_name="stanley_druckenmiller_agent",
         state=state,
         default_factory=create_default_signal,
+        ticker=ticker,
     )
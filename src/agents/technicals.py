@@ -1,14 +1,12 @@
 import math
 
-from langchain_core.messages import HumanMessage
-
 from src.graph.state import AgentState, show_agent_reasoning
 
 import json
 import pandas as pd
 import numpy as np
 
-from src.tools.api import get_prices, prices_to_df
+from src.tools.api import get_price_data
 from src.utils.progress import progress
 
 
@@ -52,20 +50,17 @@ def technical_analyst_agent(state: AgentState):
     for ticker in tickers:
         progress.update_status("technical_analyst_agent", ticker, "Analyzing price data")
 
-        # Get the historical price data
-        prices = get_prices(
+        # Get the historical price data as a DataFrame
+        prices_df = get_price_data(
             ticker=ticker,
             start_date=start_date,
             end_date=end_date,
         )
 
-        if not prices:
+        if prices_df.empty:
             progress.update_status("technical_analyst_agent", ticker, "Failed: No price data found")
             continue
 
-        # Convert prices to a DataFrame
-        prices_df = prices_to_df(prices)
-
         progress.update_status("technical_analyst_agent", ticker, "Calculating trend signals")
         trend_signals = calculate_trend_signals(prices_df)
 
@@ -136,24 +131,12 @@ def technical_analyst_agent(state: AgentState):
         }
         progress.update_status("technical_analyst_agent", ticker, "Done", analysis=json.dumps(technical_analysis, indent=4))
 
-    # Create the technical analyst message
-    message = HumanMessage(
-        content=json.dumps(technical_analysis),
-        name="technical_analyst_agent",
-    )
-
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(technical_analysis, "Technical Analyst")
 
-    # Add the signal to the analyst_signals list
-    state["data"]["analyst_signals"]["technical_analyst_agent"] = technical_analysis
-
     progress.update_status("technical_analyst_agent", None, "Done")
 
-    return {
-        "messages": state["messages"] + [message],
-        "data": data,
-    }
+    return {"analyst_signals": {"technical_analyst_agent": technical_analysis}}
 
 
 def calculate_trend_signals(prices_df):
@@ -8,7 +8,6 @@ configurable weights.
 
 from statistics import median
 import json
-from langchain_core.messages import HumanMessage
 from src.graph.state import AgentState, show_agent_reasoning
 from src.utils.progress import progress
 
@@ -147,17 +146,12 @@ def valuation_analyst_agent(state: AgentState):
         }
         progress.update_status("valuation_analyst_agent", ticker, "Done", analysis=json.dumps(reasoning, indent=4))
 
-    # ---- Emit message (for LLM tool chain) ----
-    msg = HumanMessage(content=json.dumps(valuation_analysis), name="valuation_analyst_agent")
     if state["metadata"].get("show_reasoning"):
         show_agent_reasoning(valuation_analysis, "Valuation Analysis Agent")
 
-    # Add the signal to the analyst_signals list
-    state["data"]["analyst_signals"]["valuation_analyst_agent"] = valuation_analysis
-
     progress.update_status("valuation_analyst_agent", None, "Done")
     
-    return {"messages": [msg], "data": data}
+    return {"analyst_signals": {"valuation_analyst_agent": valuation_analysis}}
 
 #############################
 # Helper Valuation Functions
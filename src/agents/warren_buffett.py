@@ -1,18 +1,18 @@
 from src.graph.state import AgentState, show_agent_reasoning
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
 from typing_extensions import Literal
 from src.tools.api import get_financial_metrics, get_market_cap, search_line_items
-from src.utils.llm import call_llm
+from src.utils.concurrency import run_llm_calls
+from src.utils.llm import acall_llm
+from src.utils.prompts import build_ticker_prompt
 from src.utils.progress import progress
 
 
 class WarrenBuffettSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
-    reasoning: str
+    reasoning: str = ""
 
 
 def warren_buffett_agent(state: AgentState):
@@ -24,6 +24,7 @@ def warren_buffett_agent(state: AgentState):
     # Collect all analysis for LLM reasoning
     analysis_data = {}
     buffett_analysis = {}
+    llm_calls = {}  # ticker -> pending LLM call
 
     for ticker in tickers:
         progress.update_status("warren_buffett_agent", ticker, "Fetching financial metrics")
@@ -120,12 +121,14 @@ def warren_buffett_agent(state: AgentState):
         }
 
         progress.update_status("warren_buffett_agent", ticker, "Generating Warren Buffett analysis")
-        buffett_output = generate_buffett_output(
+        llm_calls[ticker] = generate_buffett_output(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis_data[ticker],
             state=state,
         )
 
+    # Run the LLM calls for all tickers concurrently
+    for ticker, buffett_output in run_llm_calls(llm_calls, state).items():
         # Store analysis in consistent format with other agents
         buffett_analysis[ticker] = {
             "signal": buffett_output.signal,
@@ -135,19 +138,13 @@ def warren_buffett_agent(state: AgentState):
 
         progress.update_status("warren_buffett_agent", ticker, "Done", analysis=buffett_output.reasoning)
 
-    # Create the message
-    message = HumanMessage(content=json.dumps(buffett_analysis), name="warren_buffett_agent")
-
     # Show reasoning if requested
     if state["metadata"]["show_reasoning"]:
         show_agent_reasoning(buffett_analysis, "Warren Buffett Agent")
 
-    # Add the signal to the analyst_signals list
-    state["data"]["analyst_signals"]["warren_buffett_agent"] = buffett_analysis
-
     progress.update_status("warren_buffett_agent", None, "Done")
 
-    return {"messages": [message], "data": state["data"]}
+    return {"analyst_signals": {"warren_buffett_agent": buffett_analysis}}
 
 
 def analyze_fundamentals(metrics: list) -> dict[str, any]:
@@ -723,17 +720,11 @@ def analyze_pricing_power(financial_line_items: list, metrics: list) -> dict[str
     }
 
 
-def generate_buffett_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    state: AgentState,
-) -> WarrenBuffettSignal:
-    """Get investment decision from LLM with Buffett's principles"""
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are Warren Buffett, the Oracle of Omaha. Analyze investment opportunities using my proven methodology developed over 60+ years of investing:
+BUFFETT_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are Warren Buffett, the Oracle of Omaha. Analyze investment opportunities using my proven methodology developed over 60+ years of investing:
 
                 MY CORE PRINCIPLES:
                 1. Circle of Competence: "Risk comes from not knowing what you're doing." Only invest in businesses I thoroughly understand.
@@ -789,10 +780,10 @@ def generate_buffett_output(
 
                 Remember: I'd rather own a wonderful business at a fair price than a fair business at a wonderful price. And when in doubt, the answer is usually "no" - there's no penalty for missed opportunities, only for permanent capital loss.
                 """,
-            ),
-            (
-                "human",
-                """Analyze this investment opportunity for {ticker}:
+        ),
+        (
+            "human",
+            """Analyze this investment opportunity for {ticker}:
 
                 COMPREHENSIVE ANALYSIS DATA:
                 {analysis_data}
@@ -815,20 +806,28 @@ def generate_buffett_output(
 
                 Write as Warren Buffett would speak - plainly, with conviction, and with specific references to the data provided.
                 """,
-            ),
-        ]
-    )
+        ),
+    ]
+)
+
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+async def generate_buffett_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    state: AgentState,
+) -> WarrenBuffettSignal:
+    """Get investment decision from LLM with Buffett's principles"""
+    prompt = build_ticker_prompt(BUFFETT_PROMPT, ticker, analysis_data, agent_name="warren_buffett_agent")
 
     # Default fallback signal in case parsing fails
     def create_default_warren_buffett_signal():
         return WarrenBuffettSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
 
-    return call_llm(
+    return await acall_llm(
         prompt=prompt,
         pydantic_model=WarrenBuffettSignal,
         agent_name="warren_buffett_agent",
         state=state,
         default_factory=create_default_warren_buffett_signal,
+        ticker=ticker,
     )
@@ -4,25 +4,33 @@ from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import questionary
 
-import matplotlib.pyplot as plt
 import pandas as pd
 from colorama import Fore, Style, init
 import numpy as np
 import itertools
 
-from src.llm.models import LLM_ORDER, OLLAMA_LLM_ORDER, get_model_info, ModelProvider
+from src.llm.models import OLLAMA_LLM_ORDER, get_llm_order, get_model_info, ModelProvider
 from src.utils.analysts import ANALYST_ORDER
 from src.main import run_hedge_fund
 from src.tools.api import (
     get_company_news,
     get_price_data,
     get_prices,
+    get_outstanding_shares,
     get_financial_metrics,
     get_insider_trades,
 )
-from src.utils.display import print_backtest_results, format_backtest_row
+from src.data.cache import load_cache, persist_cache
+from src.data.stats import dump_data_stats
+from src.llm.batch import BatchCollector, collecting, run_batch
+from src.llm.cache import get_llm_cache
+from src.llm.metrics import get_llm_metrics, new_run_id
+from src.llm.rate_limit import get_rate_limit_stats
+from src.llm.ollama_runtime import get_ollama_runtime_stats
+from src.utils.display import print_backtest_results, format_backtest_row, print_llm_cache_stats, print_llm_metrics_summary, print_ollama_runtime_stats, print_prompt_stats, print_rate_limit_stats
 from typing_extensions import Callable
 from src.utils.ollama import ensure_ollama_and_model
+from src.utils.prompts import DEFAULT_REASONING_MODE, REASONING_MODES, get_prompt_stats
 
 init(autoreset=True)
 
@@ -39,6 +47,8 @@ class Backtester:
         model_provider: str = "OpenAI",
         selected_analysts: list[str] = [],
         initial_margin_requirement: float = 0.0,
+        reasoning_mode: str = DEFAULT_REASONING_MODE,
+        llm_batch_window: int = 0,
     ):
         """
         :param agent: The trading agent (Callable).
@@ -50,6 +60,9 @@ class Backtester:
         :param model_provider: Which LLM provider (OpenAI, etc).
         :param selected_analysts: List of analyst names or IDs to incorporate.
         :param initial_margin_requirement: The margin ratio (e.g. 0.5 = 50%).
+        :param reasoning_mode: How much reasoning agents write: "full", "brief" or "none" (fastest).
+        :param llm_batch_window: If set, the analysts' LLM requests for this many trading days at a time are
+            submitted as an offline batch before those days are simulated (cheaper, for long backtests).
         """
         self.agent = agent
         self.tickers = tickers
@@ -59,6 +72,8 @@ class Backtester:
         self.model_name = model_name
         self.model_provider = model_provider
         self.selected_analysts = selected_analysts
+        self.reasoning_mode = reasoning_mode
+        self.llm_batch_window = llm_batch_window
 
         # Initialize portfolio with support for long/short positions
         self.portfolio_values = []
@@ -272,6 +287,10 @@ class Backtester:
         start_date_dt = end_date_dt - relativedelta(years=1)
         start_date_str = start_date_dt.strftime("%Y-%m-%d")
 
+        # Start from the data persisted by earlier runs if FINANCIAL_DATA_CACHE_DIR is set
+        if cache_dir := load_cache():
+            print(f"Data cache loaded from {cache_dir}")
+
         for ticker in self.tickers:
             # Fetch price data for the entire period, plus 1 year
             get_prices(ticker, start_date_str, self.end_date)
@@ -279,15 +298,58 @@ class Backtester:
             # Fetch financial metrics
             get_financial_metrics(ticker, self.end_date, limit=10)
 
+            # Fetch the reported share counts (for historical market caps)
+            get_outstanding_shares(ticker, self.end_date)
+
             # Fetch insider trades
             get_insider_trades(ticker, self.end_date, start_date=self.start_date, limit=1000)
 
             # Fetch company news
             get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000)
 
+        # Persist the warm cache if FINANCIAL_DATA_CACHE_DIR is set, so later runs start warm
+        if cache_dir := persist_cache():
+            print(f"Data cache saved to {cache_dir}")
+
         print("Data pre-fetch complete.")
 
+    def run_llm_batch(self, dates: pd.DatetimeIndex):
+        """Collect the analysts' LLM requests for a window of dates and answer them with an offline batch."""
+        if get_llm_cache() is None:
+            print("LLM batch mode needs the LLM response cache (LLM_CACHE=1); continuing with interactive calls")
+            self.llm_batch_window = 0
+            return
+
+        # Analyst prompts depend only on the market data, so they can be produced ahead of the simulation;
+        # the portfolio manager's calls are answered with defaults here and made for real during the simulation
+        collector = BatchCollector()
+        with collecting(collector):
+            for current_date in dates:
+                lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
+                current_date_str = current_date.strftime("%Y-%m-%d")
+                if lookback_start == current_date_str:
+                    continue
+                self.agent(
+                    tickers=self.tickers,
+                    start_date=lookback_start,
+                    end_date=current_date_str,
+                    portfolio=self.portfolio,
+                    model_name=self.model_name,
+                    model_provider=self.model_provider,
+                    selected_analysts=self.selected_analysts,
+                    reasoning_mode=self.reasoning_mode,
+                    run_id=self.run_id,
+                )
+
+        if collector.requests:
+            stored = run_batch(collector)
+            print(f"LLM batch {dates[0]:%Y-%m-%d} to {dates[-1]:%Y-%m-%d}: {stored}/{len(collector.requests)} responses received")
+
     def run_backtest(self):
+        # Every day's run is tagged with the backtest's id, so the LLM metrics cover the whole backtest
+        get_llm_metrics().reset()
+        self.run_id = new_run_id()
+
         # Pre-fetch all data at the start
         self.prefetch_data()
 
@@ -303,7 +365,11 @@ class Backtester:
         else:
             self.portfolio_values = []
 
-        for current_date in dates:
+        for i, current_date in enumerate(dates):
+            # In batch mode, answer the LLM requests of the next window of days offline before simulating them
+            if self.llm_batch_window and i % self.llm_batch_window == 0:
+                self.run_llm_batch(dates[i : i + self.llm_batch_window])
+
             lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
             current_date_str = current_date.strftime("%Y-%m-%d")
             previous_date_str = (current_date - timedelta(days=1)).strftime("%Y-%m-%d")
@@ -350,6 +416,8 @@ class Backtester:
                 model_name=self.model_name,
                 model_provider=self.model_provider,
                 selected_analysts=self.selected_analysts,
+                reasoning_mode=self.reasoning_mode,
+                run_id=self.run_id,
             )
             decisions = output["decisions"]
             analyst_signals = output["analyst_signals"]
@@ -462,6 +530,19 @@ class Backtester:
 
         # Store the final performance metrics for reference in analyze_performance
         self.performance_metrics = performance_metrics
+
+        # Save data fetched during the run if FINANCIAL_DATA_CACHE_DIR is set
+        persist_cache()
+
+        # Write data-layer counters if DATA_STATS_FILE is set
+        if stats_path := dump_data_stats():
+            print(f"Data-layer stats written to {stats_path}")
+
+        print_llm_metrics_summary(get_llm_metrics().summary())
+        print_llm_cache_stats(llm_cache.stats() if (llm_cache := get_llm_cache()) else None)
+        print_prompt_stats(get_prompt_stats().snapshot())
+        print_rate_limit_stats(get_rate_limit_stats())
+        print_ollama_runtime_stats(get_ollama_runtime_stats())
         return performance_metrics
 
     def _update_performance_metrics(self, performance_metrics):
@@ -536,6 +617,9 @@ class Backtester:
         print(f"Total Realized Gains/Losses: {Fore.GREEN if total_realized_gains >= 0 else Fore.RED}${total_realized_gains:,.2f}{Style.RESET_ALL}")
 
         # Plot the portfolio value over time
+        # Imported here: matplotlib is slow to import and only needed for this chart
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, 6))
         plt.plot(performance_df.index, performance_df["Portfolio Value"], color="blue")
         plt.title("Portfolio Value Over Time")
@@ -651,6 +735,18 @@ if __name__ == "__main__":
         action="store_true",
         help="Use all available analysts (overrides --analysts)",
     )
+    parser.add_argument(
+        "--reasoning-mode",
+        choices=REASONING_MODES,
+        default=DEFAULT_REASONING_MODE,
+        help="How much reasoning agents write: full, brief or none (fastest). Defaults to full",
+    )
+    parser.add_argument(
+        "--llm-batch-window",
+        type=int,
+        default=0,
+        help="Submit the analysts' LLM requests as offline batches of this many trading days (default: 0, interactive calls)",
+    )
     parser.add_argument("--ollama", action="store_true", help="Use Ollama for local LLM inference")
 
     args = parser.parse_args()
@@ -729,7 +825,7 @@ if __name__ == "__main__":
         # Use the standard cloud-based LLM selection
         model_choice = questionary.select(
             "Select your LLM model:",
-            choices=[questionary.Choice(display, value=(name, provider)) for display, name, provider in LLM_ORDER],
+            choices=[questionary.Choice(display, value=(name, provider)) for display, name, provider in get_llm_order()],
             style=questionary.Style(
                 [
                     ("selected", "fg:green bold"),
@@ -770,6 +866,8 @@ if __name__ == "__main__":
         model_provider=model_provider,
         selected_analysts=selected_analysts,
         initial_margin_requirement=args.margin_requirement,
+        reasoning_mode=args.reasoning_mode,
+        llm_batch_window=args.llm_batch_window,
     )
 
     performance_metrics = backtester.run_backtest()
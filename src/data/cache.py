@@ -1,3 +1,18 @@
+import datetime
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.data.serialization import dumps_entries, loads_timed_entries
+from src.data.stats import get_data_stats
+
+# Cache namespaces that are persisted to disk, one file per namespace
+PERSISTED_NAMESPACES = ("prices", "financial_metrics", "line_items", "insider_trades", "company_news")
+CACHE_FILE_SUFFIX = ".ahfc"
+DEFAULT_MAX_AGE_HOURS = 24
+
+
 class Cache:
     """In-memory cache for API responses."""
 
@@ -7,6 +22,27 @@ class Cache:
         self._line_items_cache: dict[str, list[dict[str, any]]] = {}
         self._insider_trades_cache: dict[str, list[dict[str, any]]] = {}
         self._company_news_cache: dict[str, list[dict[str, any]]] = {}
+        self._company_facts_cache: dict[str, tuple[float, dict[str, any]]] = {}  # ticker -> (stored at, facts)
+        self._close_prices: dict[str, dict[str, float]] = {}  # ticker -> {YYYY-MM-DD: close}
+        self._outstanding_shares: dict[str, tuple[str, list[tuple[str, float]]]] = {}  # ticker -> (fetched up to, [(report period, shares)])
+        self._stored_at: dict[str, dict[str, float]] = {}  # namespace -> key -> when a persisted entry was stored (epoch seconds)
+        self._pending: dict[tuple[str, str, int], list[dict[str, any]]] = {}  # (namespace, key, thread) -> records of an entry still being fetched
+        self._pending_lock = threading.Lock()
+
+    def _lookup(self, cache: dict[str, list[dict[str, any]]], key: str, endpoint: str) -> list[dict[str, any]] | None:
+        """Look up a cache entry and record whether it was a hit, a negative hit (cached empty result) or a miss."""
+        data = cache.get(key)
+        if data is None:
+            get_data_stats().record_miss(endpoint)
+        elif not data:
+            get_data_stats().record_negative_hit(endpoint)
+        else:
+            get_data_stats().record_hit(endpoint)
+        return data
+
+    def _refreshed(self, namespace: str, key: str):
+        """Forget when a persisted entry was stored once it is updated from the API, so it is saved as fresh."""
+        self._stored_at.get(namespace, {}).pop(key, None)
 
     def _merge_data(self, existing: list[dict] | None, new_data: list[dict], key_field: str) -> list[dict]:
         """Merge existing and new data, avoiding duplicates based on a key field."""
@@ -23,49 +59,175 @@ class Cache:
 
     def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached price data if available."""
-        return self._prices_cache.get(ticker)
+        return self._lookup(self._prices_cache, ticker, "prices")
 
     def set_prices(self, ticker: str, data: list[dict[str, any]]):
         """Append new price data to cache."""
+        self._refreshed("prices", ticker)
         self._prices_cache[ticker] = self._merge_data(self._prices_cache.get(ticker), data, key_field="time")
 
     def get_financial_metrics(self, ticker: str) -> list[dict[str, any]]:
         """Get cached financial metrics if available."""
-        return self._financial_metrics_cache.get(ticker)
+        return self._lookup(self._financial_metrics_cache, ticker, "financial_metrics")
 
     def set_financial_metrics(self, ticker: str, data: list[dict[str, any]]):
         """Append new financial metrics to cache."""
+        self._refreshed("financial_metrics", ticker)
         self._financial_metrics_cache[ticker] = self._merge_data(self._financial_metrics_cache.get(ticker), data, key_field="report_period")
 
     def get_line_items(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached line items if available."""
-        return self._line_items_cache.get(ticker)
+        return self._lookup(self._line_items_cache, ticker, "line_items")
 
     def set_line_items(self, ticker: str, data: list[dict[str, any]]):
         """Append new line items to cache."""
+        self._refreshed("line_items", ticker)
         self._line_items_cache[ticker] = self._merge_data(self._line_items_cache.get(ticker), data, key_field="report_period")
 
     def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached insider trades if available."""
-        return self._insider_trades_cache.get(ticker)
+        return self._lookup(self._insider_trades_cache, ticker, "insider_trades")
 
     def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
         """Append new insider trades to cache."""
+        self._refreshed("insider_trades", ticker)
         self._insider_trades_cache[ticker] = self._merge_data(self._insider_trades_cache.get(ticker), data, key_field="filing_date")  # Could also use transaction_date if preferred
 
     def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached company news if available."""
-        return self._company_news_cache.get(ticker)
+        return self._lookup(self._company_news_cache, ticker, "company_news")
 
     def set_company_news(self, ticker: str, data: list[dict[str, any]]):
         """Append new company news to cache."""
+        self._refreshed("company_news", ticker)
         self._company_news_cache[ticker] = self._merge_data(self._company_news_cache.get(ticker), data, key_field="date")
 
 
+    def append_pending(self, namespace: str, key: str, records: list[dict[str, any]]):
+        """Store a chunk of the records of an entry that is still being fetched. The entry is not visible until `commit_pending`."""
+        with self._pending_lock:
+            self._pending.setdefault((namespace, key, threading.get_ident()), []).extend(records)
+
+    def commit_pending(self, namespace: str, key: str) -> list[dict[str, any]]:
+        """Make the chunks stored by `append_pending` (in this thread) the cache entry; returns its records."""
+        with self._pending_lock:
+            records = self._pending.pop((namespace, key, threading.get_ident()), [])
+        getattr(self, f"set_{namespace}")(key, records)
+        return records
+
+    def discard_pending(self, namespace: str, key: str):
+        """Drop the chunks of an entry whose fetch failed."""
+        with self._pending_lock:
+            self._pending.pop((namespace, key, threading.get_ident()), None)
+
+    def get_company_facts(self, ticker: str, ttl: float) -> dict[str, any] | None:
+        """Get cached company facts if they are younger than `ttl` seconds. An empty dict means the ticker has no facts."""
+        entry = self._company_facts_cache.get(ticker)
+        if entry is None or time.monotonic() - entry[0] > ttl:
+            get_data_stats().record_miss("company_facts")
+            return None
+        if not entry[1]:
+            get_data_stats().record_negative_hit("company_facts")
+        else:
+            get_data_stats().record_hit("company_facts")
+        return entry[1]
+
+    def set_company_facts(self, ticker: str, data: dict[str, any]):
+        """Store company facts, replacing any previous entry."""
+        self._company_facts_cache[ticker] = (time.monotonic(), data)
+
+    def get_outstanding_shares(self, ticker: str, end_date: str) -> list[tuple[str, float]] | None:
+        """Get the cached (report period, shares) reports of a ticker if they were fetched up to at least `end_date`."""
+        entry = self._outstanding_shares.get(ticker)
+        if entry is None or end_date > entry[0]:
+            get_data_stats().record_miss("outstanding_shares")
+            return None
+        get_data_stats().record_hit("outstanding_shares")
+        return entry[1]
+
+    def set_outstanding_shares(self, ticker: str, end_date: str, reports: list[tuple[str, float]]):
+        """Store the share counts reported up to `end_date`, unless reports up to a later date are cached."""
+        if ticker not in self._outstanding_shares or end_date > self._outstanding_shares[ticker][0]:
+            self._outstanding_shares[ticker] = (end_date, reports)
+
+    def set_close_prices(self, ticker: str, data: list[dict[str, any]]):
+        """Index daily close prices by date so they can be shared across price ranges."""
+        closes = self._close_prices.setdefault(ticker, {})
+        for price in data:
+            closes[price["time"][:10]] = price["close"]
+
+    def get_close_price(self, ticker: str, date: str, max_age_days: int = 7) -> float | None:
+        """Get the latest cached close on or before `date` (YYYY-MM-DD), looking back at most `max_age_days`."""
+        closes = self._close_prices.get(ticker)
+        if not closes:
+            return None
+        day = datetime.date.fromisoformat(date)
+        for offset in range(max_age_days + 1):
+            if (close := closes.get((day - datetime.timedelta(days=offset)).isoformat())) is not None:
+                return close
+        return None
+
+    def save(self, directory: str):
+        """Persist the cached API responses to `directory`, one compressed file per namespace."""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        for namespace in PERSISTED_NAMESPACES:
+            target = path / f"{namespace}{CACHE_FILE_SUFFIX}"
+            temp = target.with_suffix(".tmp")
+            temp.write_bytes(dumps_entries(getattr(self, f"_{namespace}_cache"), self._stored_at.get(namespace)))
+            os.replace(temp, target)  # Atomic, so readers never see a partial file
+
+    def load(self, directory: str, max_age: float | None = None):
+        """Load cached API responses persisted by `save`, skipping entries older than `max_age` seconds. Entries already in memory take precedence."""
+        path = Path(directory)
+        for namespace in PERSISTED_NAMESPACES:
+            file = path / f"{namespace}{CACHE_FILE_SUFFIX}"
+            if not file.exists():
+                continue
+            try:
+                entries = loads_timed_entries(file.read_bytes(), max_age)
+            except Exception as e:
+                print(f"Ignoring unreadable cache file {file}: {e}")
+                continue
+            cache = getattr(self, f"_{namespace}_cache")
+            stored_at = self._stored_at.setdefault(namespace, {})
+            for key, (stored, data) in entries.items():
+                if key not in cache:
+                    cache[key] = data
+                    stored_at[key] = stored
+            if namespace == "prices":
+                # Price cache keys are "<ticker>_<start_date>_<end_date>"
+                for key, (_, data) in entries.items():
+                    self.set_close_prices(key.rsplit("_", 2)[0], data)
+
+
 # Global cache instance
 _cache = Cache()
+_loaded_from: str | None = None
 
 
 def get_cache() -> Cache:
     """Get the global cache instance."""
     return _cache
+
+
+def persist_cache() -> str | None:
+    """Save the global cache to FINANCIAL_DATA_CACHE_DIR if set. Returns the directory written, if any."""
+    if not (directory := os.environ.get("FINANCIAL_DATA_CACHE_DIR")):
+        return None
+    _cache.save(directory)
+    return directory
+
+
+def load_cache() -> str | None:
+    """
+    Warm the global cache from FINANCIAL_DATA_CACHE_DIR if set, skipping entries older than
+    FINANCIAL_DATA_CACHE_MAX_AGE_HOURS. Returns the directory read, if any; a directory is only read once.
+    """
+    global _loaded_from
+    if not (directory := os.environ.get("FINANCIAL_DATA_CACHE_DIR")) or directory == _loaded_from:
+        return None
+    max_age_hours = float(os.environ.get("FINANCIAL_DATA_CACHE_MAX_AGE_HOURS", DEFAULT_MAX_AGE_HOURS))
+    _cache.load(directory, max_age=max_age_hours * 3600)
+    _loaded_from = directory
+    return directory
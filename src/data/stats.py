@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds (in seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class EndpointStats:
+    """Counters for a single data endpoint (prices, financial_metrics, ...)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.requests = 0
+        self.errors = 0
+        self.response_bytes = 0
+        self.records_parsed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_histogram = [0] * len(LATENCY_BUCKETS)
+
+    def observe_latency(self, seconds: float):
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+        self.latency_histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def to_dict(self) -> dict[str, any]:
+        lookups = self.hits + self.misses + self.negative_hits
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else None,
+            "requests": self.requests,
+            "errors": self.errors,
+            "response_bytes": self.response_bytes,
+            "records_parsed": self.records_parsed,
+            "latency_total_seconds": round(self.latency_total, 6),
+            "latency_mean_seconds": round(self.latency_total / self.requests, 6) if self.requests else None,
+            "latency_max_seconds": round(self.latency_max, 6),
+            "latency_histogram": {("+Inf" if bound == float("inf") else str(bound)): count for bound, count in zip(LATENCY_BUCKETS, self.latency_histogram)},
+        }
+
+
+class DataStats:
+    """Thread-safe per-endpoint counters for the data layer (cache lookups and API requests)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, EndpointStats] = {}
+
+    def _get(self, endpoint: str) -> EndpointStats:
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = EndpointStats()
+        return self._endpoints[endpoint]
+
+    def record_hit(self, endpoint: str):
+        """Record a cache lookup that returned data."""
+        with self._lock:
+            self._get(endpoint).hits += 1
+
+    def record_negative_hit(self, endpoint: str):
+        """Record a cache lookup that returned a cached empty result."""
+        with self._lock:
+            self._get(endpoint).negative_hits += 1
+
+    def record_miss(self, endpoint: str):
+        """Record a cache lookup that found nothing."""
+        with self._lock:
+            self._get(endpoint).misses += 1
+
+    def record_request(self, endpoint: str, seconds: float, response_bytes: int, ok: bool = True):
+        """Record a completed API request."""
+        with self._lock:
+            stats = self._get(endpoint)
+            stats.requests += 1
+            stats.response_bytes += response_bytes
+            stats.observe_latency(seconds)
+            if not ok:
+                stats.errors += 1
+
+    def record_records(self, endpoint: str, count: int):
+        """Record the number of records parsed from API responses."""
+        with self._lock:
+            self._get(endpoint).records_parsed += count
+
+    @contextmanager
+    def time_request(self, endpoint: str):
+        """Time a block as an API request; the yielded dict may set `bytes` and `ok`."""
+        result = {"bytes": 0, "ok": True}
+        start = time.perf_counter()
+        try:
+            yield result
+        except Exception:
+            result["ok"] = False
+            raise
+        finally:
+            self.record_request(endpoint, time.perf_counter() - start, result["bytes"], result["ok"])
+
+    def snapshot(self) -> dict[str, dict[str, any]]:
+        """Get the current counters of every endpoint as a dictionary."""
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in sorted(self._endpoints.items())}
+
+    def reset(self):
+        """Clear all counters."""
+        with self._lock:
+            self._endpoints.clear()
+
+    def dump(self, path: str):
+        """Write the current counters to a JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+# Global stats instance
+_data_stats = DataStats()
+
+
+def get_data_stats() -> DataStats:
+    """Get the global data-layer stats instance."""
+    return _data_stats
+
+
+def dump_data_stats(path: str | None = None) -> str | None:
+    """Dump the data-layer stats to `path`, or to DATA_STATS_FILE if set. Returns the path written, if any."""
+    path = path or os.environ.get("DATA_STATS_FILE")
+    if not path:
+        return None
+    _data_stats.dump(path)
+    return path
@@ -0,0 +1,49 @@
+"""Process-wide cache of compiled agent graphs.
+
+Building and compiling a graph costs far more than the per-run bookkeeping around it, and the
+backtester runs the same graph once per simulated day. Compiled graphs hold no run state, so one
+compiled graph per analyst selection (and graph options) is shared by all runs, threads and requests.
+"""
+
+import threading
+from typing import Callable
+
+from langgraph.graph import StateGraph
+
+
+class CompiledGraphCache:
+    """Compiled graphs keyed by builder, analyst selection (order-insensitive) and graph options."""
+
+    def __init__(self):
+        self._graphs: dict[tuple, any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, build: Callable[..., StateGraph], selected_analysts: list[str] | None = None, **options):
+        """Get the compiled graph of `build(selected_analysts, **options)`, building it on first use."""
+        key = (build, None if selected_analysts is None else frozenset(selected_analysts), tuple(sorted(options.items())))
+        graph = self._graphs.get(key)
+        if graph is None:
+            with self._lock:
+                graph = self._graphs.get(key)
+                if graph is None:
+                    graph = self._graphs[key] = build(None if selected_analysts is None else list(selected_analysts), **options).compile()
+        return graph
+
+    def clear(self):
+        """Drop all compiled graphs, e.g. after the analyst configuration changes."""
+        with self._lock:
+            self._graphs.clear()
+
+
+# Global compiled graph cache
+_compiled_graphs = CompiledGraphCache()
+
+
+def get_compiled_graph(build: Callable[..., StateGraph], selected_analysts: list[str] | None = None, **options):
+    """Get the compiled graph for an analyst selection from the global cache."""
+    return _compiled_graphs.get(build, selected_analysts, **options)
+
+
+def clear_compiled_graphs():
+    """Drop all cached compiled graphs."""
+    _compiled_graphs.clear()
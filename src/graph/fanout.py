@@ -0,0 +1,85 @@
+"""Per-(analyst, ticker) fan-out of the analyst nodes.
+
+Each analyst node loops over the run's tickers, so fanning out per analyst alone leaves a run as long
+as the slowest analyst's whole ticker list. Instead, the start node sends one work unit per
+(analyst, ticker) with LangGraph's Send API: the analyst node runs on a state scoped to that ticker,
+and the signals it returns are merged into `analyst_signals` by the state reducer. With batched LLM
+requests (LLM_BATCH_SIZE above 1), a unit covers a batch of tickers instead, so that its calls can
+still be coalesced.
+
+Units do not report the analyst as done or show its reasoning; a join node does that once per
+analyst, after all of the units have finished.
+"""
+
+from functools import wraps
+from typing import Callable
+
+from langgraph.types import Send
+
+from src.graph.state import AgentState, show_agent_reasoning
+from src.utils.concurrency import get_llm_batch_size
+from src.utils.progress import progress
+
+# Node that runs when there is nothing to fan out
+FAN_IN_NODE = "risk_management_agent"
+
+# Node joining the units: it reports each analyst once, then hands over to the fan-in node
+ANALYSTS_DONE_NODE = "analysts_done"
+
+
+def ticker_groups(state: AgentState) -> list[list[str]]:
+    """Split the run's tickers into the groups analysed by one work unit."""
+    tickers = state["data"]["tickers"]
+    batch_size = get_llm_batch_size(state)
+    return [tickers[i : i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+
+def fan_out_analysts(node_names: list[str]) -> Callable[[AgentState], list[Send] | str]:
+    """Get the routing function sending each analyst node one work unit per ticker group."""
+
+    def fan_out(state: AgentState) -> list[Send] | str:
+        # The analysts' reasoning is shown once by the join node rather than by every unit
+        metadata = {**state["metadata"], "show_reasoning": False}
+        sends = [
+            # Units only read the run inputs; the portfolio and metadata are shared, not copied
+            Send(node_name, {"data": {**state["data"], "tickers": tickers}, "metadata": metadata})
+            for node_name in node_names
+            for tickers in ticker_groups(state)
+        ]
+        return sends or FAN_IN_NODE
+
+    return fan_out
+
+
+def run_as_unit(node_func: Callable[[AgentState], dict]) -> Callable[[AgentState], dict]:
+    """Wrap an analyst node to run as one work unit, leaving its agent-level "Done" status to the join node."""
+
+    @wraps(node_func)
+    def unit(state: AgentState) -> dict:
+        with progress.deferring_done():
+            return node_func(state)
+
+    return unit
+
+
+def analysts_done(node_names: list[str]) -> Callable[[AgentState], None]:
+    """Get the join node reporting each analyst as done, with its merged signals if reasoning is shown."""
+
+    def join(state: AgentState) -> None:
+        for node_name in node_names:
+            progress.update_status(node_name, None, "Done")
+            if state["metadata"].get("show_reasoning") and node_name in state["analyst_signals"]:
+                show_agent_reasoning(state["analyst_signals"][node_name], node_name.replace("_", " ").title())
+
+    return join
+
+
+def add_analyst_fan_out(workflow, analyst_nodes: list[tuple[str, Callable[[AgentState], dict]]]):
+    """Add the analyst nodes to a workflow, fanned out from the start node per ticker and joined at risk management."""
+    node_names = [node_name for node_name, _ in analyst_nodes]
+    for node_name, node_func in analyst_nodes:
+        workflow.add_node(node_name, run_as_unit(node_func))
+        workflow.add_edge(node_name, ANALYSTS_DONE_NODE)
+    workflow.add_node(ANALYSTS_DONE_NODE, analysts_done(node_names))
+    workflow.add_edge(ANALYSTS_DONE_NODE, FAN_IN_NODE)
+    workflow.add_conditional_edges("start_node", fan_out_analysts(node_names), [*node_names, FAN_IN_NODE])
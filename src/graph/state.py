@@ -11,11 +11,28 @@ def merge_dicts(a: dict[str, any], b: dict[str, any]) -> dict[str, any]:
     return {**a, **b}
 
 
+def merge_signals(a: dict[str, dict[str, any]], b: dict[str, dict[str, any]]) -> dict[str, dict[str, any]]:
+    """
+    Merge signal updates by agent, then by ticker.
+
+    Only the agent index and the updated agents' signals are copied, so an update from one agent
+    (or one of its per-ticker work units) does not copy every other agent's signals.
+    """
+    merged = dict(a)
+    for agent, signals in b.items():
+        merged[agent] = {**a[agent], **signals} if agent in a else signals
+    return merged
+
+
 # Define agent state
 class AgentState(TypedDict):
+    # The run's input message and the portfolio manager's decisions
     messages: Annotated[Sequence[BaseMessage], operator.add]
+    # Run inputs: tickers, portfolio and dates
     data: Annotated[dict[str, any], merge_dicts]
     metadata: Annotated[dict[str, any], merge_dicts]
+    # Agent name -> ticker -> signal; agents return only their own signals
+    analyst_signals: Annotated[dict[str, dict[str, any]], merge_signals]
 
 
 def show_agent_reasoning(output, agent_name):
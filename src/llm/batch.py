@@ -0,0 +1,268 @@
+"""Offline batch submission of LLM requests.
+
+For long backtests, interactive latency does not matter but cost and throughput do. In batch mode the
+backtester first runs the analysts over a window of dates while a `BatchCollector` is active: their
+LLM requests are written to a batch file instead of being sent, and answered with defaults for the
+moment. The file is submitted through the provider's batch interface (OpenAI and Anthropic batches
+are billed at about half the interactive price), and the results are ingested into the LLM response
+cache. The simulation over the window then runs as usual, with the analysts' calls answered from the
+cache.
+
+The `LocalBatchProcessor` stands in for a provider batch interface by answering the requests with
+the regular models; set LLM_BATCH_PROCESSOR=local to use it for every provider (e.g. with the Stub
+provider, for tests).
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage, convert_to_messages
+from langchain_core.prompt_values import PromptValue
+from pydantic import BaseModel
+
+from src.llm.cache import get_llm_cache
+from src.utils.json_repair import parse_model_response
+from src.utils.progress import progress
+
+# Agents whose requests are never collected: their prompts depend on the simulated portfolio
+UNBATCHABLE_AGENTS = ("portfolio_manager",)
+
+ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def _request_messages(prompt: any) -> list[dict[str, str]]:
+    """Render a prompt into provider-neutral {role, content} messages."""
+    if isinstance(prompt, PromptValue):
+        messages = prompt.to_messages()
+    elif isinstance(prompt, str):
+        messages = [HumanMessage(content=prompt)]
+    else:
+        messages = convert_to_messages(prompt)
+    return [{"role": ROLES.get(message.type, "user"), "content": message.content} for message in messages]
+
+
+def _parse_response(content: str, pydantic_model: type[BaseModel]) -> BaseModel | None:
+    """Parse a batch response into its model, or None."""
+    try:
+        return parse_model_response(content, pydantic_model)
+    except ValueError:
+        return None
+
+
+class BatchCollector:
+    """Collects LLM requests, keyed by their response cache key, for offline submission."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: dict[str, dict[str, any]] = {}
+        self.models: dict[str, type[BaseModel]] = {}
+
+    def add(self, key: str, model_provider: str, model_name: str, prompt: any, pydantic_model: type[BaseModel], agent_name: str | None) -> bool:
+        """Collect a request; returns False for agents whose requests cannot be answered ahead of time."""
+        if agent_name in UNBATCHABLE_AGENTS:
+            return False
+        with self._lock:
+            self.requests[key] = {
+                "custom_id": key,
+                "provider": str(getattr(model_provider, "value", model_provider)),
+                "model": model_name,
+                "messages": _request_messages(prompt),
+            }
+            self.models[key] = pydantic_model
+        return True
+
+    def write(self, directory: str) -> dict[str, Path]:
+        """Write the collected requests to one JSONL batch file per provider."""
+        files = {}
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        for request in self.requests.values():
+            path = files.setdefault(request["provider"], Path(directory) / f"batch-{request['provider'].lower()}-{time.time_ns()}.jsonl")
+            with open(path, "a") as f:
+                f.write(json.dumps(request) + "\n")
+        return files
+
+    def ingest(self, results: dict[str, str]) -> int:
+        """Store the valid batch responses in the LLM response cache; returns how many were stored."""
+        cache = get_llm_cache()
+        stored = 0
+        for key, content in results.items():
+            if key in self.models and (result := _parse_response(content, self.models[key])) is not None:
+                cache.set(key, result)
+                stored += 1
+        return stored
+
+
+# The collector of the batch being assembled, if any
+_active_collector: BatchCollector | None = None
+
+
+def get_batch_collector() -> BatchCollector | None:
+    """Get the batch collector LLM requests are currently deferred to, if any."""
+    return _active_collector
+
+
+@contextmanager
+def collecting(collector: BatchCollector):
+    """Defer LLM requests to the collector instead of sending them."""
+    global _active_collector
+    _active_collector = collector
+    try:
+        yield collector
+    finally:
+        _active_collector = None
+
+
+class BatchProcessor(ABC):
+    """A provider batch interface: submit a batch file, poll it, and fetch the responses by custom_id."""
+
+    @abstractmethod
+    def submit(self, path: Path) -> str:
+        """Submit a batch file; returns the batch id."""
+
+    @abstractmethod
+    def is_done(self, batch_id: str) -> bool:
+        """Check whether a batch has finished."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> dict[str, str]:
+        """Get the response content of a finished batch by custom_id."""
+
+
+class LocalBatchProcessor(BatchProcessor):
+    """Stand-in batch processor that answers the requests with the regular models, concurrently, the same way `call_llm` does."""
+
+    def __init__(self, models: dict[str, type[BaseModel]] | None = None):
+        self.models = models or {}
+        self._results: dict[str, dict[str, str]] = {}
+
+    def submit(self, path: Path) -> str:
+        from src.llm.models import get_model
+        from src.utils.concurrency import gather_limited, get_llm_concurrency, run_coroutine
+        from src.utils.llm import ainvoke_model
+
+        requests = [json.loads(line) for line in open(path)]
+
+        async def answer(request: dict[str, any]) -> str | None:
+            messages = convert_to_messages([(message["role"], message["content"]) for message in request["messages"]])
+            try:
+                if pydantic_model := self.models.get(request["custom_id"]):
+                    # Structured output or JSON parsing depending on the model, within the rate limits, like interactive calls
+                    call = {"input_tokens": 0, "output_tokens": 0, "parse_failures": 0}
+                    return (await ainvoke_model(request["model"], request["provider"], prompt=messages, pydantic_model=pydantic_model, call=call)).model_dump_json()
+                return (await get_model(request["model"], request["provider"]).ainvoke(messages)).content
+            except Exception as e:
+                print(f"Error answering batch request {request['custom_id']}: {e}")
+                return None
+
+        responses = run_coroutine(gather_limited([answer(request) for request in requests], get_llm_concurrency()))
+        self._results[str(path)] = {request["custom_id"]: response for request, response in zip(requests, responses) if response is not None}
+        return str(path)
+
+    def is_done(self, batch_id: str) -> bool:
+        return True
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        return self._results.pop(batch_id)
+
+
+class OpenAIBatchProcessor(BatchProcessor):
+    """OpenAI Batch API (chat completions in JSON mode)."""
+
+    def __init__(self):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_API_BASE") or None)
+
+    def submit(self, path: Path) -> str:
+        openai_path = path.with_suffix(".openai.jsonl")
+        with open(path) as f, open(openai_path, "w") as out:
+            for line in f:
+                request = json.loads(line)
+                body = {"model": request["model"], "messages": request["messages"], "response_format": {"type": "json_object"}}
+                out.write(json.dumps({"custom_id": request["custom_id"], "method": "POST", "url": "/v1/chat/completions", "body": body}) + "\n")
+
+        with open(openai_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        return self.client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h").id
+
+    def is_done(self, batch_id: str) -> bool:
+        status = self.client.batches.retrieve(batch_id).status
+        if status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"OpenAI batch {batch_id} {status}")
+        return status == "completed"
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+        results = {}
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            response = json.loads(line)
+            if response.get("response") and response["response"]["status_code"] == 200:
+                results[response["custom_id"]] = response["response"]["body"]["choices"][0]["message"]["content"]
+        return results
+
+
+class AnthropicBatchProcessor(BatchProcessor):
+    """Anthropic Message Batches API."""
+
+    MAX_TOKENS = 4096
+
+    def __init__(self):
+        from anthropic import Anthropic
+
+        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+    def submit(self, path: Path) -> str:
+        requests = []
+        for line in open(path):
+            request = json.loads(line)
+            system = "\n\n".join(message["content"] for message in request["messages"] if message["role"] == "system")
+            messages = [message for message in request["messages"] if message["role"] != "system"]
+            params = {"model": request["model"], "max_tokens": self.MAX_TOKENS, "messages": messages}
+            if system:
+                params["system"] = system
+            requests.append({"custom_id": request["custom_id"], "params": params})
+        return self.client.messages.batches.create(requests=requests).id
+
+    def is_done(self, batch_id: str) -> bool:
+        return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        results = {}
+        for response in self.client.messages.batches.results(batch_id):
+            if response.result.type == "succeeded":
+                results[response.custom_id] = "".join(block.text for block in response.result.message.content if block.type == "text")
+        return results
+
+
+BATCH_PROCESSORS = {"OpenAI": OpenAIBatchProcessor, "Anthropic": AnthropicBatchProcessor}
+
+
+def get_batch_processor(model_provider: str, models: dict[str, type[BaseModel]] | None = None) -> BatchProcessor:
+    """Get the batch interface of a provider; providers without one (or LLM_BATCH_PROCESSOR=local) use the local stand-in."""
+    if os.environ.get("LLM_BATCH_PROCESSOR", "").lower() == "local" or model_provider not in BATCH_PROCESSORS:
+        return LocalBatchProcessor(models)
+    return BATCH_PROCESSORS[model_provider]()
+
+
+def run_batch(collector: BatchCollector, directory: str | None = None, poll_seconds: float | None = None) -> int:
+    """Submit the collected requests per provider, wait for the batches and ingest the responses; returns how many were stored."""
+    directory = directory or os.environ.get("LLM_BATCH_DIR", ".cache/batches")
+    poll_seconds = poll_seconds if poll_seconds is not None else float(os.environ.get("LLM_BATCH_POLL_SECONDS", "60"))
+
+    stored = 0
+    for model_provider, path in collector.write(directory).items():
+        processor = get_batch_processor(model_provider, collector.models)
+        batch_id = processor.submit(path)
+        progress.update_status("llm_batch", None, f"Submitted {model_provider} batch {batch_id}")
+        while not processor.is_done(batch_id):
+            time.sleep(poll_seconds)
+        stored += collector.ingest(processor.results(batch_id))
+        progress.update_status("llm_batch", None, "Done")
+    return stored
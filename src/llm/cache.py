@@ -0,0 +1,168 @@
+"""Persistent content-addressed cache of structured LLM responses.
+
+Responses are stored one JSON file per request under LLM_CACHE_DIR (default `.cache/llm`), named by
+the SHA-256 of everything that determines the response: provider, model, rendered prompt messages,
+output schema and temperature. Identical requests - e.g. re-running a backtest over an overlapping
+date range - are answered from disk instead of the provider. The cache is off unless LLM_CACHE=1, since a live run
+should ask the model again rather than replay an earlier answer.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage, convert_to_messages
+from langchain_core.prompt_values import PromptValue
+from pydantic import BaseModel, ValidationError
+
+# Bump when the key or entry format changes, so stale entries are never read
+KEY_VERSION = 1
+ENTRY_SUFFIX = ".json"
+
+
+def _prompt_messages(prompt: any) -> list[dict[str, any]]:
+    """Render a prompt value, message list or string into a list of {type, content} dicts."""
+    if isinstance(prompt, PromptValue):
+        messages = prompt.to_messages()
+    elif isinstance(prompt, str):
+        messages = [HumanMessage(content=prompt)]
+    else:
+        messages = convert_to_messages(prompt)
+    return [{"type": message.type, "content": message.content} for message in messages]
+
+
+def make_cache_key(model_provider: str, model_name: str, prompt: any, pydantic_model: type[BaseModel], temperature: float | None = None) -> str:
+    """Get the content address of an LLM request."""
+    request = {
+        "version": KEY_VERSION,
+        "provider": str(getattr(model_provider, "value", model_provider)),
+        "model": model_name,
+        "messages": _prompt_messages(prompt),
+        "schema": pydantic_model.model_json_schema(),
+        "temperature": temperature,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """On-disk response cache with hit/miss counters and a total size limit (least recently used entries are evicted first)."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None  # Total size of the entries, computed on first write
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def get(self, key: str, pydantic_model: type[BaseModel]) -> BaseModel | None:
+        """Get the cached response for a key, or None."""
+        path = self._path(key)
+        try:
+            result = pydantic_model.model_validate_json(path.read_bytes())
+            # Refresh the modification time so eviction is least-recently-used
+            os.utime(path)
+        except (OSError, ValidationError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def set(self, key: str, result: BaseModel):
+        """Store a response, evicting old entries if the cache grows beyond its size limit."""
+        path = self._path(key)
+        data = result.model_dump_json().encode()
+        try:
+            old_size = path.stat().st_size  # An overwritten entry no longer counts towards the total
+        except OSError:
+            old_size = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            temporary_path.write_bytes(data)
+            os.replace(temporary_path, path)
+        except OSError as e:
+            print(f"Error writing LLM cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            self.writes += 1
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[Path]:
+        return list(self.directory.glob(f"*/*{ENTRY_SUFFIX}"))
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is below 90% of its size limit."""
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((entry.stat(), entry))
+            except OSError:
+                continue
+        entries.sort(key=lambda item: item[0].st_mtime)
+
+        self._size = sum(stat.st_size for stat, _ in entries)
+        target = self.max_bytes * 0.9
+        for stat, entry in entries:
+            if self._size <= target:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            self._size -= stat.st_size
+            self.evictions += 1
+
+    def stats(self) -> dict[str, any]:
+        """Get the cache counters as a dictionary."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for entry in self._entries():
+                entry.unlink(missing_ok=True)
+            self._size = 0
+
+
+_llm_cache: LLMResponseCache | None = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache | None:
+    """Get the global LLM response cache, or None unless enabled with LLM_CACHE=1."""
+    global _llm_cache
+    if os.environ.get("LLM_CACHE", "0").lower() not in ("1", "true", "yes", "on"):
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache(
+                    directory=os.environ.get("LLM_CACHE_DIR", ".cache/llm"),
+                    max_bytes=int(float(os.environ.get("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024),
+                )
+    return _llm_cache
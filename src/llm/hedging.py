@@ -0,0 +1,176 @@
+"""Hedged LLM requests and provider failover.
+
+When fallback models are configured for an agent, a call goes to the agent's primary model first.
+If it has not answered within a percentile of that model's observed latency (LLM_HEDGE_PERCENTILE,
+default 95), a duplicate request goes to the next model in the chain and the first valid response
+wins. A request that fails moves on to the next model immediately (a failover), and providers whose
+requests keep failing - transport or API errors and timeouts, not unusable answers - are skipped for
+a cool-down period. Latency samples are measured from when a request is actually sent, after any
+rate-limiter or request-slot queueing.
+
+Fallback chains are configured per agent, with "*" for all agents, in the run metadata
+("llm_fallbacks") or in LLM_FALLBACKS as "<provider>/<model>" entries, e.g.
+
+    LLM_FALLBACKS='{"*": ["Groq/llama-3.3-70b-versatile"], "portfolio_manager": ["Anthropic/claude-3-5-haiku-latest"]}'
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+# Latency samples kept per model, and needed before the percentile is trusted
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+# Hedge delay used until a model has enough latency samples, and the lower bound of any hedge delay
+DEFAULT_HEDGE_DELAY_SECONDS = 15.0
+MIN_HEDGE_DELAY_SECONDS = 1.0
+
+# Consecutive failures after which a provider is skipped, and for how long
+FAILURE_THRESHOLD = 3
+COOLDOWN_SECONDS = 30.0
+
+# Libraries whose exceptions are transport or API errors of a provider
+PROVIDER_ERROR_MODULES = ("httpx", "httpcore", "aiohttp", "requests", "openai", "anthropic", "groq", "google", "ollama")
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Check whether an error means the provider failed (transport or API error, timeout), rather than that its answer was unusable."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None):
+        return True
+    return any(cls.__module__.split(".")[0] in PROVIDER_ERROR_MODULES for cls in type(error).__mro__)
+
+
+class ModelHealth:
+    """Thread-safe latency samples per model and consecutive-failure counts per provider."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: dict[tuple[str, str], deque[float]] = {}
+        self._failures: dict[str, int] = {}
+        self._unhealthy_until: dict[str, float] = {}
+
+    def record_success(self, model_provider: str, model_name: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault((model_provider, model_name), deque(maxlen=LATENCY_WINDOW)).append(seconds)
+            self._failures[model_provider] = 0
+
+    def record_failure(self, model_provider: str):
+        with self._lock:
+            self._failures[model_provider] = self._failures.get(model_provider, 0) + 1
+            if self._failures[model_provider] >= FAILURE_THRESHOLD:
+                self._unhealthy_until[model_provider] = time.monotonic() + COOLDOWN_SECONDS
+
+    def is_healthy(self, model_provider: str) -> bool:
+        return self._unhealthy_until.get(model_provider, 0.0) <= time.monotonic()
+
+    def latency_percentile(self, model_provider: str, model_name: str, percentile: float, min_samples: int = MIN_LATENCY_SAMPLES) -> float | None:
+        """Get a percentile of the model's recent latencies, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._latencies.get((model_provider, model_name), ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+    def hedge_delay(self, model_provider: str, model_name: str) -> float:
+        """Seconds to wait for a model before hedging with the next one."""
+        percentile = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+        delay = self.latency_percentile(model_provider, model_name, percentile)
+        return max(MIN_HEDGE_DELAY_SECONDS, delay if delay is not None else float(os.environ.get("LLM_HEDGE_DELAY_SECONDS", DEFAULT_HEDGE_DELAY_SECONDS)))
+
+
+# Global health instance
+_model_health = ModelHealth()
+
+
+def get_model_health() -> ModelHealth:
+    """Get the global model health instance."""
+    return _model_health
+
+
+def get_fallback_models(agent_name: str | None, state: dict | None = None) -> list[tuple[str, str]]:
+    """Get the (model name, provider) fallback chain of an agent from the run metadata or LLM_FALLBACKS."""
+    chains = ((state or {}).get("metadata") or {}).get("llm_fallbacks")
+    if chains is None:
+        try:
+            chains = json.loads(os.environ.get("LLM_FALLBACKS") or "{}")
+        except json.JSONDecodeError as e:
+            print(f"Ignoring invalid LLM_FALLBACKS: {e}")
+            chains = {}
+
+    fallbacks = []
+    for entry in chains.get(agent_name, chains.get("*", [])):
+        model_provider, _, model_name = entry.partition("/")
+        if model_name:
+            fallbacks.append((model_name, model_provider))
+    return fallbacks
+
+
+async def hedged_invoke(
+    candidates: list[tuple[str, str]],
+    invoke: Callable[..., Awaitable[any]],
+) -> tuple[any, tuple[str, str], int, int]:
+    """
+    Invoke the candidate models in order, hedging slow requests and failing over on errors.
+
+    Args:
+        candidates: (model name, provider) pairs, primary first
+        invoke: Coroutine function making the request to one model, called as
+            `invoke(model_name, model_provider, on_sent=...)`; it calls `on_sent()` right before the
+            request goes out, and raises on failure
+
+    Returns:
+        The first valid result, the candidate that produced it, and the number of hedged and of failed-over requests started
+    """
+    health = get_model_health()
+    # Skip providers in cool-down, unless that would leave nothing to try
+    candidates = [candidate for candidate in candidates if health.is_healthy(candidate[1])] or candidates
+
+    remaining = list(candidates)
+    running: dict[asyncio.Task, tuple[str, str]] = {}
+    sent_at: dict[tuple[str, str], float] = {}
+    hedges = failovers = 0
+    last_error = None
+
+    def start_next():
+        candidate = remaining.pop(0)
+
+        def on_sent():
+            sent_at.setdefault(candidate, time.monotonic())
+
+        running[asyncio.ensure_future(invoke(*candidate, on_sent=on_sent))] = candidate
+
+    start_next()
+    try:
+        while running:
+            latest_candidate = list(running.values())[-1]
+            timeout = health.hedge_delay(latest_candidate[1], latest_candidate[0]) if remaining else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                model_name, model_provider = candidate = running.pop(task)
+                if task.exception() is None:
+                    if candidate in sent_at:
+                        health.record_success(model_provider, model_name, time.monotonic() - sent_at[candidate])
+                    return task.result(), candidate, hedges, failovers
+                last_error = task.exception()
+                if is_provider_failure(last_error):
+                    health.record_failure(model_provider)
+
+            # Hedge a slow request, or fail over from a failed one
+            if remaining and not done:
+                hedges += 1
+                start_next()
+            elif remaining and not running:
+                failovers += 1
+                start_next()
+        raise last_error
+    finally:
+        for task in running:
+            task.cancel()
@@ -0,0 +1,124 @@
+"""Per-call LLM metrics: which agent and ticker, which model, tokens, latency, retries and fallbacks."""
+
+import json
+import os
+import threading
+import uuid
+from typing import Callable
+
+# Fields of a call record, in output order
+RECORD_FIELDS = (
+    "timestamp",
+    "run_id",
+    "agent",
+    "ticker",
+    "provider",
+    "model",
+    "input_tokens",
+    "output_tokens",
+    "latency_seconds",
+    "attempts",
+    "retries",
+    "parse_failures",
+    "repairs",
+    "fallback",
+    "cache_hit",
+    "batched",
+    "hedges",
+    "failovers",
+    "served_by",
+    "deferred",
+)
+
+
+class LLMMetrics:
+    """Thread-safe collector of LLM call records, optionally appended to a JSONL file as they arrive."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: list[dict[str, any]] = []
+        self.handlers: list[Callable[[dict[str, any]], None]] = []
+
+    def register_handler(self, handler: Callable[[dict[str, any]], None]):
+        """Register a handler to be called with every new call record."""
+        self.handlers.append(handler)
+        return handler
+
+    def unregister_handler(self, handler: Callable[[dict[str, any]], None]):
+        """Unregister a previously registered handler."""
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+
+    def record(self, record: dict[str, any]):
+        """Add a call record."""
+        record = {field: record.get(field) for field in RECORD_FIELDS}
+        with self._lock:
+            self._records.append(record)
+            if path := os.environ.get("LLM_METRICS_FILE"):
+                try:
+                    with open(path, "a") as f:
+                        f.write(json.dumps(record) + "\n")
+                except OSError as e:
+                    print(f"Error writing LLM metrics to {path}: {e}")
+
+        for handler in list(self.handlers):
+            handler(record)
+
+    def records(self, run_id: str | None = None) -> list[dict[str, any]]:
+        """Get a copy of the call records, of one run if `run_id` is given."""
+        with self._lock:
+            return [record for record in self._records if run_id is None or record["run_id"] == run_id]
+
+    def summary(self, run_id: str | None = None) -> dict[str, dict[str, any]]:
+        """Aggregate the call records (of one run if `run_id` is given) per agent."""
+        summary = {}
+        for record in self.records(run_id):
+            # Requests deferred to an offline batch are counted again when the simulation reads their answers
+            if record["deferred"]:
+                continue
+            # A ticker answered by a multi-ticker request is already counted in that request's record
+            if record["batched"]:
+                continue
+            agent = summary.setdefault(
+                record["agent"] or "unknown",
+                {"calls": 0, "input_tokens": 0, "output_tokens": 0, "latency_total_seconds": 0.0, "latency_max_seconds": 0.0, "retries": 0, "parse_failures": 0, "fallbacks": 0, "cache_hits": 0, "hedges": 0, "failovers": 0},
+            )
+            agent["calls"] += 1
+            agent["input_tokens"] += record["input_tokens"] or 0
+            agent["output_tokens"] += record["output_tokens"] or 0
+            agent["latency_total_seconds"] += record["latency_seconds"]
+            agent["latency_max_seconds"] = max(agent["latency_max_seconds"], record["latency_seconds"])
+            agent["retries"] += record["retries"]
+            agent["parse_failures"] += record["parse_failures"]
+            agent["fallbacks"] += int(record["fallback"])
+            agent["cache_hits"] += int(record["cache_hit"])
+            agent["hedges"] += record["hedges"] or 0
+            agent["failovers"] += record["failovers"] or 0
+
+        for agent in summary.values():
+            agent["latency_mean_seconds"] = agent["latency_total_seconds"] / agent["calls"]
+        return dict(sorted(summary.items()))
+
+    def reset(self):
+        """Clear all call records."""
+        with self._lock:
+            self._records.clear()
+
+    def discard_run(self, run_id: str):
+        """Drop the call records of a finished run."""
+        with self._lock:
+            self._records = [record for record in self._records if record["run_id"] != run_id]
+
+
+def new_run_id() -> str:
+    """Get a new id to tag the LLM calls of one run with (passed to the agents in the run metadata)."""
+    return uuid.uuid4().hex
+
+
+# Global metrics instance
+_llm_metrics = LLMMetrics()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Get the global LLM metrics instance."""
+    return _llm_metrics
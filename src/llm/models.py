@@ -1,11 +1,8 @@
 import os
 import json
-from langchain_anthropic import ChatAnthropic
-from langchain_deepseek import ChatDeepSeek
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
+import threading
+from langchain_core.language_models.chat_models import BaseChatModel
+from src.llm.ollama_runtime import get_ollama_base_url
 from enum import Enum
 from pydantic import BaseModel
 from typing import Tuple, List
@@ -21,6 +18,7 @@ class ModelProvider(str, Enum):
     GROQ = "Groq"
     OPENAI = "OpenAI"
     OLLAMA = "Ollama"
+    STUB = "Stub"
 
 
 class LLMModel(BaseModel):
@@ -97,54 +95,145 @@ LLM_ORDER = [model.to_choice_tuple() for model in AVAILABLE_MODELS]
 # Create Ollama LLM_ORDER separately
 OLLAMA_LLM_ORDER = [model.to_choice_tuple() for model in OLLAMA_MODELS]
 
+# The deterministic offline stub (see src/llm/stub.py) is not a real model, so it is not in
+# api_models.json; the CLI only offers it with LLM_STUB=1
+STUB_MODEL = LLMModel(display_name="[stub] deterministic offline stub", model_name="stub", provider=ModelProvider.STUB)
+
+
+def get_llm_order() -> List[Tuple[str, str, str]]:
+    """Get the models offered by the CLI: LLM_ORDER, plus the offline stub if LLM_STUB=1."""
+    if os.environ.get("LLM_STUB", "").lower() in ("1", "true", "yes", "on"):
+        return LLM_ORDER + [STUB_MODEL.to_choice_tuple()]
+    return LLM_ORDER
+
 
 def get_model_info(model_name: str, model_provider: str) -> LLMModel | None:
     """Get model information by model_name"""
-    all_models = AVAILABLE_MODELS + OLLAMA_MODELS
+    all_models = AVAILABLE_MODELS + OLLAMA_MODELS + [STUB_MODEL]
     return next((model for model in all_models if model.model_name == model_name and model.provider == model_provider), None)
 
 
-def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | ChatGroq | ChatOllama | None:
+# Constructed clients, keyed by (provider, model, base URL, API key); each holds its own HTTP connection pool
+_models: dict[tuple, any] = {}
+# Structured-output wrappers around cached clients, keyed by the client key plus output schema and method
+_structured_models: dict[tuple, any] = {}
+_models_lock = threading.Lock()
+
+
+def _provider_value(model_provider: ModelProvider | str) -> str:
+    return model_provider.value if isinstance(model_provider, ModelProvider) else str(model_provider)
+
+
+def _client_settings(model_provider: str) -> tuple[str | None, str | None]:
+    """Get the (API key, base URL) a client for this provider would be created with."""
+    if model_provider == ModelProvider.GROQ:
+        return os.getenv("GROQ_API_KEY"), None
+    elif model_provider == ModelProvider.OPENAI:
+        return os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_API_BASE")
+    elif model_provider == ModelProvider.ANTHROPIC:
+        return os.getenv("ANTHROPIC_API_KEY"), None
+    elif model_provider == ModelProvider.DEEPSEEK:
+        return os.getenv("DEEPSEEK_API_KEY"), None
+    elif model_provider == ModelProvider.GEMINI:
+        return os.getenv("GOOGLE_API_KEY"), None
+    elif model_provider == ModelProvider.OLLAMA:
+        return None, get_ollama_base_url()
+    return None, None
+
+
+def _model_key(model_name: str, model_provider: ModelProvider | str) -> tuple:
+    model_provider = _provider_value(model_provider)
+    api_key, base_url = _client_settings(model_provider)
+    return (model_provider, model_name, base_url, api_key)
+
+
+def get_model(model_name: str, model_provider: ModelProvider | str) -> BaseChatModel | None:
+    """
+    Get the chat model client for a model, constructing it on first use.
+
+    Clients are cached for the lifetime of the process per (provider, model, base URL, API key),
+    so their HTTP connection pools stay warm across agents, tickers, runs and backend requests.
+    """
+    key = _model_key(model_name, model_provider)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = _create_model(model_name, key[0])
+                if model is not None:
+                    _models[key] = model
+    return model
+
+
+def get_structured_model(model_name: str, model_provider: ModelProvider | str, pydantic_model: type[BaseModel], method: str = "json_mode", include_raw: bool = False):
+    """Get a cached `with_structured_output` wrapper of the model client for an output schema."""
+    key = (*_model_key(model_name, model_provider), pydantic_model, method, include_raw)
+    structured_model = _structured_models.get(key)
+    if structured_model is None:
+        model = get_model(model_name, model_provider)
+        if model is None:
+            return None
+        with _models_lock:
+            structured_model = _structured_models.setdefault(key, model.with_structured_output(pydantic_model, method=method, include_raw=include_raw))
+    return structured_model
+
+
+def clear_model_cache():
+    """Drop all cached clients, e.g. after API keys or base URLs change."""
+    with _models_lock:
+        _models.clear()
+        _structured_models.clear()
+
+
+def _create_model(model_name: str, model_provider: str) -> BaseChatModel | None:
+    # Provider SDKs are imported on first use: each is slow to import and a run usually needs only one
+    api_key, base_url = _client_settings(model_provider)
     if model_provider == ModelProvider.GROQ:
-        api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             # Print error to console
             print(f"API Key Error: Please make sure GROQ_API_KEY is set in your .env file.")
             raise ValueError("Groq API key not found.  Please make sure GROQ_API_KEY is set in your .env file.")
+        from langchain_groq import ChatGroq
+
         return ChatGroq(model=model_name, api_key=api_key)
     elif model_provider == ModelProvider.OPENAI:
-        # Get and validate API key
-        api_key = os.getenv("OPENAI_API_KEY")
-        base_url = os.getenv("OPENAI_API_BASE")
+        # Validate API key
         if not api_key:
             # Print error to console
             print(f"API Key Error: Please make sure OPENAI_API_KEY is set in your .env file.")
             raise ValueError("OpenAI API key not found.  Please make sure OPENAI_API_KEY is set in your .env file.")
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(model=model_name, api_key=api_key, base_url=base_url)
     elif model_provider == ModelProvider.ANTHROPIC:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             print(f"API Key Error: Please make sure ANTHROPIC_API_KEY is set in your .env file.")
             raise ValueError("Anthropic API key not found.  Please make sure ANTHROPIC_API_KEY is set in your .env file.")
+        from langchain_anthropic import ChatAnthropic
+
         return ChatAnthropic(model=model_name, api_key=api_key)
     elif model_provider == ModelProvider.DEEPSEEK:
-        api_key = os.getenv("DEEPSEEK_API_KEY")
         if not api_key:
             print(f"API Key Error: Please make sure DEEPSEEK_API_KEY is set in your .env file.")
             raise ValueError("DeepSeek API key not found.  Please make sure DEEPSEEK_API_KEY is set in your .env file.")
+        from langchain_deepseek import ChatDeepSeek
+
         return ChatDeepSeek(model=model_name, api_key=api_key)
     elif model_provider == ModelProvider.GEMINI:
-        api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             print(f"API Key Error: Please make sure GOOGLE_API_KEY is set in your .env file.")
             raise ValueError("Google API key not found.  Please make sure GOOGLE_API_KEY is set in your .env file.")
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         return ChatGoogleGenerativeAI(model=model_name, api_key=api_key)
+    elif model_provider == ModelProvider.STUB:
+        # Deterministic local stand-in: no API key or network access needed
+        from src.llm.stub import create_stub_model
+
+        return create_stub_model(model_name)
     elif model_provider == ModelProvider.OLLAMA:
-        # For Ollama, we use a base URL instead of an API key
-        # Check if OLLAMA_HOST is set (for Docker on macOS)
-        ollama_host = os.getenv("OLLAMA_HOST", "localhost")
-        base_url = os.getenv("OLLAMA_BASE_URL", f"http://{ollama_host}:11434")
-        return ChatOllama(
-            model=model_name,
-            base_url=base_url,
-        )
+        # For Ollama, we use a base URL instead of an API key; the model is kept loaded between calls
+        from src.llm.ollama_chat import create_ollama_model
+
+        return create_ollama_model(model_name, base_url)
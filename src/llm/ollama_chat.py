@@ -0,0 +1,69 @@
+"""Ollama chat models that report to the runtime manager and balance requests over a server pool."""
+
+import httpx
+from langchain_ollama import ChatOllama
+from pydantic import PrivateAttr
+
+from src.llm.ollama_runtime import get_keep_alive, get_ollama_base_urls, get_ollama_pool, get_ollama_runtime
+
+
+class ManagedChatOllama(ChatOllama):
+    """ChatOllama that counts its requests in flight on the runtime of its server."""
+
+    def _generate(self, *args, **kwargs):
+        with get_ollama_runtime(self.base_url).track():
+            return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        with get_ollama_runtime(self.base_url).track():
+            return await super()._agenerate(*args, **kwargs)
+
+
+class PooledChatOllama(ChatOllama):
+    """ChatOllama that sends each request to the least busy healthy server of a pool, failing over on connection errors."""
+
+    base_urls: list[str]
+    _clients: dict[str, ManagedChatOllama] = PrivateAttr(default_factory=dict)
+
+    def _client(self, base_url: str) -> ManagedChatOllama:
+        if base_url not in self._clients:
+            self._clients[base_url] = ManagedChatOllama(model=self.model, base_url=base_url, keep_alive=self.keep_alive)
+        return self._clients[base_url]
+
+    def _servers(self):
+        """Yield servers to try, least busy first, taking unreachable ones out of rotation."""
+        pool, tried = get_ollama_pool(self.base_urls), set()
+        while runtime := pool.select(exclude=tried):
+            tried.add(runtime.base_url)
+            yield runtime
+
+    def _no_server_error(self, error: Exception | None) -> ConnectionError:
+        return ConnectionError(f"No healthy Ollama server for {self.model} among {', '.join(self.base_urls)}" + (f": {error}" if error else ""))
+
+    def _generate(self, *args, **kwargs):
+        error = None
+        for runtime in self._servers():
+            try:
+                return self._client(runtime.base_url)._generate(*args, **kwargs)
+            except (httpx.ConnectError, ConnectionError) as e:
+                runtime.set_healthy(False)
+                error = e
+        raise self._no_server_error(error) from error
+
+    async def _agenerate(self, *args, **kwargs):
+        error = None
+        for runtime in self._servers():
+            try:
+                return await self._client(runtime.base_url)._agenerate(*args, **kwargs)
+            except (httpx.ConnectError, ConnectionError) as e:
+                runtime.set_healthy(False)
+                error = e
+        raise self._no_server_error(error) from error
+
+
+def create_ollama_model(model_name: str, base_url: str) -> ManagedChatOllama:
+    """Create an Ollama chat model that keeps its model loaded between calls, balanced over the pool if several servers are configured."""
+    base_urls = get_ollama_base_urls()
+    if len(base_urls) > 1:
+        return PooledChatOllama(model=model_name, base_url=base_urls[0], base_urls=base_urls, keep_alive=get_keep_alive())
+    return ManagedChatOllama(model=model_name, base_url=base_url, keep_alive=get_keep_alive())
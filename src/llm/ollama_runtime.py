@@ -0,0 +1,199 @@
+"""Ollama runtime management: warm models, keep-alive and parallel request slots.
+
+Ollama loads a model on its first request, unloads it after a few idle minutes, and serves at most
+OLLAMA_NUM_PARALLEL requests per model at once (read when the server starts), queueing the rest.
+The runtime preloads the selected model at startup and keeps it resident with keep_alive
+(OLLAMA_KEEP_ALIVE, default 30m), starts local servers with as many parallel slots as the LLM
+concurrency limit, and counts the requests in flight to each server so the queue depth is visible.
+The chat models that use the runtime are in `src.llm.ollama_chat`, so the server management here
+does not load the Ollama SDK.
+
+Several servers (e.g. one per NUMA node or model copy) can be pooled with OLLAMA_BASE_URLS, a
+comma-separated list. Each request then goes to the healthy server with the fewest requests in
+flight; servers are health-checked in the background every OLLAMA_HEALTH_CHECK_SECONDS (default 30)
+and a server that refuses a connection is taken out of rotation until it passes a check again.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import requests
+
+from src.utils.concurrency import get_llm_concurrency
+
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_HEALTH_CHECK_SECONDS = 30.0
+
+
+def get_ollama_base_url() -> str:
+    """Get the base URL of the Ollama server from OLLAMA_BASE_URL, or OLLAMA_HOST (for Docker on macOS)."""
+    return os.getenv("OLLAMA_BASE_URL", f"http://{os.getenv('OLLAMA_HOST', 'localhost')}:11434")
+
+
+def get_ollama_base_urls() -> list[str]:
+    """Get the base URLs of the pooled Ollama servers from OLLAMA_BASE_URLS, or the single configured server."""
+    urls = [url.strip().rstrip("/") for url in os.getenv("OLLAMA_BASE_URLS", "").split(",") if url.strip()]
+    return urls or [get_ollama_base_url().rstrip("/")]
+
+
+def get_keep_alive() -> str:
+    """Get how long Ollama keeps a model loaded after a request."""
+    return os.getenv("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+
+
+def get_num_parallel() -> int:
+    """Get the number of requests an Ollama server serves per model at once: OLLAMA_NUM_PARALLEL, or the LLM concurrency limit."""
+    return max(1, int(os.getenv("OLLAMA_NUM_PARALLEL") or get_llm_concurrency()))
+
+
+class OllamaRuntime:
+    """Tracks the requests in flight to one Ollama server and keeps models loaded on it."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.num_parallel = get_num_parallel()
+        self._lock = threading.Lock()
+        self.outstanding = 0
+        self.requests = 0
+        self.max_queue_depth = 0
+        self.healthy = True
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for a parallel slot on the server."""
+        return max(0, self.outstanding - self.num_parallel)
+
+    @contextmanager
+    def track(self):
+        """Count a request as in flight while the block runs."""
+        with self._lock:
+            self.outstanding += 1
+            self.requests += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.outstanding -= 1
+
+    def preload(self, model_name: str, keep_alive: str | None = None) -> bool:
+        """Load a model into memory now and keep it resident, so the first call of a run does not pay the load time."""
+        try:
+            response = requests.post(f"{self.base_url}/api/generate", json={"model": model_name, "keep_alive": keep_alive or get_keep_alive()}, timeout=600)
+            return response.status_code == 200
+        except requests.RequestException as e:
+            print(f"Error preloading Ollama model {model_name} on {self.base_url}: {e}")
+            return False
+
+    def check_health(self) -> bool:
+        """Check whether the server answers, and update its health."""
+        try:
+            healthy = requests.get(f"{self.base_url}/api/tags", timeout=2).status_code == 200
+        except requests.RequestException:
+            healthy = False
+        self.set_healthy(healthy)
+        return healthy
+
+    def set_healthy(self, healthy: bool):
+        """Put the server in or out of rotation."""
+        with self._lock:
+            self.healthy = healthy
+
+    def load(self) -> tuple[bool, int, int]:
+        """Get whether the server is healthy, its requests in flight and its requests served, at one point in time."""
+        with self._lock:
+            return self.healthy, self.outstanding, self.requests
+
+    def loaded_models(self) -> list[str]:
+        """Get the models currently loaded in memory on the server."""
+        try:
+            response = requests.get(f"{self.base_url}/api/ps", timeout=5)
+            return [model["name"] for model in response.json().get("models", [])] if response.status_code == 200 else []
+        except (requests.RequestException, ValueError):
+            return []
+
+    def stats(self) -> dict[str, any]:
+        with self._lock:
+            return {
+                "base_url": self.base_url,
+                "healthy": self.healthy,
+                "num_parallel": self.num_parallel,
+                "outstanding": self.outstanding,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "requests": self.requests,
+            }
+
+
+# Runtimes by server base URL
+_runtimes: dict[str, OllamaRuntime] = {}
+_runtimes_lock = threading.Lock()
+
+
+def get_ollama_runtime(base_url: str | None = None) -> OllamaRuntime:
+    """Get the runtime of an Ollama server (by default the configured one)."""
+    base_url = (base_url or get_ollama_base_url()).rstrip("/")
+    with _runtimes_lock:
+        if base_url not in _runtimes:
+            _runtimes[base_url] = OllamaRuntime(base_url)
+        return _runtimes[base_url]
+
+
+def get_ollama_runtime_stats() -> list[dict[str, any]]:
+    """Get the request and queue statistics of every Ollama server used so far."""
+    with _runtimes_lock:
+        runtimes = list(_runtimes.values())
+    return [runtime.stats() for runtime in runtimes if runtime.requests]
+
+
+class OllamaPool:
+    """Least-outstanding-requests balancing over health-checked Ollama servers."""
+
+    def __init__(self, base_urls: list[str]):
+        self.runtimes = [get_ollama_runtime(base_url) for base_url in base_urls]
+        self.health_check_seconds = float(os.getenv("OLLAMA_HEALTH_CHECK_SECONDS", DEFAULT_HEALTH_CHECK_SECONDS))
+        self._stop = threading.Event()
+        self._health_thread = threading.Thread(target=self._check_health, name="ollama-health-check", daemon=True)
+        self._health_thread.start()
+
+    def _check_health(self):
+        while not self._stop.is_set():
+            for runtime in self.runtimes:
+                runtime.check_health()
+            self._stop.wait(self.health_check_seconds)
+
+    def close(self):
+        """Stop the background health checks."""
+        self._stop.set()
+        self._health_thread.join(timeout=5)
+
+    def select(self, exclude: set[str] = frozenset()) -> OllamaRuntime | None:
+        """Get the healthy server with the fewest requests in flight (fewest served on ties), or None if all are excluded."""
+        loads = {runtime: runtime.load() for runtime in self.runtimes if runtime.base_url not in exclude}
+        # If every server failed its health check, try them anyway rather than fail outright
+        candidates = [runtime for runtime, (healthy, _, _) in loads.items() if healthy] or list(loads)
+        return min(candidates, key=lambda runtime: loads[runtime][1:], default=None)
+
+
+# Pools by their server base URLs
+_pools: dict[tuple[str, ...], OllamaPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ollama_pool(base_urls: list[str]) -> OllamaPool:
+    """Get the pool of a set of Ollama servers."""
+    key = tuple(base_urls)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = OllamaPool(base_urls)
+        return _pools[key]
+
+
+def close_ollama_pools():
+    """Stop the health checks of every pool and forget the pools, e.g. after OLLAMA_BASE_URLS changes."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
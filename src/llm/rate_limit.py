@@ -0,0 +1,160 @@
+"""Provider-aware request and token budgets for LLM calls.
+
+Limits are configured with LLM_RATE_LIMITS, a JSON object mapping a provider ("OpenAI") or a
+provider/model pair ("OpenAI/gpt-4o") to requests and tokens per minute, e.g.
+
+    LLM_RATE_LIMITS='{"OpenAI": {"rpm": 500, "tpm": 200000}, "Anthropic/claude-3-5-haiku-latest": {"rpm": 50}}'
+
+Calls to a model are admitted in FIFO order once every budget that applies to them (the provider's
+and the model's) has room; calls to other models of the provider do not queue behind them.
+Rate-limit (429) responses shrink the budgets multiplicatively and pause the provider; every
+success grows them back additively, so throughput settles just below the real quota.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+# Tokens reserved for the response, on top of the estimated prompt tokens
+DEFAULT_OUTPUT_TOKENS = 500
+
+# Adaptive backoff: budgets are scaled down by this factor on each 429 and grow back by this step on each success
+DECREASE_FACTOR = 0.5
+INCREASE_STEP = 0.05
+MIN_SCALE = 0.05
+
+# Pause after a 429 without a retry-after header, doubled for each consecutive 429
+INITIAL_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class TokenBucket:
+    """A per-minute budget refilled continuously, scaled by the scheduler's adaptive factor."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.available = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, scale: float):
+        now = time.monotonic()
+        capacity = self.per_minute * scale
+        self.available = min(capacity, self.available + (now - self.updated) * capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, scale: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill(scale)
+        # A single request larger than the whole budget only has to wait for a full bucket
+        amount = min(amount, self.per_minute * scale)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) * 60 / (self.per_minute * scale)
+
+    def take(self, amount: float):
+        self.available -= amount
+
+
+class ProviderScheduler:
+    """Admits the calls to each model of one provider in FIFO order within the provider-wide and per-model budgets."""
+
+    def __init__(self, provider: str, limits: dict[str, dict[str, float]]):
+        self.provider = provider
+        self._limits = limits
+        self._buckets: dict[str, tuple[TokenBucket | None, TokenBucket | None]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}  # By model; asyncio locks wake waiters in FIFO order
+        self.scale = 1.0
+        self.paused_until = 0.0
+        self._backoff = INITIAL_BACKOFF_SECONDS
+        self.rate_limited = 0
+        self.waited_seconds = 0.0
+
+    def _get_buckets(self, scope: str) -> tuple[TokenBucket | None, TokenBucket | None]:
+        """Get the (requests, tokens) buckets of the provider ("") or of one of its models."""
+        if scope not in self._buckets:
+            limit = self._limits.get(f"{self.provider}/{scope}" if scope else self.provider, {})
+            self._buckets[scope] = (
+                TokenBucket(limit["rpm"]) if limit.get("rpm") else None,
+                TokenBucket(limit["tpm"]) if limit.get("tpm") else None,
+            )
+        return self._buckets[scope]
+
+    async def acquire(self, model_name: str, tokens: int):
+        """Wait until a call of `tokens` estimated tokens to `model_name` fits in every budget, then reserve it."""
+        buckets = [*self._get_buckets(""), *self._get_buckets(model_name)]
+        amounts = [1, tokens, 1, tokens]
+        # Checking and taking the budgets happens without an await in between, so sharing the
+        # provider-wide buckets between models needs no lock beyond the event loop itself
+        async with self._locks.setdefault(model_name, asyncio.Lock()):
+            start = time.monotonic()
+            while True:
+                wait = max(self.paused_until - time.monotonic(), 0.0)
+                for bucket, amount in zip(buckets, amounts):
+                    if bucket:
+                        wait = max(wait, bucket.wait_time(amount, self.scale))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            for bucket, amount in zip(buckets, amounts):
+                if bucket:
+                    bucket.take(amount)
+            self.waited_seconds += time.monotonic() - start
+
+    def on_success(self):
+        self.scale = min(1.0, self.scale + INCREASE_STEP)
+        self._backoff = INITIAL_BACKOFF_SECONDS
+
+    def on_rate_limited(self, retry_after: float | None = None):
+        self.rate_limited += 1
+        self.scale = max(MIN_SCALE, self.scale * DECREASE_FACTOR)
+        pause = retry_after if retry_after is not None else self._backoff
+        self._backoff = min(MAX_BACKOFF_SECONDS, self._backoff * 2)
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def stats(self) -> dict[str, any]:
+        return {"scale": round(self.scale, 3), "rate_limited": self.rate_limited, "waited_seconds": round(self.waited_seconds, 3)}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a provider client error is a rate-limit (HTTP 429) response."""
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status_code == 429 or "RateLimit" in type(error).__name__ or "ResourceExhausted" in type(error).__name__
+
+
+def get_retry_after(error: Exception) -> float | None:
+    """Get the retry-after delay in seconds from a rate-limit error's response, if it has one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def load_rate_limits() -> dict[str, dict[str, float]]:
+    """Load the configured limits from LLM_RATE_LIMITS."""
+    if not (config := os.environ.get("LLM_RATE_LIMITS")):
+        return {}
+    try:
+        return json.loads(config)
+    except json.JSONDecodeError as e:
+        print(f"Ignoring invalid LLM_RATE_LIMITS: {e}")
+        return {}
+
+
+# Schedulers by provider; all LLM calls run on the shared LLM event loop, so they share these
+_schedulers: dict[str, ProviderScheduler] = {}
+
+
+def get_scheduler(model_provider: str) -> ProviderScheduler:
+    """Get the scheduler of a provider."""
+    model_provider = str(getattr(model_provider, "value", model_provider))
+    if model_provider not in _schedulers:
+        _schedulers[model_provider] = ProviderScheduler(model_provider, load_rate_limits())
+    return _schedulers[model_provider]
+
+
+def get_rate_limit_stats() -> dict[str, dict[str, any]]:
+    """Get the adaptive scale, 429 count and total queueing time of every provider."""
+    return {provider: scheduler.stats() for provider, scheduler in sorted(_schedulers.items())}
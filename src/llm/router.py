@@ -0,0 +1,165 @@
+"""Latency- and cost-budgeted model routing.
+
+Each agent can be given a ranked list of models, best first, in the run metadata ("llm_routes") or
+in LLM_ROUTES, with "*" for all agents, e.g.
+
+    LLM_ROUTES='{"portfolio_manager": ["OpenAI/gpt-4o", "OpenAI/gpt-4o-mini"], "*": ["OpenAI/gpt-4o-mini", "Groq/llama-3.3-70b-versatile"]}'
+
+A call goes to the first model whose observed latency (LLM_ROUTE_PERCENTILE, default 95) fits both
+the per-call budget (LLM_LATENCY_BUDGET_SECONDS) and the time left until the run's deadline
+(LLM_RUN_TIME_BUDGET_SECONDS after the run starts). Models without enough latency samples are assumed
+to fit, and providers in failure cool-down are skipped. As the deadline approaches, calls are
+downgraded to faster models further down the list.
+
+With model prices configured in LLM_MODEL_COSTS (USD per million tokens, input and output alike),
+a run can also be given a cost budget (LLM_RUN_COST_BUDGET_USD): models whose estimated cost for
+the call exceeds what is left of the run's budget are skipped, so calls are downgraded to cheaper
+models as the budget is spent. Models without a price are treated as free.
+"""
+
+import json
+import os
+import threading
+import time
+
+from src.llm.hedging import get_model_health
+from src.llm.metrics import get_llm_metrics
+
+# Latency samples needed before a model's latency is used for routing
+MIN_ROUTING_SAMPLES = 5
+
+
+def get_run_deadline(time_budget_seconds: float | None = None) -> float | None:
+    """Get the wall-clock deadline of a run starting now, from the given time budget or LLM_RUN_TIME_BUDGET_SECONDS."""
+    if time_budget_seconds is None and os.environ.get("LLM_RUN_TIME_BUDGET_SECONDS"):
+        time_budget_seconds = float(os.environ["LLM_RUN_TIME_BUDGET_SECONDS"])
+    return time.time() + time_budget_seconds if time_budget_seconds else None
+
+
+def get_model_routes(agent_name: str | None, state: dict | None = None) -> list[tuple[str, str]]:
+    """Get the ranked (model name, provider) list of an agent from the run metadata or LLM_ROUTES."""
+    routes = ((state or {}).get("metadata") or {}).get("llm_routes")
+    if routes is None:
+        try:
+            routes = json.loads(os.environ.get("LLM_ROUTES") or "{}")
+        except json.JSONDecodeError as e:
+            print(f"Ignoring invalid LLM_ROUTES: {e}")
+            routes = {}
+
+    ranked = []
+    for entry in routes.get(agent_name, routes.get("*", [])):
+        model_provider, _, model_name = entry.partition("/")
+        if model_name:
+            ranked.append((model_name, model_provider))
+    return ranked
+
+
+def get_model_costs() -> dict[str, float]:
+    """Get the configured prices of models ("Provider/model" -> USD per million tokens) from LLM_MODEL_COSTS."""
+    try:
+        return {key: float(cost) for key, cost in json.loads(os.environ.get("LLM_MODEL_COSTS") or "{}").items()}
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+        print(f"Ignoring invalid LLM_MODEL_COSTS: {e}")
+        return {}
+
+
+def _model_cost(costs: dict[str, float], model_name: str, model_provider: str) -> float:
+    return costs.get(f"{getattr(model_provider, 'value', model_provider)}/{model_name}", 0.0)
+
+
+class RunSpend:
+    """Thread-safe USD spend of each run, added up from the token counts of its LLM call records."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spent: dict[str, float] = {}
+
+    def record(self, record: dict[str, any]):
+        if not record["run_id"] or not (tokens := (record["input_tokens"] or 0) + (record["output_tokens"] or 0)):
+            return
+        # A call that failed over is billed by the model that served it
+        provider, _, model = (record["served_by"] or "").partition("/")
+        cost = _model_cost(get_model_costs(), model or record["model"], provider if model else record["provider"])
+        with self._lock:
+            self._spent[record["run_id"]] = self._spent.get(record["run_id"], 0.0) + tokens * cost / 1e6
+
+    def spent(self, run_id: str | None) -> float:
+        with self._lock:
+            return self._spent.get(run_id, 0.0)
+
+    def discard_run(self, run_id: str):
+        with self._lock:
+            self._spent.pop(run_id, None)
+
+
+# Global run spend instance, fed by the LLM call records
+_run_spend = None
+_run_spend_lock = threading.Lock()
+
+
+def get_run_spend() -> RunSpend:
+    """Get the global run spend instance."""
+    global _run_spend
+    if _run_spend is None:
+        with _run_spend_lock:
+            if _run_spend is None:
+                spend = RunSpend()
+                get_llm_metrics().register_handler(spend.record)
+                _run_spend = spend
+    return _run_spend
+
+
+def get_cost_budget(state: dict | None = None) -> float | None:
+    """Get what is left of the run's cost budget in USD, or None without a budget."""
+    metadata = (state or {}).get("metadata") or {}
+    budget = metadata.get("llm_cost_budget")
+    if budget is None and os.environ.get("LLM_RUN_COST_BUDGET_USD"):
+        budget = float(os.environ["LLM_RUN_COST_BUDGET_USD"])
+    if budget is None:
+        return None
+    return budget - get_run_spend().spent(metadata.get("run_id"))
+
+
+def get_latency_budget(state: dict | None = None) -> float | None:
+    """Get the latency budget of the next call: the per-call budget, capped by the time left until the run's deadline."""
+    metadata = (state or {}).get("metadata") or {}
+    budget = metadata.get("llm_latency_budget")
+    if budget is None and os.environ.get("LLM_LATENCY_BUDGET_SECONDS"):
+        budget = float(os.environ["LLM_LATENCY_BUDGET_SECONDS"])
+
+    if deadline := metadata.get("deadline"):
+        remaining = max(deadline - time.time(), 0.0)
+        budget = remaining if budget is None else min(budget, remaining)
+    return budget
+
+
+def route_model(agent_name: str | None, state: dict | None, model_name: str, model_provider: str, estimated_tokens: int = 0) -> tuple[str, str]:
+    """Pick the model for an agent's next call of about `estimated_tokens` tokens; without configured routes, the agent's own model is used."""
+    ranked = get_model_routes(agent_name, state)
+    if not ranked:
+        return model_name, model_provider
+
+    health = get_model_health()
+    candidates = [candidate for candidate in ranked if health.is_healthy(candidate[1])] or ranked
+
+    cost_budget = get_cost_budget(state)
+    if cost_budget is not None:
+        costs = get_model_costs()
+        call_costs = {candidate: estimated_tokens * _model_cost(costs, *candidate) / 1e6 for candidate in candidates}
+        # Once no model fits what is left of the budget, the cheapest one is used
+        candidates = [candidate for candidate in candidates if call_costs[candidate] <= cost_budget] or [min(candidates, key=call_costs.get)]
+    budget = get_latency_budget(state)
+    if budget is None:
+        return candidates[0]
+    if budget <= 0:
+        # Past the deadline: the last-ranked model is the fallback of last resort
+        return candidates[-1]
+
+    percentile = float(os.environ.get("LLM_ROUTE_PERCENTILE", "95"))
+    latencies = {candidate: health.latency_percentile(candidate[1], candidate[0], percentile, MIN_ROUTING_SAMPLES) for candidate in candidates}
+    for candidate in candidates:
+        if latencies[candidate] is None or latencies[candidate] <= budget:
+            return candidate
+
+    # Nothing fits the budget: take the fastest model observed
+    return min(candidates, key=lambda candidate: latencies[candidate])
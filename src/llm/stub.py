@@ -0,0 +1,178 @@
+"""Deterministic local stand-in for an LLM, for offline benchmarking and scale tests.
+
+The stub answers structured-output requests with schema-valid instances of whatever Pydantic model
+is asked for. Values are derived from the prompt: signals follow the `score`/`max_score` numbers of
+the analysis data when present, and everything else comes from a hash of the prompt, so identical
+inputs always produce identical outputs. Multi-ticker requests (one `=== TICKER ===` section per
+ticker) are answered per section, with a signal for each ticker. Simulated latency is configured with STUB_LLM_LATENCY_MS
+and STUB_LLM_JITTER_MS (jitter is drawn from the same hash, so runs are reproducible).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import types
+import typing
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+# Signals chosen from the score ratio of the analysis data
+BULLISH_SCORE_RATIO = 0.6
+BEARISH_SCORE_RATIO = 0.4
+
+_SCORE = re.compile(r'"score":\s*(-?[\d.]+)')
+_MAX_SCORE = re.compile(r'"max_score":\s*(-?[\d.]+)')
+_TICKER_KEY = re.compile(r'"([A-Z][A-Z0-9.\-]{0,9})":')
+# Section headers and the ticker list of multi-ticker requests
+_TICKER_SECTION = re.compile(r"^=== ([A-Z][A-Z0-9.\-]{0,9}) ===$", re.MULTILINE)
+_TICKER_LIST = re.compile(r"tickers: ([A-Z][A-Z0-9.\-]{0,9}(?:, [A-Z][A-Z0-9.\-]{0,9})*)")
+
+
+class _SignalAnswer(BaseModel):
+    """Answer given for each ticker of a multi-ticker request, whose per-ticker format is free-form."""
+
+    signal: typing.Literal["bullish", "bearish", "neutral"]
+    confidence: float
+    reasoning: str
+
+
+def _prompt_text(messages: list[BaseMessage]) -> str:
+    return "\n".join(message.content if isinstance(message.content, str) else json.dumps(message.content) for message in messages)
+
+
+def _score_signal(text: str) -> str | None:
+    """Map the first score / max_score pair in the prompt to a signal, if there is one."""
+    score, max_score = _SCORE.search(text), _MAX_SCORE.search(text)
+    if not score or not max_score or float(max_score.group(1)) <= 0:
+        return None
+    ratio = float(score.group(1)) / float(max_score.group(1))
+    return "bullish" if ratio >= BULLISH_SCORE_RATIO else "bearish" if ratio <= BEARISH_SCORE_RATIO else "neutral"
+
+
+class _ValueGenerator:
+    """Generates schema-valid values, deterministically seeded by the prompt text."""
+
+    def __init__(self, messages: list[BaseMessage]):
+        text = _prompt_text(messages)
+        self.rng = random.Random(hashlib.sha256(text.encode()).digest())
+        self.signal = _score_signal(text)
+        # Keys for dict fields (e.g. portfolio decisions by ticker): the ticker-like JSON keys of the request,
+        # minus placeholders such as "TICKER1" in output format examples
+        request = _prompt_text([message for message in messages if message.type != "system"])
+        # A multi-ticker request names its tickers in section headers and a closing list instead
+        sections = _TICKER_SECTION.split(request)
+        self.sections = dict(zip(sections[1::2], sections[2::2]))
+        listed = [ticker for tickers in _TICKER_LIST.findall(request) for ticker in tickers.split(", ")]
+        if self.sections or listed:
+            self.tickers = list(dict.fromkeys([*self.sections, *listed]))
+        else:
+            self.tickers = [key for key in dict.fromkeys(_TICKER_KEY.findall(request)) if not key.startswith("TICKER")]
+
+    def model(self, model: type[BaseModel]) -> dict[str, any]:
+        return {name: self.value(field.annotation, name) for name, field in model.model_fields.items()}
+
+    def value(self, annotation: any, name: str = "") -> any:
+        origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self.model(annotation)
+        if origin is typing.Literal:
+            if self.signal in args:
+                return self.signal
+            return self.rng.choice(args)
+        if origin in (typing.Union, types.UnionType):
+            return self.value(next((arg for arg in args if arg is not type(None)), str), name)
+        if origin is dict:
+            return {ticker: self.ticker_value(ticker, args[1] if args else str, name) for ticker in self.tickers}
+        if origin in (list, tuple, set):
+            return []
+        if annotation is bool:
+            return self.rng.random() < 0.5
+        if annotation is int:
+            return self.rng.randint(0, 100)
+        if annotation is float:
+            return round(self.rng.uniform(0, 100), 1)
+        if name == "reasoning":
+            return f"Stub analysis ({self.signal or 'hash'}-based), seed {self.rng.getrandbits(32):08x}."
+        if annotation is str:
+            return f"stub-{self.rng.getrandbits(32):08x}"
+        return None
+
+
+    def ticker_value(self, ticker: str, annotation: any, name: str) -> any:
+        """Value for one ticker's entry of a dict field; in a multi-ticker request, derived from that ticker's section."""
+        section = self.sections.get(ticker)
+        if section is None:
+            return self.value(annotation, name)
+        generator = _ValueGenerator([HumanMessage(content=section)])
+        if typing.get_origin(annotation) is dict and typing.get_args(annotation)[1:] == (typing.Any,):
+            return generator.model(_SignalAnswer)
+        return generator.value(annotation, name)
+
+
+class StubChatModel(BaseChatModel):
+    """A chat model that answers instantly (or after a simulated latency) without any network access."""
+
+    model_name: str = "stub"
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _delay(self, text: str) -> float:
+        jitter = random.Random(text).uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _respond(self, messages: list[BaseMessage], schema: type[BaseModel] | None) -> tuple[AIMessage, BaseModel | None]:
+        text = _prompt_text(messages)
+        parsed = schema.model_validate(_ValueGenerator(messages).model(schema)) if schema else None
+        content = parsed.model_dump_json() if parsed else json.dumps({"stub": hashlib.sha256(text.encode()).hexdigest()[:16]})
+        usage = {"input_tokens": len(text) // 4, "output_tokens": len(content) // 4, "total_tokens": (len(text) + len(content)) // 4}
+        return AIMessage(content=f"```json\n{content}\n```", usage_metadata=usage), parsed
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay(_prompt_text(messages)))
+        message, _ = self._respond(messages, None)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay(_prompt_text(messages)))
+        message, _ = self._respond(messages, None)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema: type[BaseModel], *, include_raw: bool = False, **kwargs):
+        """Return a runnable producing instances of `schema` (or {raw, parsed, parsing_error} with include_raw)."""
+
+        def result(messages: list[BaseMessage]):
+            raw, parsed = self._respond(messages, schema)
+            return {"raw": raw, "parsed": parsed, "parsing_error": None} if include_raw else parsed
+
+        def invoke(prompt):
+            messages = self._convert_input(prompt).to_messages()
+            time.sleep(self._delay(_prompt_text(messages)))
+            return result(messages)
+
+        async def ainvoke(prompt):
+            messages = self._convert_input(prompt).to_messages()
+            await asyncio.sleep(self._delay(_prompt_text(messages)))
+            return result(messages)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def create_stub_model(model_name: str) -> StubChatModel:
+    """Create a stub model with the simulated latency configured in the environment."""
+    return StubChatModel(
+        model_name=model_name,
+        latency_ms=float(os.getenv("STUB_LLM_LATENCY_MS", "0")),
+        jitter_ms=float(os.getenv("STUB_LLM_JITTER_MS", "0")),
+    )
@@ -7,11 +7,22 @@ from colorama import Fore, Style, init
 import questionary
 from src.agents.portfolio_manager import portfolio_management_agent
 from src.agents.risk_manager import risk_management_agent
+from src.graph.cache import get_compiled_graph
+from src.graph.fanout import add_analyst_fan_out
 from src.graph.state import AgentState
-from src.utils.display import print_trading_output
+from src.data.cache import load_cache, persist_cache
+from src.data.stats import dump_data_stats
+from src.llm.cache import get_llm_cache
+from src.llm.metrics import get_llm_metrics, new_run_id
+from src.llm.rate_limit import get_rate_limit_stats
+from src.llm.ollama_runtime import get_ollama_runtime_stats
+from src.llm.router import get_run_deadline
+from src.utils.display import print_llm_cache_stats, print_llm_metrics_summary, print_ollama_runtime_stats, print_prompt_stats, print_rate_limit_stats, print_trading_output
 from src.utils.analysts import ANALYST_ORDER, get_analyst_nodes
+from src.utils.concurrency import get_graph_concurrency
 from src.utils.progress import progress
-from src.llm.models import LLM_ORDER, OLLAMA_LLM_ORDER, get_model_info, ModelProvider
+from src.utils.prompts import DEFAULT_REASONING_MODE, REASONING_MODES, get_prompt_stats
+from src.llm.models import OLLAMA_LLM_ORDER, get_llm_order, get_model_info, ModelProvider
 from src.utils.ollama import ensure_ollama_and_model
 
 import argparse
@@ -51,17 +62,22 @@ def run_hedge_fund(
     selected_analysts: list[str] = [],
     model_name: str = "gpt-4o",
     model_provider: str = "OpenAI",
+    reasoning_mode: str = DEFAULT_REASONING_MODE,
+    time_budget_seconds: float | None = None,
+    run_id: str | None = None,
 ):
+    # A run without an id is a standalone run: start its LLM metrics afresh. Callers running
+    # several runs that report together (the backtester) pass their own id instead.
+    if run_id is None:
+        get_llm_metrics().reset()
+        run_id = new_run_id()
+
     # Start progress tracking
     progress.start()
 
     try:
-        # Create a new workflow if analysts are customized
-        if selected_analysts:
-            workflow = create_workflow(selected_analysts)
-            agent = workflow.compile()
-        else:
-            agent = app
+        # Compiled workflows are cached per analyst selection (all analysts if none are selected)
+        agent = get_compiled_graph(create_workflow, selected_analysts or None)
 
         final_state = agent.invoke(
             {
@@ -75,19 +91,22 @@ def run_hedge_fund(
                     "portfolio": portfolio,
                     "start_date": start_date,
                     "end_date": end_date,
-                    "analyst_signals": {},
                 },
                 "metadata": {
                     "show_reasoning": show_reasoning,
                     "model_name": model_name,
                     "model_provider": model_provider,
+                    "reasoning_mode": reasoning_mode,
+                    "deadline": get_run_deadline(time_budget_seconds),
+                    "run_id": run_id,
                 },
             },
+            config={"max_concurrency": get_graph_concurrency()},
         )
 
         return {
             "decisions": parse_hedge_fund_response(final_state["messages"][-1].content),
-            "analyst_signals": final_state["data"]["analyst_signals"],
+            "analyst_signals": final_state["analyst_signals"],
         }
     finally:
         # Stop progress tracking
@@ -96,7 +115,8 @@ def run_hedge_fund(
 
 def start(state: AgentState):
     """Initialize the workflow with the input message."""
-    return state
+    # The input is already in the state; returning it would add the input message again
+    return None
 
 
 def create_workflow(selected_analysts=None):
@@ -104,27 +124,19 @@ def create_workflow(selected_analysts=None):
     workflow = StateGraph(AgentState)
     workflow.add_node("start_node", start)
 
-    # Get analyst nodes from the configuration
-    analyst_nodes = get_analyst_nodes()
+    # Get analyst nodes from the configuration; only the selected analysts' modules are imported
+    analyst_nodes = get_analyst_nodes(selected_analysts)
 
     # Default to all analysts if none selected
     if selected_analysts is None:
         selected_analysts = list(analyst_nodes.keys())
-    # Add selected analyst nodes
-    for analyst_key in selected_analysts:
-        node_name, node_func = analyst_nodes[analyst_key]
-        workflow.add_node(node_name, node_func)
-        workflow.add_edge("start_node", node_name)
+    # Add selected analyst nodes, fanned out per (analyst, ticker) and joined at risk management
+    add_analyst_fan_out(workflow, [analyst_nodes[analyst_key] for analyst_key in selected_analysts])
 
     # Always add risk and portfolio management
     workflow.add_node("risk_management_agent", risk_management_agent)
     workflow.add_node("portfolio_manager", portfolio_management_agent)
 
-    # Connect selected analysts to risk management
-    for analyst_key in selected_analysts:
-        node_name = analyst_nodes[analyst_key][0]
-        workflow.add_edge(node_name, "risk_management_agent")
-
     workflow.add_edge("risk_management_agent", "portfolio_manager")
     workflow.add_edge("portfolio_manager", END)
 
@@ -144,6 +156,8 @@ if __name__ == "__main__":
     )
     parser.add_argument("--end-date", type=str, help="End date (YYYY-MM-DD). Defaults to today")
     parser.add_argument("--show-reasoning", action="store_true", help="Show reasoning from each agent")
+    parser.add_argument("--reasoning-mode", choices=REASONING_MODES, default=DEFAULT_REASONING_MODE, help="How much reasoning agents write: full, brief or none. Defaults to full")
+    parser.add_argument("--time-budget", type=float, help="Seconds the run should take; LLM calls are routed to faster models as the deadline approaches (with LLM_ROUTES set)")
     parser.add_argument("--show-agent-graph", action="store_true", help="Show the agent graph")
     parser.add_argument("--ollama", action="store_true", help="Use Ollama for local LLM inference")
 
@@ -218,7 +232,7 @@ if __name__ == "__main__":
         # Use the standard cloud-based LLM selection
         model_choice = questionary.select(
             "Select your LLM model:",
-            choices=[questionary.Choice(display, value=(name, provider)) for display, name, provider in LLM_ORDER],
+            choices=[questionary.Choice(display, value=(name, provider)) for display, name, provider in get_llm_order()],
             style=questionary.Style(
                 [
                     ("selected", "fg:green bold"),
@@ -249,9 +263,8 @@ if __name__ == "__main__":
             model_provider = "Unknown"
             print(f"\nSelected model: {Fore.GREEN + Style.BRIGHT}{model_name}{Style.RESET_ALL}\n")
 
-    # Create the workflow with selected analysts
-    workflow = create_workflow(selected_analysts)
-    app = workflow.compile()
+    # Create the workflow with selected analysts (compiled once; the run below reuses it)
+    app = get_compiled_graph(create_workflow, selected_analysts)
 
     if args.show_agent_graph:
         file_path = ""
@@ -307,6 +320,9 @@ if __name__ == "__main__":
         },
     }
 
+    # Start from the data persisted by earlier runs if FINANCIAL_DATA_CACHE_DIR is set
+    load_cache()
+
     # Run the hedge fund
     result = run_hedge_fund(
         tickers=tickers,
@@ -317,5 +333,19 @@ if __name__ == "__main__":
         selected_analysts=selected_analysts,
         model_name=model_name,
         model_provider=model_provider,
+        reasoning_mode=args.reasoning_mode,
+        time_budget_seconds=args.time_budget,
     )
     print_trading_output(result)
+    print_llm_metrics_summary(get_llm_metrics().summary())
+    print_llm_cache_stats(llm_cache.stats() if (llm_cache := get_llm_cache()) else None)
+    print_prompt_stats(get_prompt_stats().snapshot())
+    print_rate_limit_stats(get_rate_limit_stats())
+    print_ollama_runtime_stats(get_ollama_runtime_stats())
+
+    # Save fetched data so the next run starts warm if FINANCIAL_DATA_CACHE_DIR is set
+    persist_cache()
+
+    # Write data-layer counters if DATA_STATS_FILE is set
+    if stats_path := dump_data_stats():
+        print(f"Data-layer stats written to {stats_path}")
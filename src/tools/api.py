@@ -1,12 +1,18 @@
 import datetime
 import os
+import threading
+from collections import OrderedDict
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 import requests
 
 from src.data.cache import get_cache
+from src.data.stats import get_data_stats
+from src.tools.json_stream import iter_json_array
 from src.data.models import (
     CompanyNews,
-    CompanyNewsResponse,
     FinancialMetrics,
     FinancialMetricsResponse,
     Price,
@@ -14,22 +20,66 @@ from src.data.models import (
     LineItem,
     LineItemResponse,
     InsiderTrade,
-    InsiderTradeResponse,
+    CompanyFacts,
     CompanyFactsResponse,
 )
 
 # Global cache instance
 _cache = get_cache()
 
+# Global data-layer stats instance
+_stats = get_data_stats()
 
-def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
-    """Fetch price data from cache or API."""
+# How long company facts (live market cap) are reused before refetching
+COMPANY_FACTS_TTL_SECONDS = float(os.environ.get("COMPANY_FACTS_TTL_SECONDS", 24 * 60 * 60))
+
+# TTM reports fetched per ticker for historical share counts (about ten years of quarters)
+SHARE_COUNT_REPORTS = 40
+
+
+def _make_request(endpoint: str, url: str, headers: dict, method: str = "GET", json_data: dict | None = None) -> requests.Response:
+    """Make an API request, recording its latency and response size under the given endpoint."""
+    with _stats.time_request(endpoint) as request_stats:
+        if method == "POST":
+            response = requests.post(url, headers=headers, json=json_data)
+        else:
+            response = requests.get(url, headers=headers)
+        request_stats["bytes"] = len(response.content)
+        request_stats["ok"] = response.status_code == 200
+    return response
+
+
+# Size of the response chunks fed to the streaming JSON parser
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Number of streamed records validated before they are written to the cache
+CACHE_CHUNK_RECORDS = 100
+
+
+def _stream_records(endpoint: str, url: str, headers: dict, key: str, ticker: str) -> Iterator[dict[str, any]]:
+    """Stream the records stored under `key` in an API response without loading the whole body into memory."""
+    with _stats.time_request(endpoint) as request_stats:
+        with requests.get(url, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                request_stats["ok"] = False
+                raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+
+            def chunks():
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    request_stats["bytes"] += len(chunk)
+                    yield chunk
+
+            yield from iter_json_array(chunks(), key)
+
+
+def _get_price_records(ticker: str, start_date: str, end_date: str) -> list[dict[str, any]]:
+    """Fetch raw price records from cache or API."""
     # Create a cache key that includes all parameters to ensure exact matches
     cache_key = f"{ticker}_{start_date}_{end_date}"
     
     # Check cache first - simple exact match
-    if cached_data := _cache.get_prices(cache_key):
-        return [Price(**price) for price in cached_data]
+    if (cached_data := _cache.get_prices(cache_key)) is not None:
+        return cached_data
 
     # If not in cache, fetch from API
     headers = {}
@@ -37,20 +87,26 @@ def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
         headers["X-API-KEY"] = api_key
 
     url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    response = requests.get(url, headers=headers)
+    response = _make_request("prices", url, headers)
     if response.status_code != 200:
         raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
 
     # Parse response with Pydantic model
     price_response = PriceResponse(**response.json())
     prices = price_response.prices
+    _stats.record_records("prices", len(prices))
 
-    if not prices:
-        return []
+    # Cache the results using the comprehensive cache key (empty results are cached too,
+    # so repeated lookups don't hit the API again)
+    records = [p.model_dump() for p in prices]
+    _cache.set_prices(cache_key, records)
+    _cache.set_close_prices(ticker, records)
+    return records
 
-    # Cache the results using the comprehensive cache key
-    _cache.set_prices(cache_key, [p.model_dump() for p in prices])
-    return prices
+
+def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    """Fetch price data from cache or API."""
+    return [Price(**price) for price in _get_price_records(ticker, start_date, end_date)]
 
 
 def get_financial_metrics(
@@ -64,7 +120,7 @@ def get_financial_metrics(
     cache_key = f"{ticker}_{period}_{end_date}_{limit}"
     
     # Check cache first - simple exact match
-    if cached_data := _cache.get_financial_metrics(cache_key):
+    if (cached_data := _cache.get_financial_metrics(cache_key)) is not None:
         return [FinancialMetrics(**metric) for metric in cached_data]
 
     # If not in cache, fetch from API
@@ -73,15 +129,18 @@ def get_financial_metrics(
         headers["X-API-KEY"] = api_key
 
     url = f"https://api.financialdatasets.ai/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
-    response = requests.get(url, headers=headers)
+    response = _make_request("financial_metrics", url, headers)
     if response.status_code != 200:
         raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
 
     # Parse response with Pydantic model
     metrics_response = FinancialMetricsResponse(**response.json())
     financial_metrics = metrics_response.financial_metrics
+    _stats.record_records("financial_metrics", len(financial_metrics))
 
     if not financial_metrics:
+        # Cache the empty result so repeated lookups don't hit the API again
+        _cache.set_financial_metrics(cache_key, [])
         return []
 
     # Cache the results as dicts using the comprehensive cache key
@@ -111,12 +170,13 @@ def search_line_items(
         "period": period,
         "limit": limit,
     }
-    response = requests.post(url, headers=headers, json=body)
+    response = _make_request("line_items", url, headers, method="POST", json_data=body)
     if response.status_code != 200:
         raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
     data = response.json()
     response_model = LineItemResponse(**data)
     search_results = response_model.search_results
+    _stats.record_records("line_items", len(search_results))
     if not search_results:
         return []
 
@@ -135,7 +195,7 @@ def get_insider_trades(
     cache_key = f"{ticker}_{start_date or 'none'}_{end_date}_{limit}"
     
     # Check cache first - simple exact match
-    if cached_data := _cache.get_insider_trades(cache_key):
+    if (cached_data := _cache.get_insider_trades(cache_key)) is not None:
         return [InsiderTrade(**trade) for trade in cached_data]
 
     # If not in cache, fetch from API
@@ -144,43 +204,52 @@ def get_insider_trades(
         headers["X-API-KEY"] = api_key
 
     all_trades = []
+    chunk = []
     current_end_date = end_date
 
-    while True:
-        url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_lte={current_end_date}"
-        if start_date:
-            url += f"&filing_date_gte={start_date}"
-        url += f"&limit={limit}"
-
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-
-        data = response.json()
-        response_model = InsiderTradeResponse(**data)
-        insider_trades = response_model.insider_trades
-
-        if not insider_trades:
-            break
-
-        all_trades.extend(insider_trades)
-
-        # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(insider_trades) < limit:
-            break
-
-        # Update end_date to the oldest filing date from current batch for next iteration
-        current_end_date = min(trade.filing_date for trade in insider_trades).split("T")[0]
-
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
-            break
-
-    if not all_trades:
-        return []
-
-    # Cache the results using the comprehensive cache key
-    _cache.set_insider_trades(cache_key, [trade.model_dump() for trade in all_trades])
+    try:
+        while True:
+            url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_lte={current_end_date}"
+            if start_date:
+                url += f"&filing_date_gte={start_date}"
+            url += f"&limit={limit}"
+
+            # Parse and validate trades one at a time as the response streams in, writing them to the cache in chunks
+            page_size = 0
+            oldest_filing_date = None
+            for record in _stream_records("insider_trades", url, headers, "insider_trades", ticker):
+                trade = InsiderTrade(**record)
+                all_trades.append(trade)
+                chunk.append(trade.model_dump())
+                if len(chunk) >= CACHE_CHUNK_RECORDS:
+                    _cache.append_pending("insider_trades", cache_key, chunk)
+                    chunk = []
+                page_size += 1
+                if oldest_filing_date is None or trade.filing_date < oldest_filing_date:
+                    oldest_filing_date = trade.filing_date
+            _stats.record_records("insider_trades", page_size)
+
+            if not page_size:
+                break
+
+            # Only continue pagination if we have a start_date and got a full page
+            if not start_date or page_size < limit:
+                break
+
+            # Update end_date to the oldest filing date from current batch for next iteration
+            current_end_date = oldest_filing_date.split("T")[0]
+
+            # If we've reached or passed the start_date, we can stop
+            if current_end_date <= start_date:
+                break
+    except BaseException:
+        _cache.discard_pending("insider_trades", cache_key)
+        raise
+
+    # Publish the cached chunks under the comprehensive cache key; an empty result is cached too,
+    # so repeated lookups don't hit the API again
+    _cache.append_pending("insider_trades", cache_key, chunk)
+    _cache.commit_pending("insider_trades", cache_key)
     return all_trades
 
 
@@ -195,7 +264,7 @@ def get_company_news(
     cache_key = f"{ticker}_{start_date or 'none'}_{end_date}_{limit}"
     
     # Check cache first - simple exact match
-    if cached_data := _cache.get_company_news(cache_key):
+    if (cached_data := _cache.get_company_news(cache_key)) is not None:
         return [CompanyNews(**news) for news in cached_data]
 
     # If not in cache, fetch from API
@@ -204,67 +273,136 @@ def get_company_news(
         headers["X-API-KEY"] = api_key
 
     all_news = []
+    chunk = []
     current_end_date = end_date
 
-    while True:
-        url = f"https://api.financialdatasets.ai/news/?ticker={ticker}&end_date={current_end_date}"
-        if start_date:
-            url += f"&start_date={start_date}"
-        url += f"&limit={limit}"
+    try:
+        while True:
+            url = f"https://api.financialdatasets.ai/news/?ticker={ticker}&end_date={current_end_date}"
+            if start_date:
+                url += f"&start_date={start_date}"
+            url += f"&limit={limit}"
+
+            # Parse and validate news one at a time as the response streams in, writing them to the cache in chunks
+            page_size = 0
+            oldest_date = None
+            for record in _stream_records("company_news", url, headers, "news", ticker):
+                news = CompanyNews(**record)
+                all_news.append(news)
+                chunk.append(news.model_dump())
+                if len(chunk) >= CACHE_CHUNK_RECORDS:
+                    _cache.append_pending("company_news", cache_key, chunk)
+                    chunk = []
+                page_size += 1
+                if oldest_date is None or news.date < oldest_date:
+                    oldest_date = news.date
+            _stats.record_records("company_news", page_size)
+
+            if not page_size:
+                break
+
+            # Only continue pagination if we have a start_date and got a full page
+            if not start_date or page_size < limit:
+                break
+
+            # Update end_date to the oldest date from current batch for next iteration
+            current_end_date = oldest_date.split("T")[0]
+
+            # If we've reached or passed the start_date, we can stop
+            if current_end_date <= start_date:
+                break
+    except BaseException:
+        _cache.discard_pending("company_news", cache_key)
+        raise
+
+    # Publish the cached chunks under the comprehensive cache key; an empty result is cached too,
+    # so repeated lookups don't hit the API again
+    _cache.append_pending("company_news", cache_key, chunk)
+    _cache.commit_pending("company_news", cache_key)
+    return all_news
+
+
+def get_company_facts(ticker: str) -> CompanyFacts | None:
+    """Fetch company facts from cache or API, reusing them for COMPANY_FACTS_TTL_SECONDS."""
+    if (cached_data := _cache.get_company_facts(ticker, ttl=COMPANY_FACTS_TTL_SECONDS)) is not None:
+        return CompanyFacts(**cached_data) if cached_data else None
 
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+    headers = {}
+    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+        headers["X-API-KEY"] = api_key
 
-        data = response.json()
-        response_model = CompanyNewsResponse(**data)
-        company_news = response_model.news
+    url = f"https://api.financialdatasets.ai/company/facts/?ticker={ticker}"
+    response = _make_request("company_facts", url, headers)
+    if response.status_code != 200:
+        print(f"Error fetching company facts: {ticker} - {response.status_code}")
+        # Cache the failure so every agent doesn't retry it for the same ticker
+        _cache.set_company_facts(ticker, {})
+        return None
 
-        if not company_news:
-            break
+    data = response.json()
+    response_model = CompanyFactsResponse(**data)
+    _stats.record_records("company_facts", 1)
+    _cache.set_company_facts(ticker, response_model.company_facts.model_dump())
+    return response_model.company_facts
 
-        all_news.extend(company_news)
 
-        # Only continue pagination if we have a start_date and got a full page
-        if not start_date or len(company_news) < limit:
-            break
+def get_close_price(ticker: str, date: str) -> float | None:
+    """Get the latest close on or before `date`, from any cached price range or a short API lookup."""
+    if (close := _cache.get_close_price(ticker, date)) is not None:
+        return close
 
-        # Update end_date to the oldest date from current batch for next iteration
-        current_end_date = min(news.date for news in company_news).split("T")[0]
+    # Nothing cached around this date - fetch the week leading up to it
+    start_date = (datetime.date.fromisoformat(date) - datetime.timedelta(days=7)).isoformat()
+    records = _get_price_records(ticker, start_date, date)
+    if not records:
+        return None
+    return max(records, key=lambda price: price["time"])["close"]
 
-        # If we've reached or passed the start_date, we can stop
-        if current_end_date <= start_date:
-            break
 
-    if not all_news:
-        return []
+def get_outstanding_shares(ticker: str, end_date: str) -> float | None:
+    """Get the shares outstanding in the latest report on or before end_date.
 
-    # Cache the results using the comprehensive cache key
-    _cache.set_company_news(cache_key, [news.model_dump() for news in all_news])
-    return all_news
+    Reported share counts are fetched once per ticker and reused for any earlier end_date, so a
+    backtest neither looks ahead to later share counts nor requests them for every simulated day.
+    """
+    reports = _cache.get_outstanding_shares(ticker, end_date)
+    if reports is None:
+        try:
+            line_items = search_line_items(ticker, ["outstanding_shares"], end_date, period="ttm", limit=SHARE_COUNT_REPORTS)
+        except Exception as e:
+            print(f"Error fetching shares outstanding: {ticker} - {e}")
+            return None
+        reports = [(item.report_period, item.outstanding_shares) for item in line_items if getattr(item, "outstanding_shares", None)]
+        _cache.set_outstanding_shares(ticker, end_date, reports)
+
+    reported = [(report_period, shares) for report_period, shares in reports if report_period <= end_date]
+    return max(reported)[1] if reported else None
 
 
 def get_market_cap(
     ticker: str,
     end_date: str,
 ) -> float | None:
-    """Fetch market cap from the API."""
-    # Check if end_date is today
-    if end_date == datetime.datetime.now().strftime("%Y-%m-%d"):
-        # Get the market cap from company facts API
-        headers = {}
-        if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-            headers["X-API-KEY"] = api_key
-
-        url = f"https://api.financialdatasets.ai/company/facts/?ticker={ticker}"
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            print(f"Error fetching company facts: {ticker} - {response.status_code}")
-            return None
+    """Get the market cap on end_date, derived from the close price and the shares outstanding reported by then.
 
-        data = response.json()
-        response_model = CompanyFactsResponse(**data)
-        return response_model.company_facts.market_cap
+    Close prices are shared with the rest of the data layer and share counts are cached per
+    ticker, so repeated calls from different agents don't hit the API. Falls back to the market
+    cap in the latest financial metrics when no share count was reported by end_date.
+    """
+    # For today, the live market cap in the company facts is the most accurate figure
+    if end_date == datetime.datetime.now().strftime("%Y-%m-%d"):
+        facts = get_company_facts(ticker)
+        if facts and facts.market_cap:
+            return facts.market_cap
+
+    if shares := get_outstanding_shares(ticker, end_date):
+        try:
+            close = get_close_price(ticker, end_date)
+        except Exception as e:
+            print(f"Error fetching close price for market cap: {ticker} - {e}")
+            close = None
+        if close:
+            return close * shares
 
     financial_metrics = get_financial_metrics(ticker, end_date)
     if not financial_metrics:
@@ -278,19 +416,52 @@ def get_market_cap(
     return market_cap
 
 
+PRICE_COLUMNS = ("open", "close", "high", "low", "volume")
+
+# Memoized price DataFrames keyed by (ticker, start_date, end_date), least recently used first
+_price_frames: OrderedDict[tuple[str, str, str], pd.DataFrame] = OrderedDict()
+_price_frames_lock = threading.Lock()
+PRICE_FRAME_CACHE_SIZE = 4096
+
+
+def _columns_to_df(columns: dict[str, np.ndarray], times: list[str]) -> pd.DataFrame:
+    """Build a price DataFrame from columnar arrays with a pre-parsed datetime64 index."""
+    index = pd.DatetimeIndex(pd.to_datetime(times), name="Date")
+    df = pd.DataFrame({**columns, "time": np.array(times, dtype=object)}, index=index, copy=False)
+    if not index.is_monotonic_increasing:
+        df.sort_index(inplace=True)
+    return df
+
+
+def _price_records_to_df(records: list[dict[str, any]]) -> pd.DataFrame:
+    """Convert cached price records to a DataFrame without building per-row objects."""
+    count = len(records)
+    columns = {col: np.fromiter((record[col] for record in records), dtype=np.int64 if col == "volume" else np.float64, count=count) for col in PRICE_COLUMNS}
+    return _columns_to_df(columns, [record["time"] for record in records])
+
+
 def prices_to_df(prices: list[Price]) -> pd.DataFrame:
     """Convert prices to a DataFrame."""
-    df = pd.DataFrame([p.model_dump() for p in prices])
-    df["Date"] = pd.to_datetime(df["time"])
-    df.set_index("Date", inplace=True)
-    numeric_cols = ["open", "close", "high", "low", "volume"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    df.sort_index(inplace=True)
-    return df
+    count = len(prices)
+    columns = {col: np.fromiter((getattr(price, col) for price in prices), dtype=np.int64 if col == "volume" else np.float64, count=count) for col in PRICE_COLUMNS}
+    return _columns_to_df(columns, [price.time for price in prices])
 
 
-# Update the get_price_data function to use the new functions
 def get_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    prices = get_prices(ticker, start_date, end_date)
-    return prices_to_df(prices)
+    """Get prices as a DataFrame, memoized per (ticker, start_date, end_date).
+
+    Returns a copy, so callers may modify it in place without affecting the memoized frame.
+    """
+    key = (ticker, start_date, end_date)
+    with _price_frames_lock:
+        if (df := _price_frames.get(key)) is not None:
+            _price_frames.move_to_end(key)
+            return df.copy()
+
+    df = _price_records_to_df(_get_price_records(ticker, start_date, end_date))
+
+    with _price_frames_lock:
+        _price_frames[key] = df
+        if len(_price_frames) > PRICE_FRAME_CACHE_SIZE:
+            _price_frames.popitem(last=False)
+    return df.copy()
@@ -0,0 +1,76 @@
+"""Incremental parsing of large JSON API responses."""
+
+import codecs
+import json
+import re
+from typing import Iterable, Iterator
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = " \t\n\r,"
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[dict[str, any]]:
+    """
+    Yield the items of the array stored under `key` in a JSON object, parsing the document chunk by chunk.
+
+    Only the unparsed tail of the document is kept in memory, so memory stays bounded by the
+    chunk size plus the size of a single item, regardless of how many items the array holds.
+    Array items are expected to be JSON objects, and `"key": [` is expected to first occur as
+    the array itself, which holds for the API's `{"<key>": [...]}` responses.
+
+    Args:
+        chunks: Raw response body chunks, e.g. from `response.iter_content()`
+        key: The name of the top-level array to stream
+
+    Returns:
+        An iterator over the decoded array items
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    array_start = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+
+    def read_more() -> bool:
+        """Drop the consumed part of the buffer and append the next chunk."""
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        buffer = buffer[pos:]
+        pos = 0
+        try:
+            buffer += utf8.decode(next(chunks))
+        except StopIteration:
+            buffer += utf8.decode(b"", final=True)
+            exhausted = True
+        return True
+
+    # Find the start of the array
+    while not (match := array_start.search(buffer)):
+        if not read_more():
+            return
+    pos = match.end()
+
+    while True:
+        # Skip separators between items
+        while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+            pos += 1
+
+        if pos == len(buffer):
+            if not read_more():
+                raise ValueError(f"Unexpected end of JSON while reading '{key}'")
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # The item is incomplete - read more unless the document has ended
+            if not read_more():
+                raise
+            continue
+
+        pos = end
+        yield item
@@ -0,0 +1,212 @@
+"""Running async LLM calls from the synchronous agent code"""
+
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Coroutine, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# Default number of LLM requests in flight at once across the process
+DEFAULT_LLM_CONCURRENCY = 8
+
+# Default number of graph nodes (analyst work units) run at once
+DEFAULT_GRAPH_CONCURRENCY = 64
+
+# Set inside run_llm_calls in batch mode: the batcher of the agent's calls, the limit on
+# concurrent provider requests, and (per call) whether the call has reached the batcher yet
+_call_batcher: ContextVar["CallBatcher | None"] = ContextVar("call_batcher", default=None)
+_request_slots: ContextVar[asyncio.Semaphore | None] = ContextVar("request_slots", default=None)
+_call_state: ContextVar[dict | None] = ContextVar("call_state", default=None)
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+# Process-wide limit on LLM requests in flight, with the event loop it was created on
+_llm_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the process-wide event loop that all async LLM calls run on, starting it on first use.
+
+    Every agent thread submits its coroutines to this one loop, so async provider clients (and
+    their connection pools) are always used from the loop they were created on.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_coroutine(coroutine: Coroutine[any, any, T]) -> T:
+    """Run a coroutine on the background event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result()
+
+
+def get_llm_concurrency(state: dict | None = None) -> int:
+    """
+    Get the maximum number of concurrent LLM calls from the run metadata, or LLM_MAX_CONCURRENCY.
+
+    LLM_MAX_CONCURRENCY caps the requests in flight across all agents and work units; the run
+    metadata can only lower the number of calls a single work unit starts at once.
+    """
+    concurrency = (state or {}).get("metadata", {}).get("llm_concurrency") or os.environ.get("LLM_MAX_CONCURRENCY") or DEFAULT_LLM_CONCURRENCY
+    return max(1, int(concurrency))
+
+
+def get_graph_concurrency() -> int:
+    """Get the maximum number of graph nodes run at once from GRAPH_MAX_CONCURRENCY."""
+    return max(1, int(os.environ.get("GRAPH_MAX_CONCURRENCY") or DEFAULT_GRAPH_CONCURRENCY))
+
+
+def get_llm_batch_size(state: dict | None = None) -> int:
+    """Get the number of tickers per batched LLM request from the run metadata, or LLM_BATCH_SIZE (1 disables batching)."""
+    batch_size = (state or {}).get("metadata", {}).get("llm_batch_size") or os.environ.get("LLM_BATCH_SIZE") or 1
+    return max(1, int(batch_size))
+
+
+class CallBatcher:
+    """
+    Coalesces concurrent calls that share a key into batches of up to `batch_size` items.
+
+    A batch is flushed as soon as it is full, or once every expected call has either been submitted
+    or finished without submitting (e.g. answered from a cache). Items whose batch fails, or that end
+    up alone in a batch, resolve to None so the caller can fall back to a single request.
+    """
+
+    def __init__(self, batch_size: int, expected: int):
+        self.batch_size = batch_size
+        self._waiting = expected
+        self._pending: dict[Hashable, list[tuple[any, asyncio.Future]]] = {}
+        self._flush_functions: dict[Hashable, Callable[[list], Awaitable[list]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: any, flush: Callable[[list], Awaitable[list]]) -> any:
+        """
+        Add an item to the batch for `key` and wait for its result.
+
+        Args:
+            key: Items with equal keys are batched together
+            item: The item to batch
+            flush: Coroutine function turning a list of items into a list of results (None for failed items)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(key, []).append((item, future))
+        self._flush_functions[key] = flush
+        self.settle()
+        if len(self._pending[key]) >= self.batch_size:
+            self._flush(key)
+        return await future
+
+    def settle(self):
+        """Mark the current call as no longer pending submission; flush everything once no call is."""
+        if (state := _call_state.get()) is None or state["settled"]:
+            return
+        state["settled"] = True
+        self._waiting -= 1
+        if self._waiting == 0:
+            for key in list(self._pending):
+                while self._pending.get(key):
+                    self._flush(key)
+
+    def _flush(self, key: Hashable):
+        batch, self._pending[key] = self._pending[key][: self.batch_size], self._pending[key][self.batch_size :]
+        if len(batch) == 1:
+            batch[0][1].set_result(None)
+            return
+        task = asyncio.create_task(self._run(self._flush_functions[key], batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, flush: Callable[[list], Awaitable[list]], batch: list[tuple[any, asyncio.Future]]):
+        # The batch request itself must not be batched again
+        _call_batcher.set(None)
+        try:
+            results = await flush([item for item, _ in batch])
+        except Exception as e:
+            print(f"Error in batched LLM call, falling back to single calls: {e}")
+            results = [None] * len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def get_call_batcher() -> CallBatcher | None:
+    """Get the batcher of the calls being run by run_llm_calls, if batch mode is on."""
+    return _call_batcher.get()
+
+
+def _get_llm_slots() -> asyncio.Semaphore:
+    global _llm_slots
+    loop = asyncio.get_running_loop()
+    if _llm_slots is None or _llm_slots[0] is not loop:
+        _llm_slots = (loop, asyncio.Semaphore(get_llm_concurrency()))
+    return _llm_slots[1]
+
+
+@asynccontextmanager
+async def llm_request_slot():
+    """Hold one of the process-wide LLM request slots (and of the work unit's, in batch mode) while making an LLM request."""
+    async with _request_slots.get() or nullcontext():
+        async with _get_llm_slots():
+            yield
+
+
+async def gather_limited(awaitables: list[Awaitable[T]], limit: int) -> list[T]:
+    """Await all awaitables with at most `limit` running at once, returning results in order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
+
+
+async def gather_batched(awaitables: list[Awaitable[T]], limit: int, batch_size: int) -> list[T]:
+    """
+    Await all awaitables with their LLM calls coalesced into batches of `batch_size` tickers.
+
+    All calls start at once so they can meet in the batcher; `limit` bounds the provider
+    requests (batched or single) in flight instead.
+    """
+    batcher = CallBatcher(batch_size, len(awaitables))
+    _call_batcher.set(batcher)
+    _request_slots.set(asyncio.Semaphore(limit))
+
+    async def run(awaitable: Awaitable[T]) -> T:
+        _call_state.set({"settled": False})
+        try:
+            return await awaitable
+        finally:
+            batcher.settle()
+
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
+
+
+def run_llm_calls(calls: dict[str, Awaitable[T]], state: dict | None = None) -> dict[str, T]:
+    """
+    Run per-ticker LLM calls concurrently and wait for all of them.
+
+    With a batch size above 1 (see `get_llm_batch_size`) the calls are coalesced into multi-ticker requests.
+
+    Args:
+        calls: Mapping of ticker to the (not yet awaited) LLM call for it
+        state: The agent state, for the concurrency limit
+
+    Returns:
+        Mapping of ticker to result, in the order of `calls`
+    """
+    if not calls:
+        return {}
+    if (batch_size := get_llm_batch_size(state)) > 1:
+        results = run_coroutine(gather_batched(list(calls.values()), get_llm_concurrency(state), batch_size))
+    else:
+        results = run_coroutine(gather_limited(list(calls.values()), get_llm_concurrency(state)))
+    return dict(zip(calls, results))
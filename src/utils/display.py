@@ -226,6 +226,112 @@ def print_trading_output(result: dict) -> None:
         print(f"{Fore.CYAN}{wrapped_reasoning}{Style.RESET_ALL}")
 
 
+def print_llm_metrics_summary(summary: dict) -> None:
+    """Print per-agent LLM call counts, token usage, latency, retries, fallbacks, hedges and failovers."""
+    if not summary:
+        return
+
+    table_data = [
+        [
+            agent.replace("_agent", "").replace("_", " ").title(),
+            stats["calls"],
+            f"{stats['input_tokens']:,}",
+            f"{stats['output_tokens']:,}",
+            f"{stats['latency_mean_seconds']:.2f}s",
+            f"{stats['latency_max_seconds']:.2f}s",
+            stats["retries"],
+            stats["parse_failures"],
+            f"{Fore.RED}{stats['fallbacks']}{Style.RESET_ALL}" if stats["fallbacks"] else 0,
+            stats["cache_hits"],
+            stats["hedges"],
+            stats["failovers"],
+        ]
+        for agent, stats in summary.items()
+    ]
+
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}LLM USAGE:{Style.RESET_ALL}")
+    print(
+        tabulate(
+            table_data,
+            headers=["Agent", "Calls", "Input Tokens", "Output Tokens", "Mean Latency", "Max Latency", "Retries", "Parse Failures", "Fallbacks", "Cache Hits", "Hedges", "Failovers"],
+            tablefmt="grid",
+            colalign=("left", "right", "right", "right", "right", "right", "right", "right", "right", "right", "right", "right"),
+        )
+    )
+
+
+def print_prompt_stats(stats: dict[str, dict[str, int]]) -> None:
+    """Print per-agent prompt counts and estimated prompt sizes."""
+    if not stats:
+        return
+
+    table_data = [
+        [
+            agent.replace("_agent", "").replace("_", " ").title(),
+            agent_stats["prompts"],
+            f"{agent_stats['estimated_tokens']:,}",
+            f"{agent_stats['estimated_tokens'] // max(agent_stats['prompts'], 1):,}",
+            f"{agent_stats['max_tokens']:,}",
+        ]
+        for agent, agent_stats in stats.items()
+    ]
+
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}PROMPT SIZES (estimated tokens):{Style.RESET_ALL}")
+    print(
+        tabulate(
+            table_data,
+            headers=["Agent", "Prompts", "Total Tokens", "Mean Tokens", "Max Tokens"],
+            tablefmt="grid",
+            colalign=("left", "right", "right", "right", "right"),
+        )
+    )
+
+
+def print_llm_cache_stats(stats: dict[str, any] | None) -> None:
+    """Print the hits, misses and evictions of the LLM response cache, if it is enabled."""
+    if not stats:
+        return
+
+    hit_ratio = "-" if stats["hit_ratio"] is None else f"{stats['hit_ratio']:.0%}"
+    table_data = [[stats["hits"], stats["misses"], hit_ratio, stats["writes"], stats["evictions"]]]
+
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}LLM RESPONSE CACHE:{Style.RESET_ALL}")
+    print(tabulate(table_data, headers=["Hits", "Misses", "Hit Ratio", "Writes", "Evictions"], tablefmt="grid", colalign=("right", "right", "right", "right", "right")))
+
+
+def print_rate_limit_stats(stats: dict[str, dict[str, any]]) -> None:
+    """Print the adaptive budget scale, rate-limit responses and queueing time of each provider."""
+    if not stats:
+        return
+
+    table_data = [
+        [
+            provider,
+            f"{provider_stats['scale']:.0%}",
+            f"{Fore.RED}{provider_stats['rate_limited']}{Style.RESET_ALL}" if provider_stats["rate_limited"] else 0,
+            f"{provider_stats['waited_seconds']:.2f}s",
+        ]
+        for provider, provider_stats in stats.items()
+    ]
+
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}RATE LIMITS:{Style.RESET_ALL}")
+    print(tabulate(table_data, headers=["Provider", "Budget Scale", "Rate Limited", "Queue Time"], tablefmt="grid", colalign=("left", "right", "right", "right")))
+
+
+def print_ollama_runtime_stats(stats: list[dict]) -> None:
+    """Print request counts and queue depths of the Ollama servers used."""
+    if not stats:
+        return
+
+    table_data = [
+        [server["base_url"], f"{Fore.GREEN}up{Style.RESET_ALL}" if server["healthy"] else f"{Fore.RED}down{Style.RESET_ALL}", server["requests"], server["num_parallel"], server["max_queue_depth"]]
+        for server in stats
+    ]
+
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}OLLAMA SERVERS:{Style.RESET_ALL}")
+    print(tabulate(table_data, headers=["Server", "Health", "Requests", "Parallel Slots", "Max Queue Depth"], tablefmt="grid", colalign=("left", "left", "right", "right", "right")))
+
+
 def print_backtest_results(table_rows: list) -> None:
     """Print the backtest results in a nicely formatted table"""
     # Clear the screen
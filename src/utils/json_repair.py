@@ -0,0 +1,175 @@
+"""Lenient extraction of JSON objects from LLM responses, with schema-guided repair.
+
+Models without a JSON mode wrap their answer in all sorts of formatting: ```json fences, bare
+fences, fences that are never closed, bare objects followed by prose, trailing commas, Python
+literals, or output cut off mid-object. These helpers find the object anyway, and coerce it to the
+expected Pydantic model (field-name case, Literal case, numbers sent as strings, a wrapping key),
+so that a usable response is not thrown away and re-requested.
+"""
+
+import json
+import re
+import types
+import typing
+from typing import Iterator
+
+from pydantic import BaseModel, ValidationError
+
+_FENCE = re.compile(r"```[a-zA-Z]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PYTHON_LITERALS = re.compile(r"\b(True|False|None)\b")
+_JSON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _decode_objects(text: str) -> Iterator[dict]:
+    """Yield the JSON objects that decode as-is from each opening brace of the text, outermost first."""
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            data, end = decoder.raw_decode(text, start)
+            if isinstance(data, dict):
+                yield data
+                start = text.find("{", end)
+                continue
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+
+
+def repair_json(text: str) -> str:
+    """
+    Repair common defects of an LLM-written JSON object that starts at the beginning of `text`:
+    smart or single quotes, Python literals, raw newlines in strings, trailing commas, prose after
+    the object, and truncation (open strings and brackets are closed).
+    """
+    text = text.translate(_SMART_QUOTES)
+    if '"' not in text:
+        text = text.replace("'", '"')
+
+    out: list[str] = []
+    outside: list[str] = []  # Characters outside strings since the last string
+    stack: list[str] = []
+    in_string = escaped = False
+
+    def flush_outside():
+        out.append(_PYTHON_LITERALS.sub(lambda match: _JSON_LITERALS[match.group()], "".join(outside)))
+        outside.clear()
+
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            out.append(char)
+            continue
+
+        if char == '"':
+            flush_outside()
+            out.append(char)
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+            outside.append(char)
+        elif char in "}]":
+            # Drop a trailing comma before the closing bracket
+            while outside and outside[-1] in " \t\r\n,":
+                outside.pop()
+            outside.append(_CLOSERS[stack.pop()] if stack else char)
+            if not stack:
+                break
+        else:
+            outside.append(char)
+
+    # Close whatever a truncated response left open
+    if in_string:
+        out.append('"')
+    flush_outside()
+    repaired = "".join(out).rstrip(" \t\r\n,")
+    if repaired.endswith(":"):
+        repaired += "null"
+    return repaired + "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+def iter_json_objects(content: str) -> Iterator[dict]:
+    """Yield candidate JSON objects found in a response, most likely first: fenced, bare, then repaired."""
+    if not content:
+        return
+    texts = [match.group(1) for match in _FENCE.finditer(content)] + [content]
+    for text in texts:
+        yield from _decode_objects(text)
+    for text in texts:
+        if (start := text.find("{")) != -1:
+            try:
+                data = json.loads(repair_json(text[start:]))
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                yield data
+
+
+def extract_json(content: str) -> dict | None:
+    """Get the most likely JSON object in a response, or None."""
+    return next(iter_json_objects(content), None)
+
+
+def _coerce_value(value: any, annotation: any) -> any:
+    """Coerce a value towards a field type where the intent is unambiguous."""
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin in (typing.Union, types.UnionType):
+        non_null = [arg for arg in args if arg is not type(None)]
+        return _coerce_value(value, non_null[0]) if len(non_null) == 1 else value
+    if origin is typing.Literal and isinstance(value, str):
+        return next((arg for arg in args if str(arg).lower() == value.strip().lower()), value)
+    if annotation in (int, float) and isinstance(value, str):
+        try:
+            number = float(value.strip().rstrip("%").replace(",", ""))
+        except ValueError:
+            return value
+        return int(number) if annotation is int else number
+    if origin is dict and isinstance(value, dict) and len(args) == 2:
+        return {key: _coerce_value(item, args[1]) for key, item in value.items()}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        coerced = coerce_to_model(value, annotation)
+        return coerced if coerced is not None else value
+    return value
+
+
+def coerce_to_model(data: dict, pydantic_model: type[BaseModel]) -> BaseModel | None:
+    """Validate data against a model, repairing field-name case, Literal case, numeric strings and a wrapping key; None if it still fails."""
+    try:
+        return pydantic_model.model_validate(data)
+    except ValidationError:
+        pass
+
+    fields = pydantic_model.model_fields
+    # The expected object wrapped in a single key, e.g. {"response": {...}}
+    if len(data) == 1 and not set(data) & set(fields) and isinstance(inner := next(iter(data.values())), dict):
+        data = inner
+
+    names = {name.lower(): name for name in fields}
+    coerced = {}
+    for key, value in data.items():
+        name = names.get(str(key).strip().lower().replace(" ", "_"), key)
+        coerced[name] = _coerce_value(value, fields[name].annotation) if name in fields else value
+
+    try:
+        return pydantic_model.model_validate(coerced)
+    except ValidationError:
+        return None
+
+
+def parse_model_response(content: str, pydantic_model: type[BaseModel]) -> BaseModel:
+    """Parse a response into the model, from the first candidate JSON object that fits; raises ValueError if none does."""
+    found = False
+    for data in iter_json_objects(content):
+        found = True
+        if (result := coerce_to_model(data, pydantic_model)) is not None:
+            return result
+    raise ValueError(f"Response does not match the {pydantic_model.__name__} schema" if found else "No JSON object found in response")
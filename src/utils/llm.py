@@ -1,9 +1,25 @@
 """Helper functions for LLM"""
 
 import json
-from pydantic import BaseModel
-from src.llm.models import get_model, get_model_info
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable
+from langchain_core.messages import BaseMessage, HumanMessage, convert_to_messages
+from langchain_core.prompt_values import PromptValue
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, ValidationError
+from src.llm.batch import get_batch_collector
+from src.llm.cache import get_llm_cache, make_cache_key
+from src.llm.hedging import get_fallback_models, hedged_invoke
+from src.llm.metrics import get_llm_metrics
+from src.llm.models import ModelProvider, get_model, get_model_info, get_structured_model
+from src.llm.rate_limit import DEFAULT_OUTPUT_TOKENS, get_retry_after, get_scheduler, is_rate_limit_error
+from src.llm.router import route_model
+from src.utils.concurrency import get_call_batcher, llm_request_slot, run_coroutine
+from src.utils.json_repair import extract_json, parse_model_response
 from src.utils.progress import progress
+from src.utils.prompts import REASONING_MODE_INSTRUCTIONS, add_prompt_cache_markers, apply_reasoning_mode, estimate_prompt_tokens, get_output_schema, get_reasoning_mode
 from src.graph.state import AgentState
 
 
@@ -14,9 +30,36 @@ def call_llm(
     state: AgentState | None = None,
     max_retries: int = 3,
     default_factory=None,
+    use_cache: bool = True,
+    ticker: str | None = None,
+) -> BaseModel:
+    """Blocking version of `acall_llm`, for synchronous callers. The call runs on the shared LLM event loop."""
+    return run_coroutine(
+        acall_llm(
+            prompt=prompt,
+            pydantic_model=pydantic_model,
+            agent_name=agent_name,
+            state=state,
+            max_retries=max_retries,
+            default_factory=default_factory,
+            use_cache=use_cache,
+            ticker=ticker,
+        )
+    )
+
+
+async def acall_llm(
+    prompt: any,
+    pydantic_model: type[BaseModel],
+    agent_name: str | None = None,
+    state: AgentState | None = None,
+    max_retries: int = 3,
+    default_factory=None,
+    use_cache: bool = True,
+    ticker: str | None = None,
 ) -> BaseModel:
     """
-    Makes an LLM call with retry logic, handling both JSON supported and non-JSON supported models.
+    Makes an async LLM call with retry logic, handling both JSON supported and non-JSON supported models.
 
     Args:
         prompt: The prompt to send to the LLM
@@ -25,60 +68,305 @@ def call_llm(
         state: Optional state object to extract agent-specific model configuration
         max_retries: Maximum number of retries (default: 3)
         default_factory: Optional factory function to create default response on failure
+        use_cache: Whether to answer from / store in the persistent LLM response cache (default: True)
+        ticker: Optional ticker the prompt is about; in batch mode, calls for different tickers are coalesced
 
     Returns:
         An instance of the specified Pydantic model
     """
-    
+    call = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "run_id": (state or {}).get("metadata", {}).get("run_id"),
+        "agent": agent_name,
+        "ticker": ticker,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "attempts": 0,
+        "parse_failures": 0,
+        "fallback": False,
+        "cache_hit": False,
+        "batched": False,
+        "hedges": 0,
+        "failovers": 0,
+        "served_by": None,
+        "deferred": False,
+        "repairs": 0,
+    }
+    start = time.perf_counter()
+    try:
+        return await _acall_llm(prompt, pydantic_model, agent_name, state, max_retries, default_factory, use_cache, ticker, call)
+    finally:
+        call["latency_seconds"] = round(time.perf_counter() - start, 6)
+        call["retries"] = max(call["attempts"] - 1, 0)
+        get_llm_metrics().record(call)
+
+
+def _record_usage(call: dict[str, any], message: any):
+    """Add the token usage reported with a response message to the call's metrics."""
+    if usage := getattr(message, "usage_metadata", None):
+        call["input_tokens"] += usage.get("input_tokens", 0)
+        call["output_tokens"] += usage.get("output_tokens", 0)
+
+
+async def _acall_llm(
+    prompt: any,
+    pydantic_model: type[BaseModel],
+    agent_name: str | None,
+    state: AgentState | None,
+    max_retries: int,
+    default_factory,
+    use_cache: bool,
+    ticker: str | None,
+    call: dict[str, any],
+) -> BaseModel:
+    model_name = model_provider = None
+
     # Extract model configuration if state is provided and agent_name is available
     if state and agent_name:
         model_name, model_provider = get_agent_model_config(state, agent_name)
-    
+
     # Fallback to defaults if still not provided
     if not model_name:
         model_name = "gpt-4o"
     if not model_provider:
-        model_provider = "OPENAI"
+        model_provider = "OpenAI"
 
-    model_info = get_model_info(model_name, model_provider)
-    llm = get_model(model_name, model_provider)
+    # With ranked models configured, the model is picked per call within the latency and cost budgets
+    model_name, model_provider = route_model(agent_name, state, model_name, model_provider, estimate_prompt_tokens(prompt) + DEFAULT_OUTPUT_TOKENS)
 
-    # For non-JSON support models, we can use structured output
-    if not (model_info and not model_info.has_json_mode()):
-        llm = llm.with_structured_output(
-            pydantic_model,
-            method="json_mode",
-        )
+    call["provider"] = str(getattr(model_provider, "value", model_provider))
+    call["model"] = model_name
+
+    # In compact reasoning modes, ask for little or no free-text reasoning - it dominates output tokens
+    reasoning_mode = get_reasoning_mode(state)
+    prompt = apply_reasoning_mode(prompt, reasoning_mode)
+    # Without reasoning, the model answers in a schema that has no reasoning fields at all
+    output_model = get_output_schema(pydantic_model, reasoning_mode)
+
+    # Identical requests are answered from the response cache
+    cache = get_llm_cache() if use_cache else None
+    if cache:
+        cache_key = make_cache_key(model_provider, model_name, prompt, pydantic_model, getattr(get_model(model_name, model_provider), "temperature", None))
+        if (cached_result := cache.get(cache_key, pydantic_model)) is not None:
+            call["cache_hit"] = True
+            return cached_result
+
+    # While an offline batch is being assembled, requests are collected instead of sent, and answered with defaults for now
+    # The placeholder answers are not real calls, so they are left out of the metrics summary
+    if collector := get_batch_collector():
+        call["deferred"] = True
+        if cache:
+            collector.add(cache_key, model_provider, model_name, prompt, pydantic_model, agent_name)
+        return default_factory() if default_factory else create_default_response(pydantic_model)
+
+    # In batch mode, this ticker's request may be answered as part of a multi-ticker request
+    if ticker and (batcher := get_call_batcher()) and (messages := _batchable_messages(prompt)):
+        system_messages, human_messages = messages
+        batch_key = (agent_name, pydantic_model, model_name, str(model_provider), tuple(message.content for message in system_messages))
+        flush = partial(_acall_llm_batch, system_messages=system_messages, pydantic_model=pydantic_model, agent_name=agent_name, state=state)
+        if (result := await batcher.submit(batch_key, (ticker, human_messages), flush)) is not None:
+            call["batched"] = True
+            return result
+
+    # With fallback models configured, slow requests are hedged and failed ones fail over down the chain
+    candidates = [(model_name, model_provider)] + get_fallback_models(agent_name, state)
+    invoke = partial(ainvoke_model, prompt=prompt, pydantic_model=output_model, call=call)
 
     # Call the LLM with retries
+    parse_error = None
     for attempt in range(max_retries):
         try:
-            # Call the LLM
-            result = llm.invoke(prompt)
-
-            # For non-JSON support models, we need to extract and parse the JSON manually
-            if model_info and not model_info.has_json_mode():
-                parsed_result = extract_json_from_response(result.content)
-                if parsed_result:
-                    return pydantic_model(**parsed_result)
+            call["attempts"] += 1
+            if parse_error:
+                # A response that could not be parsed is fixed with a short follow-up instead of re-sending the whole prompt
+                call["repairs"] += 1
+                served_by = (parse_error.model_name, parse_error.model_provider)
+                result = await ainvoke_model(*served_by, prompt=make_json_repair_prompt(parse_error, output_model), pydantic_model=output_model, call=call)
             else:
-                return result
+                result, served_by, hedges, failovers = await hedged_invoke(candidates, invoke)
+                call["hedges"] += hedges
+                call["failovers"] += failovers
+            call["served_by"] = "/".join(str(getattr(part, "value", part)) for part in reversed(served_by))
+            if output_model is not pydantic_model:
+                # The left-out reasoning fields take their defaults
+                result = pydantic_model.model_validate(result.model_dump())
+
+            # Only real responses of the requested model are cached, never fallback models' or the defaults returned on failure
+            if cache and served_by == candidates[0]:
+                cache.set(cache_key, result)
+            return result
 
         except Exception as e:
+            parse_error = e if isinstance(e, ResponseParseError) else None
             if agent_name:
                 progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
 
             if attempt == max_retries - 1:
                 print(f"Error in LLM call after {max_retries} attempts: {e}")
+                call["fallback"] = True
                 # Use default_factory if provided, otherwise create a basic default
                 if default_factory:
                     return default_factory()
                 return create_default_response(pydantic_model)
 
     # This should never be reached due to the retry logic above
+    call["fallback"] = True
     return create_default_response(pydantic_model)
 
 
+async def ainvoke_model(
+    model_name: str,
+    model_provider: str,
+    prompt: any,
+    pydantic_model: type[BaseModel],
+    call: dict[str, any],
+    on_sent: Callable[[], any] | None = None,
+) -> BaseModel:
+    """Make one request to one model and parse its response, raising if either fails. `on_sent` is called once the request leaves the queues."""
+    model_info = get_model_info(model_name, model_provider)
+
+    # Clients and structured-output wrappers are cached process-wide, so connections stay warm across calls
+    if model_info and not model_info.has_json_mode():
+        llm = get_model(model_name, model_provider)
+    else:
+        # For JSON support models, we can use structured output; the raw message carries the token usage
+        llm = get_structured_model(model_name, model_provider, pydantic_model, method="json_mode", include_raw=True)
+
+    # Calls are admitted within the provider's request and token budgets
+    scheduler = get_scheduler(model_provider)
+    estimated_tokens = estimate_prompt_tokens(prompt) + DEFAULT_OUTPUT_TOKENS
+
+    # Anthropic only caches prompt prefixes that are explicitly marked; other providers cache stable prefixes automatically
+    request = add_prompt_cache_markers(prompt) if str(getattr(model_provider, "value", model_provider)) == ModelProvider.ANTHROPIC else prompt
+
+    async with llm_request_slot():
+        await scheduler.acquire(model_name, estimated_tokens)
+        if on_sent:
+            on_sent()
+        try:
+            result = await llm.ainvoke(request)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                scheduler.on_rate_limited(get_retry_after(e))
+            raise
+        scheduler.on_success()
+
+    # For non-JSON support models, we need to extract and parse the JSON manually
+    if model_info and not model_info.has_json_mode():
+        _record_usage(call, result)
+        content = result.content
+    else:
+        _record_usage(call, result["raw"])
+        if result["parsed"] is not None:
+            return result["parsed"]
+        # Structured output that failed to parse may still hold a usable object
+        content = result["raw"].content
+
+    content = content if isinstance(content, str) else json.dumps(content)
+    try:
+        return parse_model_response(content, pydantic_model)
+    except ValueError as e:
+        call["parse_failures"] += 1
+        raise ResponseParseError(str(e), model_name, model_provider, content) from e
+
+
+class ResponseParseError(ValueError):
+    """A model answered, but its response could not be parsed into the expected structure."""
+
+    def __init__(self, message: str, model_name: str, model_provider: str, content: str):
+        super().__init__(message)
+        self.model_name = model_name
+        self.model_provider = model_provider
+        self.content = content
+
+
+JSON_REPAIR_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You fix malformed JSON. Reply with only the corrected JSON object in a ```json code block, keeping the original values.",
+        ),
+        (
+            "human",
+            """This response could not be used ({error}):
+
+{content}
+
+Rewrite it as a single JSON object that matches this JSON schema:
+{schema}""",
+        ),
+    ]
+)
+
+
+def make_json_repair_prompt(error: ResponseParseError, pydantic_model: type[BaseModel]) -> PromptValue:
+    """Build the short follow-up that asks a model to fix its unparseable response."""
+    return JSON_REPAIR_PROMPT.invoke({"error": str(error), "content": error.content, "schema": json.dumps(pydantic_model.model_json_schema())})
+
+
+class BatchResponse(BaseModel):
+    """Structured output of a multi-ticker request: the answer for each ticker, validated separately."""
+
+    signals: dict[str, dict[str, Any]]
+
+
+def _batchable_messages(prompt: any) -> tuple[list[BaseMessage], list[BaseMessage]] | None:
+    """Split a prompt into its leading system messages and the human messages after them, if it has that shape."""
+    if isinstance(prompt, PromptValue):
+        messages = prompt.to_messages()
+    elif isinstance(prompt, list):
+        messages = convert_to_messages(prompt)
+    else:
+        return None
+
+    split = next((i for i, message in enumerate(messages) if message.type != "system"), len(messages))
+    system_messages, human_messages = messages[:split], messages[split:]
+    if not system_messages or not human_messages or any(message.type != "human" or not isinstance(message.content, str) for message in human_messages):
+        return None
+    return system_messages, human_messages
+
+
+async def _acall_llm_batch(
+    items: list[tuple[str, list[BaseMessage]]],
+    system_messages: list[BaseMessage],
+    pydantic_model: type[BaseModel],
+    agent_name: str | None,
+    state: AgentState | None,
+) -> list[BaseModel | None]:
+    """Answer the requests of several tickers that share a system prompt with a single LLM call."""
+    # The reasoning-mode instruction is added once to the whole batch request instead of to every section
+    sections = "\n\n".join(
+        f"=== {ticker} ===\n" + "\n\n".join(message.content for message in human_messages if message.content not in REASONING_MODE_INSTRUCTIONS.values())
+        for ticker, human_messages in items
+    )
+    tickers = [ticker for ticker, _ in items]
+    request = HumanMessage(
+        content=f"""Answer each of the following {len(items)} requests independently. Each section is the complete request for one ticker.
+
+{sections}
+
+Return a single JSON object of the form {{"signals": {{"<ticker>": <your answer for that ticker, in the format its request asks for>}}}} with exactly one entry for each of these tickers: {", ".join(tickers)}"""
+    )
+
+    response = await acall_llm(
+        prompt=[*system_messages, request],
+        pydantic_model=BatchResponse,
+        agent_name=agent_name,
+        state=state,
+        max_retries=1,
+        default_factory=lambda: BatchResponse(signals={}),
+    )
+
+    # Validate each ticker's answer on its own; the ones that fail are retried as single calls
+    results = []
+    for ticker in tickers:
+        try:
+            results.append(pydantic_model.model_validate(response.signals[ticker]))
+        except (KeyError, ValidationError):
+            results.append(None)
+    return results
+
+
 def create_default_response(model_class: type[BaseModel]) -> BaseModel:
     """Creates a safe default response based on the model's fields."""
     default_values = {}
@@ -102,18 +390,8 @@ def create_default_response(model_class: type[BaseModel]) -> BaseModel:
 
 
 def extract_json_from_response(content: str) -> dict | None:
-    """Extracts JSON from markdown-formatted response."""
-    try:
-        json_start = content.find("```json")
-        if json_start != -1:
-            json_text = content[json_start + 7 :]  # Skip past ```json
-            json_end = json_text.find("```")
-            if json_end != -1:
-                json_text = json_text[:json_end].strip()
-                return json.loads(json_text)
-    except Exception as e:
-        print(f"Error extracting JSON from response: {e}")
-    return None
+    """Extracts JSON from a response: fenced, bare or followed by prose, repairing common defects."""
+    return extract_json(content)
 
 
 def get_agent_model_config(state, agent_name):
@@ -126,7 +404,7 @@ def get_agent_model_config(state, agent_name):
     if agent_name == 'portfolio_manager':
         # Get the model and provider from state metadata
         model_name = state.get("metadata", {}).get("model_name", "gpt-4o")
-        model_provider = state.get("metadata", {}).get("model_provider", "OPENAI")
+        model_provider = state.get("metadata", {}).get("model_provider", "OpenAI")
         return model_name, model_provider
     
     if request and hasattr(request, 'get_agent_model_config'):
@@ -136,7 +414,7 @@ def get_agent_model_config(state, agent_name):
     
     # Fall back to global configuration
     model_name = state.get("metadata", {}).get("model_name", "gpt-4o")
-    model_provider = state.get("metadata", {}).get("model_provider", "OPENAI")
+    model_provider = state.get("metadata", {}).get("model_provider", "OpenAI")
     
     # Convert enum to string if necessary
     if hasattr(model_provider, 'value'):
@@ -5,14 +5,15 @@ import subprocess
 import requests
 import time
 from typing import List
+from urllib.parse import urlparse
 import questionary
 from colorama import Fore, Style
 import os
 from . import docker
+from src.llm.ollama_runtime import get_keep_alive, get_num_parallel, get_ollama_base_urls, get_ollama_runtime
 
 # Constants
 OLLAMA_SERVER_URL = "http://localhost:11434"
-OLLAMA_API_MODELS_ENDPOINT = f"{OLLAMA_SERVER_URL}/api/tags"
 OLLAMA_DOWNLOAD_URL = {"darwin": "https://ollama.com/download/darwin", "windows": "https://ollama.com/download/windows", "linux": "https://ollama.com/download/linux"}  # macOS  # Windows  # Linux
 INSTALLATION_INSTRUCTIONS = {"darwin": "curl -fsSL https://ollama.com/install.sh | sh", "windows": "# Download from https://ollama.com/download/windows and run the installer", "linux": "curl -fsSL https://ollama.com/install.sh | sh"}
 
@@ -37,22 +38,27 @@ def is_ollama_installed() -> bool:
         return False  # Unsupported OS
 
 
-def is_ollama_server_running() -> bool:
+def is_local_server(ollama_url: str) -> bool:
+    """Check if an Ollama server URL points at this machine, where the server can be started and models pulled with the CLI."""
+    return urlparse(ollama_url).hostname in ("localhost", "127.0.0.1", "::1")
+
+
+def is_ollama_server_running(ollama_url: str = OLLAMA_SERVER_URL) -> bool:
     """Check if the Ollama server is running."""
     try:
-        response = requests.get(OLLAMA_API_MODELS_ENDPOINT, timeout=2)
+        response = requests.get(f"{ollama_url}/api/tags", timeout=2)
         return response.status_code == 200
     except requests.RequestException:
         return False
 
 
-def get_locally_available_models() -> List[str]:
-    """Get a list of models that are already downloaded locally."""
-    if not is_ollama_server_running():
+def get_locally_available_models(ollama_url: str = OLLAMA_SERVER_URL) -> List[str]:
+    """Get a list of models that are already downloaded on the server."""
+    if not is_ollama_server_running(ollama_url):
         return []
 
     try:
-        response = requests.get(OLLAMA_API_MODELS_ENDPOINT, timeout=5)
+        response = requests.get(f"{ollama_url}/api/tags", timeout=5)
         if response.status_code == 200:
             data = response.json()
             return [model["name"] for model in data["models"]] if "models" in data else []
@@ -61,26 +67,29 @@ def get_locally_available_models() -> List[str]:
         return []
 
 
-def start_ollama_server() -> bool:
+def start_ollama_server(ollama_url: str = OLLAMA_SERVER_URL) -> bool:
     """Start the Ollama server if it's not already running."""
-    if is_ollama_server_running():
+    if is_ollama_server_running(ollama_url):
         print(f"{Fore.GREEN}Ollama server is already running.{Style.RESET_ALL}")
         return True
 
     system = platform.system().lower()
 
+    # Serve as many requests per model at once as agents may send, and keep models loaded for the run
+    env = {**os.environ, "OLLAMA_HOST": urlparse(ollama_url).netloc, "OLLAMA_NUM_PARALLEL": str(get_num_parallel()), "OLLAMA_KEEP_ALIVE": get_keep_alive()}
+
     try:
         if system == "darwin" or system == "linux":  # macOS or Linux
-            subprocess.Popen(["ollama", "serve"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            subprocess.Popen(["ollama", "serve"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
         elif system == "windows":  # Windows
-            subprocess.Popen(["ollama", "serve"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
+            subprocess.Popen(["ollama", "serve"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, env=env)
         else:
             print(f"{Fore.RED}Unsupported operating system: {system}{Style.RESET_ALL}")
             return False
 
         # Wait for server to start
         for _ in range(10):  # Try for 10 seconds
-            if is_ollama_server_running():
+            if is_ollama_server_running(ollama_url):
                 print(f"{Fore.GREEN}Ollama server started successfully.{Style.RESET_ALL}")
                 return True
             time.sleep(1)
@@ -185,10 +194,10 @@ def install_ollama() -> bool:
     return False
 
 
-def download_model(model_name: str) -> bool:
-    """Download an Ollama model."""
-    if not is_ollama_server_running():
-        if not start_ollama_server():
+def download_model(model_name: str, ollama_url: str = OLLAMA_SERVER_URL) -> bool:
+    """Download an Ollama model to a local server."""
+    if not is_ollama_server_running(ollama_url):
+        if not start_ollama_server(ollama_url):
             return False
 
     print(f"{Fore.YELLOW}Downloading model {model_name}...{Style.RESET_ALL}")
@@ -204,7 +213,8 @@ def download_model(model_name: str) -> bool:
             text=True,
             bufsize=1,  # Line buffered
             encoding='utf-8',  # Explicitly use UTF-8 encoding
-            errors='replace'   # Replace any characters that cannot be decoded
+            errors='replace',  # Replace any characters that cannot be decoded
+            env={**os.environ, "OLLAMA_HOST": urlparse(ollama_url).netloc},
         )
         
         # Show some progress to the user
@@ -290,18 +300,20 @@ def download_model(model_name: str) -> bool:
 
 
 def ensure_ollama_and_model(model_name: str) -> bool:
-    """Ensure Ollama is installed, running, and the requested model is available."""
+    """Ensure Ollama is installed, running, and the requested model is available on every configured server."""
+    base_urls = get_ollama_base_urls()
+
     # Check if we're running in Docker
     in_docker = os.environ.get("OLLAMA_BASE_URL", "").startswith("http://ollama:") or os.environ.get("OLLAMA_BASE_URL", "").startswith("http://host.docker.internal:")
     
     # In Docker environment, we need a different approach
     if in_docker:
-        ollama_url = os.environ.get("OLLAMA_BASE_URL", "http://ollama:11434")
-        return docker.ensure_ollama_and_model(model_name, ollama_url)
+        return all(docker.ensure_ollama_and_model(model_name, base_url) and warm_up_model(model_name, base_url) for base_url in base_urls)
     
     # Regular flow for non-Docker environments
-    # Check if Ollama is installed
-    if not is_ollama_installed():
+    # A local server is installed and started if needed; remote servers of a pool must already be running
+    local_urls = [base_url for base_url in base_urls if is_local_server(base_url)]
+    if local_urls and not is_ollama_installed():
         print(f"{Fore.YELLOW}Ollama is not installed on your system.{Style.RESET_ALL}")
         
         # Ask if they want to install it
@@ -312,30 +324,54 @@ def ensure_ollama_and_model(model_name: str) -> bool:
             print(f"{Fore.RED}Ollama is required to use local models.{Style.RESET_ALL}")
             return False
     
-    # Make sure the server is running
-    if not is_ollama_server_running():
+    # Make sure the servers are running
+    for base_url in base_urls:
+        if is_ollama_server_running(base_url):
+            continue
+        if base_url not in local_urls:
+            print(f"{Fore.RED}Cannot connect to the Ollama server at {base_url}.{Style.RESET_ALL}")
+            return False
         print(f"{Fore.YELLOW}Starting Ollama server...{Style.RESET_ALL}")
-        if not start_ollama_server():
+        if not start_ollama_server(base_url):
             return False
     
-    # Check if the model is already downloaded
-    available_models = get_locally_available_models()
-    if model_name not in available_models:
-        print(f"{Fore.YELLOW}Model {model_name} is not available locally.{Style.RESET_ALL}")
-        
-        # Ask if they want to download it
-        model_size_info = ""
-        if "70b" in model_name:
-            model_size_info = " This is a large model (up to several GB) and may take a while to download."
-        elif "34b" in model_name or "8x7b" in model_name:
-            model_size_info = " This is a medium-sized model (1-2 GB) and may take a few minutes to download."
-        
-        if questionary.confirm(f"Do you want to download the {model_name} model?{model_size_info} The download will happen in the background.").ask():
-            return download_model(model_name)
-        else:
-            print(f"{Fore.RED}The model is required to proceed.{Style.RESET_ALL}")
-            return False
+    # With a pool of servers (OLLAMA_BASE_URLS), the model is pulled and loaded on each of them
+    return all(ensure_model(model_name, base_url) and warm_up_model(model_name, base_url) for base_url in base_urls)
+
+
+def ensure_model(model_name: str, ollama_url: str) -> bool:
+    """Ensure the model is downloaded on a running server, offering to download it if not."""
+    available_models = get_locally_available_models(ollama_url)
+    if model_name in available_models:
+        return True
+
+    print(f"{Fore.YELLOW}Model {model_name} is not available on {ollama_url}.{Style.RESET_ALL}")
     
+    # Ask if they want to download it
+    model_size_info = ""
+    if "70b" in model_name:
+        model_size_info = " This is a large model (up to several GB) and may take a while to download."
+    elif "34b" in model_name or "8x7b" in model_name:
+        model_size_info = " This is a medium-sized model (1-2 GB) and may take a few minutes to download."
+    
+    if not questionary.confirm(f"Do you want to download the {model_name} model?{model_size_info} The download will happen in the background.").ask():
+        print(f"{Fore.RED}The model is required to proceed.{Style.RESET_ALL}")
+        return False
+
+    # Local servers pull with the CLI, which shows progress; remote servers pull through their API
+    if is_local_server(ollama_url):
+        return download_model(model_name, ollama_url)
+    return docker.download_model(model_name, ollama_url)
+
+
+def warm_up_model(model_name: str, ollama_url: str) -> bool:
+    """Load the model into memory and keep it resident for the run, so the first agent call does not pay the load time."""
+    print(f"{Fore.YELLOW}Loading model {model_name} into memory on {ollama_url}...{Style.RESET_ALL}")
+    runtime = get_ollama_runtime(ollama_url)
+    if not runtime.preload(model_name):
+        print(f"{Fore.RED}Failed to load model {model_name} on {ollama_url}.{Style.RESET_ALL}")
+        return False
+    print(f"{Fore.GREEN}Model {model_name} loaded (keep-alive {get_keep_alive()}, {runtime.num_parallel} parallel requests).{Style.RESET_ALL}")
     return True
 
 
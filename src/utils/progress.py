@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
 from rich.console import Console
 from rich.live import Live
@@ -8,6 +10,9 @@ from typing import Dict, Optional, Callable, List
 
 console = Console()
 
+# Set while an analyst runs as one work unit of a fan-out: its agent-level "Done" is reported once by the fan-in instead
+_defer_done: ContextVar[bool] = ContextVar("defer_done", default=False)
+
 
 class AgentProgress:
     """Manages progress tracking for multiple agents."""
@@ -43,6 +48,9 @@ class AgentProgress:
 
     def update_status(self, agent_name: str, ticker: Optional[str] = None, status: str = "", analysis: Optional[str] = None):
         """Update the status of an agent."""
+        if ticker is None and status == "Done" and _defer_done.get():
+            return
+
         if agent_name not in self.agent_status:
             self.agent_status[agent_name] = {"status": "", "ticker": None}
 
@@ -63,6 +71,15 @@ class AgentProgress:
 
         self._refresh_display()
 
+    @contextmanager
+    def deferring_done(self):
+        """Drop agent-level "Done" updates (those without a ticker) made in this context, for the caller to report later."""
+        token = _defer_done.set(True)
+        try:
+            yield
+        finally:
+            _defer_done.reset(token)
+
     def get_all_status(self):
         """Get the current status of all agents as a dictionary."""
         return {agent_name: {"ticker": info["ticker"], "status": info["status"], "display_name": self._get_display_name(agent_name)} for agent_name, info in self.agent_status.items()}
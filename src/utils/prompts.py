@@ -0,0 +1,176 @@
+"""Helpers for building agent prompts from analysis data"""
+
+import json
+import threading
+from functools import cache
+from typing import get_args, get_origin
+
+from langchain_core.messages import HumanMessage, SystemMessage, convert_to_messages
+from langchain_core.prompt_values import PromptValue
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, create_model
+
+# Rough characters-per-token ratio for English text and JSON across the supported providers
+CHARS_PER_TOKEN = 4
+
+# Significant digits kept for floats in prompts; more only costs tokens
+FLOAT_PRECISION = 6
+
+# How much free-text reasoning agents are asked for: "full" persona prose, a "brief" one-liner, or "none"
+REASONING_MODES = ("full", "brief", "none")
+DEFAULT_REASONING_MODE = "full"
+
+# Instructions appended after the request, so the cacheable system prefix stays the same in every mode
+REASONING_MODE_INSTRUCTIONS = {
+    "brief": 'Output length limit: keep every "reasoning" value to one plain sentence of at most 20 words. Ignore any request above for detailed or persona-style reasoning.',
+    "none": 'Output length limit: do not write any reasoning. Omit every "reasoning" field (or leave it an empty string) and output only the remaining fields. Ignore any request above for reasoning.',
+}
+
+
+def _round_floats(value):
+    if isinstance(value, float):
+        return float(f"{value:.{FLOAT_PRECISION}g}")
+    if isinstance(value, dict):
+        return {key: _round_floats(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round_floats(item) for item in value]
+    return value
+
+
+def serialize_analysis(data: any) -> str:
+    """Serialize analysis data compactly for a prompt: no indentation or padding, floats rounded."""
+    return json.dumps(_round_floats(data), separators=(",", ":"), default=str)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_prompt_tokens(prompt: any) -> int:
+    """Estimate the number of input tokens of a prompt value, message list or string."""
+    if isinstance(prompt, PromptValue):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, list):
+        return sum(estimate_tokens(message.content if isinstance(message.content, str) else json.dumps(message.content)) for message in convert_to_messages(prompt))
+    return estimate_tokens(str(prompt))
+
+
+class PromptStats:
+    """Thread-safe per-agent counters of prompts built and their estimated input tokens."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: dict[str, dict[str, int]] = {}
+
+    def record(self, agent_name: str, tokens: int):
+        with self._lock:
+            stats = self._agents.setdefault(agent_name, {"prompts": 0, "estimated_tokens": 0, "max_tokens": 0})
+            stats["prompts"] += 1
+            stats["estimated_tokens"] += tokens
+            stats["max_tokens"] = max(stats["max_tokens"], tokens)
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """Get the counters of every agent as a dictionary."""
+        with self._lock:
+            return {agent_name: dict(stats) for agent_name, stats in sorted(self._agents.items())}
+
+    def reset(self):
+        with self._lock:
+            self._agents.clear()
+
+
+# Global prompt stats instance
+_prompt_stats = PromptStats()
+
+
+def get_prompt_stats() -> PromptStats:
+    """Get the global prompt stats instance."""
+    return _prompt_stats
+
+
+def build_ticker_prompt(template: ChatPromptTemplate, ticker: str, analysis_data: dict[str, any], agent_name: str) -> PromptValue:
+    """
+    Render an agent prompt for a single ticker.
+
+    Args:
+        template: Prompt template with `ticker` and `analysis_data` variables
+        ticker: The ticker being analyzed
+        analysis_data: The analysis of this ticker only - never the accumulated analyses of all tickers
+        agent_name: Name of the agent, for token accounting
+
+    Returns:
+        The rendered prompt
+    """
+    prompt = template.invoke({"ticker": ticker, "analysis_data": serialize_analysis(analysis_data)})
+    _prompt_stats.record(agent_name, estimate_prompt_tokens(prompt))
+    return prompt
+
+
+def add_prompt_cache_markers(prompt: any) -> any:
+    """
+    Mark a prompt's system messages as a cacheable prefix for providers with explicit prompt caching (Anthropic).
+
+    Agent prompt templates are compiled once at module level and their system prompts contain no
+    variables, so the system prefix is byte-identical across tickers, days and runs and can be
+    served from the provider's prompt cache. Prompts without a system message are returned unchanged.
+    """
+    if isinstance(prompt, PromptValue):
+        messages = prompt.to_messages()
+    elif isinstance(prompt, list):
+        messages = convert_to_messages(prompt)
+    else:
+        return prompt
+
+    last_system = max((i for i, message in enumerate(messages) if message.type == "system"), default=None)
+    if last_system is None or not isinstance(messages[last_system].content, str):
+        return prompt
+
+    messages = list(messages)
+    messages[last_system] = SystemMessage(content=[{"type": "text", "text": messages[last_system].content, "cache_control": {"type": "ephemeral"}}])
+    return messages
+
+
+def get_reasoning_mode(state: dict | None) -> str:
+    """Get the run's reasoning mode from the state metadata."""
+    mode = ((state or {}).get("metadata") or {}).get("reasoning_mode") or DEFAULT_REASONING_MODE
+    if mode not in REASONING_MODES:
+        raise ValueError(f"Unknown reasoning mode '{mode}', expected one of {', '.join(REASONING_MODES)}")
+    return mode
+
+
+def apply_reasoning_mode(prompt: any, mode: str) -> any:
+    """Append the output-length instruction of a compact reasoning mode to a prompt."""
+    if mode == "full":
+        return prompt
+    if isinstance(prompt, PromptValue):
+        messages = prompt.to_messages()
+    elif isinstance(prompt, str):
+        messages = [HumanMessage(content=prompt)]
+    else:
+        messages = convert_to_messages(prompt)
+    return [*messages, HumanMessage(content=REASONING_MODE_INSTRUCTIONS[mode])]
+
+
+def _without_reasoning_annotation(annotation: any) -> any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _without_reasoning(annotation)
+    if get_origin(annotation) in (dict, list) and get_args(annotation):
+        return get_origin(annotation)[tuple(map(_without_reasoning_annotation, get_args(annotation)))]
+    return annotation
+
+
+@cache
+def _without_reasoning(pydantic_model: type[BaseModel]) -> type[BaseModel]:
+    fields = {
+        name: (_without_reasoning_annotation(field.annotation), field)
+        for name, field in pydantic_model.model_fields.items()
+        # A required reasoning field cannot be left out of the answer
+        if name != "reasoning" or field.is_required()
+    }
+    return create_model(pydantic_model.__name__, __doc__=pydantic_model.__doc__, **fields)
+
+
+def get_output_schema(pydantic_model: type[BaseModel], mode: str) -> type[BaseModel]:
+    """Get the schema a model should answer in: in "none" mode, the output model without its optional `reasoning` fields (also in nested models)."""
+    return _without_reasoning(pydantic_model) if mode == "none" else pydantic_model
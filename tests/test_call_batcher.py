@@ -0,0 +1,86 @@
+import asyncio
+
+from src.utils.concurrency import gather_batched, gather_limited, get_call_batcher, llm_request_slot
+
+
+def _run(calls, batch_size=3, limit=4):
+    return asyncio.run(gather_batched(calls, limit, batch_size))
+
+
+def test_full_batches_flush_and_a_lone_item_falls_back():
+    flushed = []
+
+    async def flush(items):
+        flushed.append(items)
+        return [item * 10 for item in items]
+
+    async def call(item):
+        return await get_call_batcher().submit("key", item, flush)
+
+    assert _run([call(i) for i in range(7)]) == [0, 10, 20, 30, 40, 50, None]
+    assert sorted(map(sorted, flushed)) == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_calls_that_never_submit_let_the_rest_flush():
+    flushed = []
+
+    async def flush(items):
+        flushed.append(items)
+        return [item.upper() for item in items]
+
+    async def call(item):
+        return await get_call_batcher().submit("key", item, flush)
+
+    async def cached():
+        await asyncio.sleep(0.01)
+        return "cached"
+
+    # The partial batch must not wait for a batch size of 3 that can never be reached
+    assert _run([call("a"), cached(), call("b")]) == ["A", "cached", "B"]
+    assert flushed == [["a", "b"]]
+
+
+def test_keys_are_batched_separately():
+    flushed = []
+
+    async def flush(items):
+        flushed.append(items)
+        return items
+
+    async def call(key, item):
+        return await get_call_batcher().submit(key, item, flush)
+
+    assert _run([call("x", 1), call("y", 2), call("x", 3), call("y", 4)], batch_size=2) == [1, 2, 3, 4]
+    assert sorted(flushed) == [[1, 3], [2, 4]]
+
+
+def test_failed_batch_resolves_to_none():
+    async def flush(items):
+        raise RuntimeError("provider error")
+
+    async def call(item):
+        return await get_call_batcher().submit("key", item, flush)
+
+    assert _run([call(1), call(2)], batch_size=2) == [None, None]
+
+
+def test_requests_in_flight_are_capped_across_the_process(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "3")
+    in_flight = []
+
+    async def request():
+        async with llm_request_slot():
+            in_flight.append(1)
+            peak = len(in_flight)
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return peak
+
+    async def unit():
+        # Each work unit has its own per-unit limit of 4, but all of them share the process-wide slots
+        return await gather_limited([request() for _ in range(4)], 4)
+
+    async def run():
+        return await asyncio.gather(*(unit() for _ in range(5)))
+
+    assert max(max(peaks) for peaks in asyncio.run(run())) == 3
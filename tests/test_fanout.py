@@ -0,0 +1,93 @@
+from langgraph.graph import END, StateGraph
+
+from src.graph.fanout import FAN_IN_NODE, add_analyst_fan_out, fan_out_analysts
+from src.graph.state import AgentState, show_agent_reasoning
+from src.utils.progress import progress
+
+
+def _state(tickers, **metadata):
+    return {"messages": [], "data": {"tickers": tickers, "end_date": "2024-03-01"}, "metadata": {"model_name": "stub", **metadata}, "analyst_signals": {}}
+
+
+def test_one_unit_per_analyst_and_ticker():
+    state = _state(["AAPL", "MSFT", "NVDA"])
+    sends = fan_out_analysts(["buffett", "graham"])(state)
+
+    assert [(send.node, send.arg["data"]["tickers"]) for send in sends] == [
+        ("buffett", ["AAPL"]),
+        ("buffett", ["MSFT"]),
+        ("buffett", ["NVDA"]),
+        ("graham", ["AAPL"]),
+        ("graham", ["MSFT"]),
+        ("graham", ["NVDA"]),
+    ]
+    # Units keep the other run inputs and share one copy of the metadata, in which the join node shows the reasoning instead
+    assert all(send.arg["data"]["end_date"] == "2024-03-01" and send.arg["metadata"] is sends[0].arg["metadata"] for send in sends)
+    assert sends[0].arg["metadata"] == {**state["metadata"], "show_reasoning": False}
+    assert state["data"]["tickers"] == ["AAPL", "MSFT", "NVDA"]
+
+
+def test_batched_runs_send_ticker_groups():
+    sends = fan_out_analysts(["buffett"])(_state(["AAPL", "MSFT", "NVDA"], llm_batch_size=2))
+    assert [send.arg["data"]["tickers"] for send in sends] == [["AAPL", "MSFT"], ["NVDA"]]
+
+
+def test_nothing_to_fan_out_goes_to_the_fan_in_node():
+    assert fan_out_analysts(["buffett"])(_state([])) == FAN_IN_NODE
+    assert fan_out_analysts([])(_state(["AAPL"])) == FAN_IN_NODE
+
+
+def test_graph_merges_the_signals_of_every_unit():
+    def analyst(name):
+        def node(state):
+            (ticker,) = state["data"]["tickers"]
+            return {"analyst_signals": {name: {ticker: {"signal": "bullish"}}}}
+
+        return node
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("start_node", lambda state: None)
+    workflow.set_entry_point("start_node")
+    add_analyst_fan_out(workflow, [("buffett", analyst("buffett")), ("graham", analyst("graham"))])
+    workflow.add_node(FAN_IN_NODE, lambda state: {"analyst_signals": {"risk": {ticker: {"units": len(state["analyst_signals"])} for ticker in state["data"]["tickers"]}}})
+    workflow.add_edge(FAN_IN_NODE, END)
+
+    final_state = workflow.compile().invoke(_state(["AAPL", "MSFT"]))
+    signals = final_state["analyst_signals"]
+    assert signals["buffett"] == signals["graham"] == {"AAPL": {"signal": "bullish"}, "MSFT": {"signal": "bullish"}}
+    # Risk management runs once, after every unit, on the full ticker list
+    assert signals["risk"] == {"AAPL": {"units": 2}, "MSFT": {"units": 2}}
+
+
+def test_each_analyst_is_reported_done_once_after_all_its_units(capsys):
+    def analyst(name):
+        def node(state):
+            (ticker,) = state["data"]["tickers"]
+            progress.update_status(name, ticker, "Done")
+            if state["metadata"]["show_reasoning"]:
+                show_agent_reasoning({ticker: "bullish"}, name)
+            progress.update_status(name, None, "Done")
+            return {"analyst_signals": {name: {ticker: {"signal": "bullish"}}}}
+
+        return node
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("start_node", lambda state: None)
+    workflow.set_entry_point("start_node")
+    add_analyst_fan_out(workflow, [("buffett_agent", analyst("buffett_agent")), ("graham_agent", analyst("graham_agent"))])
+    workflow.add_node(FAN_IN_NODE, lambda state: None)
+    workflow.add_edge(FAN_IN_NODE, END)
+
+    updates = []
+    handler = progress.register_handler(lambda agent, ticker, status, *args: updates.append((agent, ticker, status)))
+    try:
+        workflow.compile().invoke(_state(["AAPL", "MSFT", "NVDA"], show_reasoning=True))
+    finally:
+        progress.unregister_handler(handler)
+
+    # Six per-ticker updates from the units, then one agent-level update per analyst from the join
+    assert sorted(updates[:6]) == sorted((agent, ticker, "Done") for agent in ("buffett_agent", "graham_agent") for ticker in ("AAPL", "MSFT", "NVDA"))
+    assert updates[6:] == [("buffett_agent", None, "Done"), ("graham_agent", None, "Done")]
+    # The reasoning is shown once per analyst, with its merged signals
+    output = capsys.readouterr().out
+    assert output.count("Buffett Agent") == output.count("Graham Agent") == 1 and "buffett_agent" not in output
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from src.llm import hedging
+from src.llm.hedging import ModelHealth, hedged_invoke, is_provider_failure
+
+
+class ParseError(ValueError):
+    pass
+
+
+class APIError(Exception):
+    status_code = 503
+
+
+@pytest.fixture
+def health(monkeypatch):
+    health = ModelHealth()
+    monkeypatch.setattr(hedging, "_model_health", health)
+    monkeypatch.setenv("LLM_HEDGE_DELAY_SECONDS", "1")
+    monkeypatch.setattr(hedging, "MIN_HEDGE_DELAY_SECONDS", 0.05)
+    return health
+
+
+def test_provider_failures():
+    assert is_provider_failure(asyncio.TimeoutError())
+    assert is_provider_failure(ConnectionError())
+    assert is_provider_failure(APIError())
+    assert not is_provider_failure(ParseError("not JSON"))
+
+
+def test_failover_is_not_a_hedge_and_parse_errors_keep_the_provider_healthy(health):
+    async def invoke(model_name, model_provider, on_sent):
+        on_sent()
+        if model_provider == "A":
+            raise ParseError("not JSON")
+        return model_name
+
+    for _ in range(hedging.FAILURE_THRESHOLD):
+        result, served_by, hedges, failovers = asyncio.run(hedged_invoke([("a", "A"), ("b", "B")], invoke))
+        assert (result, served_by, hedges, failovers) == ("b", ("b", "B"), 0, 1)
+    assert health.is_healthy("A")
+
+
+def test_provider_errors_put_the_provider_in_cooldown(health):
+    async def invoke(model_name, model_provider, on_sent):
+        if model_provider == "A":
+            raise APIError()
+        return model_name
+
+    for _ in range(hedging.FAILURE_THRESHOLD):
+        asyncio.run(hedged_invoke([("a", "A"), ("b", "B")], invoke))
+    assert not health.is_healthy("A")
+
+
+def test_slow_request_is_hedged(health, monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE_DELAY_SECONDS", "0.05")
+
+    async def invoke(model_name, model_provider, on_sent):
+        on_sent()
+        await asyncio.sleep(5 if model_provider == "A" else 0)
+        return model_name
+
+    assert asyncio.run(hedged_invoke([("a", "A"), ("b", "B")], invoke)) == ("b", ("b", "B"), 1, 0)
+
+
+def test_latency_is_measured_from_when_the_request_is_sent(health):
+    async def invoke(model_name, model_provider, on_sent):
+        await asyncio.sleep(0.2)  # Queued behind the rate limiter
+        on_sent()
+        return model_name
+
+    asyncio.run(hedged_invoke([("a", "A")], invoke))
+    assert health.latency_percentile("A", "a", 50, min_samples=1) < 0.1
@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from src.utils.analysts import ANALYST_CONFIG
+
+# Generous enough for a slow CI machine; importing both entry points takes about 1.5s on a laptop
+IMPORT_BUDGET_SECONDS = 5.0
+
+LAZY_MODULES = ["langchain_anthropic", "langchain_groq", "langchain_google_genai", "langchain_deepseek", "langchain_ollama", "matplotlib"]
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import src.main
+import app.backend.main
+print(json.dumps({"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_entry_points_import_quickly_without_optional_modules():
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True)
+    imported = json.loads(result.stdout.strip().splitlines()[-1])
+
+    analyst_modules = [config["agent_func"].split(":")[0] for config in ANALYST_CONFIG.values()]
+    loaded = [module for module in imported["modules"] if module.split(".")[0] in LAZY_MODULES or module in analyst_modules]
+    assert loaded == []
+    assert imported["seconds"] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,75 @@
+import json
+from typing import Literal
+
+import pytest
+from pydantic import BaseModel
+
+from src.utils.json_repair import extract_json, parse_model_response, repair_json
+
+
+class Signal(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float
+    reasoning: str
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '```json\n{"signal": "bullish", "confidence": 80}\n```',
+        '```\n{"signal": "bullish", "confidence": 80}\n```',
+        '```json\n{"signal": "bullish", "confidence": 80}',
+        'Here is my answer: {"signal": "bullish", "confidence": 80} Let me know if you need more.',
+        '{"signal": "bullish", "confidence": 80,}',
+        "{'signal': 'bullish', 'confidence': 80}",
+        "{“signal”: “bullish”, “confidence”: 80}",
+    ],
+)
+def test_extract_json_from_formatted_responses(content):
+    assert extract_json(content) == {"signal": "bullish", "confidence": 80}
+
+
+def test_repair_python_literals_outside_strings_only():
+    assert json.loads(repair_json('{"a": True, "b": None, "c": "True or None"}')) == {"a": True, "b": None, "c": "True or None"}
+
+
+def test_repair_raw_newline_in_string():
+    assert json.loads(repair_json('{"reasoning": "line one\nline two"}')) == {"reasoning": "line one\nline two"}
+
+
+@pytest.mark.parametrize(
+    "truncated, expected",
+    [
+        ('{"signal": "bullish", "reasoning": "Strong moat', {"signal": "bullish", "reasoning": "Strong moat"}),
+        ('{"signal": "bullish", "scores": [1, 2', {"signal": "bullish", "scores": [1, 2]}),
+        ('{"signal": "bullish", "confidence":', {"signal": "bullish", "confidence": None}),
+        ('{"signal": "bullish", "nested": {"a": 1,', {"signal": "bullish", "nested": {"a": 1}}),
+    ],
+)
+def test_repair_truncated_output(truncated, expected):
+    assert json.loads(repair_json(truncated)) == expected
+
+
+def test_brackets_inside_strings_are_not_structure():
+    assert json.loads(repair_json('{"reasoning": "a } and ] inside", "x": 1} trailing')) == {"reasoning": "a } and ] inside", "x": 1}
+
+
+def test_parse_model_response_coerces_to_the_schema():
+    content = 'Sure! {"Signal": "Bullish", "Confidence": "85%", "Reasoning": "Cheap"}'
+    assert parse_model_response(content, Signal) == Signal(signal="bullish", confidence=85, reasoning="Cheap")
+
+
+def test_parse_model_response_unwraps_a_single_key():
+    content = '{"response": {"signal": "neutral", "confidence": 50, "reasoning": "Mixed"}}'
+    assert parse_model_response(content, Signal).signal == "neutral"
+
+
+def test_parse_model_response_skips_objects_that_do_not_fit():
+    content = 'Example: {"foo": 1}. Answer: {"signal": "bearish", "confidence": 10, "reasoning": "Expensive"}'
+    assert parse_model_response(content, Signal).signal == "bearish"
+
+
+@pytest.mark.parametrize("content, message", [("no json here", "No JSON object"), ('{"signal": "sideways"}', "does not match")])
+def test_parse_model_response_errors(content, message):
+    with pytest.raises(ValueError, match=message):
+        parse_model_response(content, Signal)
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from src.tools.json_stream import iter_json_array
+
+DOCUMENT = {
+    "insider_trades": [
+        {"name": "Zoë \"Z\" Müller", "shares": 1200, "note": "bracket ] and brace } in a string"},
+        {"name": "李雷", "shares": -35.5, "nested": {"values": [1, 2, {"deep": None}]}},
+        {"name": "Plain", "shares": 0},
+    ],
+    "next_page_url": None,
+}
+
+
+def _chunks(blob: bytes, size: int):
+    return [blob[i : i + size] for i in range(0, len(blob), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 64, 4096])
+def test_items_survive_any_chunk_boundary(size):
+    blob = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode()
+    assert list(iter_json_array(_chunks(blob, size), "insider_trades")) == DOCUMENT["insider_trades"]
+
+
+def test_key_split_across_chunks_is_found():
+    blob = b'{"meta": {"count": 1}, "company_news": [{"title": "a"}]}'
+    start = blob.index(b"company_news")
+    chunks = [blob[: start + 4], blob[start + 4 : start + 15], blob[start + 15 :]]
+    assert list(iter_json_array(chunks, "company_news")) == [{"title": "a"}]
+
+
+def test_empty_array_and_missing_key_yield_nothing():
+    assert list(iter_json_array([b'{"company_news": []}'], "company_news")) == []
+    assert list(iter_json_array([b'{"other": [{"a": 1}]}'], "company_news")) == []
+
+
+def test_truncated_document_raises():
+    blob = b'{"company_news": [{"title": "a"}, {"title": "b'
+    with pytest.raises(ValueError):
+        list(iter_json_array(_chunks(blob, 5), "company_news"))
@@ -0,0 +1,53 @@
+import pytest
+from pydantic import BaseModel
+
+from src.llm import cache as llm_cache
+from src.llm.batch import BatchCollector, BatchProcessor, LocalBatchProcessor, collecting
+from src.llm.metrics import get_llm_metrics, new_run_id
+from src.utils.llm import call_llm
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+
+
+def test_batch_processors_must_implement_the_interface():
+    class Incomplete(BatchProcessor):
+        def submit(self, path):
+            return "id"
+
+    with pytest.raises(TypeError):
+        BatchProcessor()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_local_processor_answers_structured_requests(tmp_path):
+    collector = BatchCollector()
+    collector.add("key", "Stub", "stub", [("system", "You are an analyst."), ("human", "Analyze AAPL")], Signal, "warren_buffett_agent")
+    (path,) = collector.write(str(tmp_path)).values()
+
+    processor = LocalBatchProcessor(collector.models)
+    batch_id = processor.submit(path)
+    assert processor.is_done(batch_id)
+    assert Signal.model_validate_json(processor.results(batch_id)["key"])
+
+
+def test_placeholder_answers_while_collecting_are_not_counted(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE", "1")
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+    run_id = new_run_id()
+    state = {"metadata": {"model_name": "stub", "model_provider": "Stub", "run_id": run_id}}
+
+    collector = BatchCollector()
+    with collecting(collector):
+        for agent_name in ("warren_buffett_agent", "portfolio_manager"):
+            call_llm("Analyze AAPL", Signal, agent_name=agent_name, state=state, default_factory=lambda: Signal(signal="neutral", confidence=0))
+
+    # Only the analyst's request is batched; neither placeholder answer is a real call
+    assert len(collector.requests) == 1
+    assert [record["deferred"] for record in get_llm_metrics().records(run_id)] == [True, True]
+    assert get_llm_metrics().summary(run_id) == {}
+    get_llm_metrics().discard_run(run_id)
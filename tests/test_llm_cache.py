@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+
+from src.llm import cache as llm_cache
+from src.llm.cache import LLMResponseCache
+
+
+class Signal(BaseModel):
+    signal: str
+    reasoning: str
+
+
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    assert llm_cache.get_llm_cache() is None
+    monkeypatch.setenv("LLM_CACHE", "1")
+    assert llm_cache.get_llm_cache() is not None
+
+
+def test_overwriting_an_entry_does_not_grow_the_size(tmp_path):
+    cache = LLMResponseCache(str(tmp_path), max_bytes=10**6)
+    cache.set("ab" * 32, Signal(signal="bullish", reasoning="first"))
+    cache.set("cd" * 32, Signal(signal="bearish", reasoning="other"))
+    for _ in range(5):
+        cache.set("ab" * 32, Signal(signal="bullish", reasoning="second"))
+    assert cache._size == sum(entry.stat().st_size for entry in tmp_path.glob("*/*.json"))
+    assert cache.get("ab" * 32, Signal).reasoning == "second"
@@ -0,0 +1,42 @@
+from src.llm.metrics import LLMMetrics
+
+
+def _call(run_id, agent="warren_buffett_agent", **fields):
+    return {"run_id": run_id, "agent": agent, "latency_seconds": 0.5, "attempts": 1, "retries": 0, "parse_failures": 0, "fallback": False, "cache_hit": False, **fields}
+
+
+def test_summary_of_one_run():
+    metrics = LLMMetrics()
+    metrics.record(_call("a"))
+    metrics.record(_call("a"))
+    metrics.record(_call("b"))
+    assert metrics.summary("a")["warren_buffett_agent"]["calls"] == 2
+    assert metrics.summary()["warren_buffett_agent"]["calls"] == 3
+
+    metrics.discard_run("a")
+    assert [record["run_id"] for record in metrics.records()] == ["b"]
+
+
+def test_deferred_calls_are_not_counted():
+    metrics = LLMMetrics()
+    metrics.record(_call("a", deferred=True))
+    metrics.record(_call("a"))
+    assert metrics.summary()["warren_buffett_agent"]["calls"] == 1
+
+
+def test_handlers_can_filter_by_run():
+    metrics = LLMMetrics()
+    seen = []
+    metrics.register_handler(lambda record: record["run_id"] == "a" and seen.append(record["agent"]))
+    metrics.record(_call("a", agent="one"))
+    metrics.record(_call("b", agent="two"))
+    assert seen == ["one"]
+
+
+def test_batched_tickers_are_counted_once_in_their_batch_request():
+    metrics = LLMMetrics()
+    metrics.record(_call("a", ticker=None, input_tokens=900, output_tokens=100))
+    metrics.record(_call("a", ticker="AAPL", batched=True))
+    metrics.record(_call("a", ticker="MSFT", batched=True))
+    summary = metrics.summary()["warren_buffett_agent"]
+    assert (summary["calls"], summary["input_tokens"], summary["output_tokens"]) == (1, 900, 100)
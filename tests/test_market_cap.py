@@ -0,0 +1,37 @@
+from src.data.cache import Cache
+from src.data.models import LineItem
+from src.tools import api
+
+
+def _reports(*reports):
+    return [LineItem(ticker="TEST", report_period=period, period="ttm", currency="USD", outstanding_shares=shares) for period, shares in reports]
+
+
+def test_market_cap_uses_shares_reported_by_end_date(monkeypatch):
+    requests = []
+
+    def search_line_items(ticker, line_items, end_date, period="ttm", limit=10):
+        requests.append(end_date)
+        return _reports(("2024-09-30", 300.0), ("2024-06-30", 200.0), ("2024-03-31", 100.0))
+
+    monkeypatch.setattr(api, "_cache", Cache())
+    monkeypatch.setattr(api, "search_line_items", search_line_items)
+    monkeypatch.setattr(api, "get_close_price", lambda ticker, date: 10.0)
+
+    assert api.get_market_cap("TEST", "2024-12-31") == 3000.0
+    assert api.get_market_cap("TEST", "2024-07-15") == 2000.0
+    assert api.get_market_cap("TEST", "2024-04-01") == 1000.0
+    # Reports fetched up to the latest date are reused for earlier dates
+    assert requests == ["2024-12-31"]
+
+
+def test_market_cap_falls_back_to_metrics_without_reported_shares(monkeypatch):
+    class Metrics:
+        market_cap = 5000.0
+
+    monkeypatch.setattr(api, "_cache", Cache())
+    monkeypatch.setattr(api, "search_line_items", lambda *args, **kwargs: _reports(("2024-09-30", 300.0)))
+    monkeypatch.setattr(api, "get_close_price", lambda ticker, date: 10.0)
+    monkeypatch.setattr(api, "get_financial_metrics", lambda ticker, end_date: [Metrics()])
+
+    assert api.get_market_cap("TEST", "2024-01-31") == 5000.0
@@ -0,0 +1,79 @@
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+
+from src.llm import ollama_runtime
+from src.llm.ollama_chat import ManagedChatOllama, PooledChatOllama
+from src.llm.ollama_runtime import OllamaPool, get_ollama_pool
+from src.utils import ollama
+from src.utils.ollama import ensure_ollama_and_model
+
+URLS = ["http://ollama-a:11434", "http://ollama-b:11434"]
+
+
+@pytest.fixture(autouse=True)
+def pools(monkeypatch):
+    # No network: every health check passes
+    monkeypatch.setattr(ollama_runtime.OllamaRuntime, "check_health", lambda runtime: True)
+    monkeypatch.setattr(ollama_runtime, "_runtimes", {})
+    monkeypatch.setattr(ollama_runtime, "_pools", {})
+    yield
+    ollama_runtime.close_ollama_pools()
+
+
+def test_select_prefers_healthy_then_least_busy():
+    pool = get_ollama_pool(URLS)
+    a, b = pool.runtimes
+    with a.track():
+        assert pool.select() is b
+        b.set_healthy(False)
+        assert pool.select() is a
+        assert pool.select(exclude={a.base_url}) is b
+    assert pool.select(exclude=set(URLS)) is None
+
+
+def test_health_thread_stops_on_close():
+    pool = OllamaPool(URLS)
+    pool.close()
+    assert not pool._health_thread.is_alive()
+
+
+def test_unreachable_servers_are_taken_out_of_rotation(monkeypatch):
+    def refuse(self, *args, **kwargs):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(ManagedChatOllama, "_generate", refuse)
+    model = PooledChatOllama(model="llama3", base_url=URLS[0], base_urls=URLS)
+    with pytest.raises(ConnectionError, match="No healthy Ollama server"):
+        model._generate([HumanMessage(content="hi")])
+    assert [runtime.healthy for runtime in get_ollama_pool(URLS).runtimes] == [False, False]
+
+
+def test_no_servers_raises_a_clear_error(monkeypatch):
+    monkeypatch.setattr(OllamaPool, "select", lambda self, exclude=frozenset(): None)
+    model = PooledChatOllama(model="llama3", base_url=URLS[0], base_urls=URLS)
+    with pytest.raises(ConnectionError, match="No healthy Ollama server"):
+        model._generate([HumanMessage(content="hi")])
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    """Fake Ollama servers: the models each one has, the pulls requested and the preloads that succeed."""
+    servers = {"models": {URLS[0]: ["llama3"], URLS[1]: []}, "pulled": [], "loads": {URLS[0]: True, URLS[1]: True}}
+    monkeypatch.setenv("OLLAMA_BASE_URLS", ",".join(URLS))
+    monkeypatch.setattr(ollama, "is_ollama_server_running", lambda url=None: True)
+    monkeypatch.setattr(ollama, "get_locally_available_models", lambda url=None: servers["models"][url])
+    monkeypatch.setattr(ollama.questionary, "confirm", lambda *args, **kwargs: type("Answer", (), {"ask": lambda self: True})())
+    monkeypatch.setattr(ollama.docker, "download_model", lambda model, url: servers["pulled"].append(url) or True)
+    monkeypatch.setattr(ollama_runtime.OllamaRuntime, "preload", lambda runtime, model: servers["loads"][runtime.base_url])
+    return servers
+
+
+def test_model_is_pulled_and_loaded_on_every_server(servers):
+    assert ensure_ollama_and_model("llama3")
+    assert servers["pulled"] == [URLS[1]]
+
+
+def test_failed_preload_fails_the_check(servers):
+    servers["loads"][URLS[1]] = False
+    assert not ensure_ollama_and_model("llama3")
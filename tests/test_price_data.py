@@ -0,0 +1,17 @@
+from src.tools import api
+
+
+def _records(closes):
+    return [{"open": c, "close": c, "high": c, "low": c, "volume": 100, "time": f"2024-01-{day:02d}T00:00:00Z"} for day, c in enumerate(closes, start=2)]
+
+
+def test_price_data_copies_are_independent(monkeypatch):
+    monkeypatch.setattr(api, "_get_price_records", lambda ticker, start_date, end_date: _records([1.0, 2.0, 3.0]))
+    monkeypatch.setattr(api, "_price_frames", type(api._price_frames)())
+
+    first = api.get_price_data("TEST", "2024-01-01", "2024-01-31")
+    first.loc[first.index[0], "close"] = -1.0
+    first["close"] = first["close"].fillna(0)
+
+    second = api.get_price_data("TEST", "2024-01-01", "2024-01-31")
+    assert second["close"].tolist() == [1.0, 2.0, 3.0]
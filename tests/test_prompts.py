@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+
+from src.llm.metrics import get_llm_metrics, new_run_id
+from src.utils.llm import call_llm
+from src.utils.prompts import get_output_schema
+
+
+class Decision(BaseModel):
+    action: str
+    reasoning: str = Field(default="", description="Reasoning for the decision")
+
+
+class Output(BaseModel):
+    decisions: dict[str, Decision]
+    reasoning: str = ""
+
+
+class RequiredReasoning(BaseModel):
+    reasoning: str
+
+
+def test_none_mode_schema_has_no_optional_reasoning_fields():
+    schema = get_output_schema(Output, "none")
+    assert "reasoning" not in schema.model_fields
+    assert "reasoning" not in schema.model_json_schema()["$defs"]["Decision"]["properties"]
+    assert get_output_schema(Output, "brief") is Output
+    assert "reasoning" in get_output_schema(RequiredReasoning, "none").model_fields
+
+
+def test_none_mode_answers_without_reasoning():
+    run_id = new_run_id()
+    answers = {}
+    for mode in ("full", "none"):
+        state = {"metadata": {"model_name": "stub", "model_provider": "Stub", "run_id": run_id, "reasoning_mode": mode}}
+        answers[mode] = call_llm('Decide for {"AAPL": {"price": 1}}', Output, agent_name="portfolio_manager", state=state)
+
+    assert answers["full"].reasoning and answers["full"].decisions["AAPL"].reasoning
+    assert isinstance(answers["none"], Output)
+    assert answers["none"].reasoning == "" and answers["none"].decisions["AAPL"].reasoning == ""
+    get_llm_metrics().discard_run(run_id)
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from src.llm import rate_limit
+from src.llm.rate_limit import DECREASE_FACTOR, INCREASE_STEP, MIN_SCALE, ProviderScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_refills_continuously(clock):
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60, scale=1.0) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1, scale=1.0) == pytest.approx(1.0)
+    clock.now += 30
+    assert bucket.wait_time(30, scale=1.0) == 0
+    assert bucket.wait_time(40, scale=1.0) == pytest.approx(10.0)
+
+
+def test_bucket_scale_shrinks_capacity_and_refill_rate(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(60)
+    clock.now += 60
+    # At half scale the bucket holds 30 and refills at 30 per minute
+    assert bucket.wait_time(30, scale=0.5) == 0
+    bucket.take(30)
+    assert bucket.wait_time(10, scale=0.5) == pytest.approx(20.0)
+
+
+def test_oversized_request_waits_for_a_full_bucket_only(clock):
+    bucket = TokenBucket(per_minute=100)
+    assert bucket.wait_time(1000, scale=1.0) == 0
+
+
+def test_aimd_scale(clock):
+    scheduler = ProviderScheduler("OpenAI", {})
+    scheduler.on_rate_limited()
+    assert scheduler.scale == DECREASE_FACTOR
+    assert scheduler.paused_until == clock.now + rate_limit.INITIAL_BACKOFF_SECONDS
+    scheduler.on_rate_limited(retry_after=5)
+    assert scheduler.scale == DECREASE_FACTOR**2
+    assert scheduler.paused_until == clock.now + 5
+    for _ in range(100):
+        scheduler.on_rate_limited()
+    assert scheduler.scale == MIN_SCALE
+    scheduler.on_success()
+    assert scheduler.scale == pytest.approx(MIN_SCALE + INCREASE_STEP)
+    for _ in range(100):
+        scheduler.on_success()
+    assert scheduler.scale == 1.0
+    assert scheduler.stats()["rate_limited"] == 102
+
+
+def test_a_throttled_model_does_not_block_other_models():
+    scheduler = ProviderScheduler("OpenAI", {"OpenAI/slow": {"rpm": 1}})
+
+    async def run():
+        await scheduler.acquire("slow", 10)
+        # The second call to the slow model waits about a minute for its budget
+        blocked = asyncio.create_task(scheduler.acquire("slow", 10))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(scheduler.acquire("fast", 10), timeout=1)
+        assert not blocked.done()
+        blocked.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from src.llm import router
+from src.llm.metrics import LLMMetrics
+from src.llm.router import RunSpend, route_model
+
+ROUTES = {"*": ["OpenAI/gpt-4o", "OpenAI/gpt-4o-mini", "Groq/llama-3.3-70b-versatile"]}
+COSTS = {"OpenAI/gpt-4o": 5.0, "OpenAI/gpt-4o-mini": 0.5, "Groq/llama-3.3-70b-versatile": 1.0}
+
+
+@pytest.fixture
+def spend(monkeypatch):
+    monkeypatch.setenv("LLM_ROUTES", json.dumps(ROUTES))
+    monkeypatch.setenv("LLM_MODEL_COSTS", json.dumps(COSTS))
+    monkeypatch.delenv("LLM_LATENCY_BUDGET_SECONDS", raising=False)
+    metrics = LLMMetrics()
+    spend = RunSpend()
+    metrics.register_handler(spend.record)
+    monkeypatch.setattr(router, "_run_spend", spend)
+    return metrics
+
+
+def _route(budget, tokens=10_000):
+    state = {"metadata": {"run_id": "run", "llm_cost_budget": budget}}
+    return route_model("warren_buffett_agent", state, "gpt-4o", "OpenAI", tokens)
+
+
+def _call(model, provider, tokens, served_by=None):
+    return {"run_id": "run", "model": model, "provider": provider, "input_tokens": tokens, "output_tokens": 0, "served_by": served_by, "latency_seconds": 1.0, "attempts": 1, "retries": 0, "parse_failures": 0, "fallback": False, "cache_hit": False}
+
+
+def test_calls_are_downgraded_as_the_budget_is_spent(spend):
+    # 10k tokens cost $0.05 with gpt-4o and $0.005 with gpt-4o-mini
+    assert _route(0.10) == ("gpt-4o", "OpenAI")
+    spend.record(_call("gpt-4o", "OpenAI", 12_000))
+    assert _route(0.10) == ("gpt-4o-mini", "OpenAI")
+    # Failed-over calls are billed by the model that served them
+    spend.record(_call("gpt-4o", "OpenAI", 30_000, served_by="Groq/llama-3.3-70b-versatile"))
+    assert router.get_run_spend().spent("run") == pytest.approx(0.06 + 0.03)
+    # Over budget, the cheapest model is the last resort
+    spend.record(_call("gpt-4o", "OpenAI", 10_000))
+    assert _route(0.10) == ("gpt-4o-mini", "OpenAI")
+
+
+def test_without_a_budget_the_best_model_is_used(spend):
+    spend.record(_call("gpt-4o", "OpenAI", 10**7))
+    assert _route(None) == ("gpt-4o", "OpenAI")
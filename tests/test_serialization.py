@@ -0,0 +1,101 @@
+import math
+import time
+
+import pytest
+
+from src.data import serialization
+from src.data.cache import Cache
+from src.data.serialization import dumps_entries, loads_entries, loads_timed_entries
+
+ENTRIES = {
+    "AAPL_2024-01-01_2024-02-01": [
+        {"time": "2024-01-02T00:00:00Z", "open": 187.15, "close": 185.64, "volume": 82488700},
+        {"time": "2024-01-03T00:00:00Z", "open": 184.22, "close": 184.25, "volume": 58414500},
+    ],
+    "MSFT_2024-01-01_2024-02-01": [
+        {"time": "2024-01-02T00:00:00Z", "open": 373.86, "close": 370.87, "volume": 25258600},
+    ],
+    "NEWS": [
+        {"title": "Zoë's \"quoted\" headline", "source": "Reuters", "sentiment": None, "url": "https://example.com/1"},
+        {"title": "李雷 on earnings", "source": "Reuters", "sentiment": "positive", "url": "https://example.com/2"},
+        {"title": "Third", "source": "Bloomberg", "sentiment": "neutral", "url": "https://example.com/3"},
+    ],
+    "EMPTY": [],
+}
+
+
+def test_round_trip():
+    assert loads_entries(dumps_entries(ENTRIES)) == ENTRIES
+
+
+def test_records_with_missing_fields():
+    entries = {"k": [{"a": 1, "b": "x"}, {"a": 2}, {"b": "y", "c": [1, 2]}]}
+    assert loads_entries(dumps_entries(entries)) == entries
+
+
+def test_mixed_types_keep_their_type():
+    entries = {"k": [{"v": True}, {"v": 1}, {"v": 1.0}, {"v": None}, {"v": "1"}, {"v": {"nested": [1]}}]}
+    restored = loads_entries(dumps_entries(entries))["k"]
+    assert [type(record["v"]) for record in restored] == [bool, int, float, type(None), str, dict]
+    assert restored == entries["k"]
+
+
+def test_floats_with_missing_values_and_nan():
+    assert loads_entries(dumps_entries({"k": [{"v": 1.5}, {"v": None}]})) == {"k": [{"v": 1.5}, {"v": None}]}
+    # NaN cannot be stored as a float column (it would read back as None), so it round-trips through the dictionary
+    restored = loads_entries(dumps_entries({"k": [{"v": 1.5}, {"v": math.nan}]}))["k"]
+    assert restored[0]["v"] == 1.5 and math.isnan(restored[1]["v"])
+
+
+def test_large_integers_and_nul_in_strings():
+    entries = {"k": [{"v": 2**70, "s": "a\0b"}, {"v": -1, "s": "c"}]}
+    assert loads_entries(dumps_entries(entries)) == entries
+
+
+def test_field_names_are_only_ever_data():
+    entries = {"k": [{"x': __import__('os').system('false'), '": 1, "'": "quote"}]}
+    assert loads_entries(dumps_entries(entries)) == entries
+
+
+def test_max_age_skips_stale_entries():
+    now = time.time()
+    blob = dumps_entries(ENTRIES, stored_at={"NEWS": now - 7200})
+    timed = loads_timed_entries(blob)
+    assert timed["NEWS"][0] == now - 7200
+    assert set(loads_entries(blob, max_age=3600)) == set(ENTRIES) - {"NEWS"}
+
+
+def test_file_written_with_the_other_byte_order(monkeypatch):
+    encode_column = serialization._encode_column
+
+    def encode_swapped(*args):
+        kind, data = encode_column(*args)
+        data = data.__copy__()
+        data.byteswap()
+        return kind, data
+
+    # Write the file as a machine with the other byte order would
+    monkeypatch.setattr(serialization, "_encode_column", encode_swapped)
+    monkeypatch.setattr(serialization.sys, "byteorder", "big" if serialization.sys.byteorder == "little" else "little")
+    blob = dumps_entries(ENTRIES)
+    monkeypatch.undo()
+    assert loads_entries(blob) == ENTRIES
+
+
+def test_bad_magic_is_rejected():
+    with pytest.raises(ValueError):
+        loads_entries(b"JSON" + dumps_entries(ENTRIES)[4:])
+
+
+def test_cache_skips_stale_persisted_entries(tmp_path):
+    cache = Cache()
+    cache.set_company_news("AAPL", [{"date": "2024-01-02", "title": "Old"}])
+    cache.save(tmp_path)
+
+    fresh = Cache()
+    fresh.load(tmp_path, max_age=3600)
+    assert fresh._company_news_cache == {"AAPL": [{"date": "2024-01-02", "title": "Old"}]}
+
+    stale = Cache()
+    stale.load(tmp_path, max_age=-1)
+    assert stale._company_news_cache == {}
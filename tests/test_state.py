@@ -0,0 +1,33 @@
+from src.graph.state import merge_signals
+
+
+def test_merge_adds_new_agents_and_tickers():
+    existing = {"buffett": {"AAPL": {"signal": "bullish"}}}
+    merged = merge_signals(existing, {"buffett": {"MSFT": {"signal": "bearish"}}, "graham": {"AAPL": {"signal": "neutral"}}})
+    assert merged == {
+        "buffett": {"AAPL": {"signal": "bullish"}, "MSFT": {"signal": "bearish"}},
+        "graham": {"AAPL": {"signal": "neutral"}},
+    }
+
+
+def test_later_signal_for_a_ticker_wins():
+    merged = merge_signals({"buffett": {"AAPL": {"signal": "bullish"}}}, {"buffett": {"AAPL": {"signal": "bearish"}}})
+    assert merged == {"buffett": {"AAPL": {"signal": "bearish"}}}
+
+
+def test_inputs_are_not_modified_and_other_agents_are_shared():
+    graham = {"AAPL": {"signal": "neutral"}}
+    existing = {"buffett": {"AAPL": {"signal": "bullish"}}, "graham": graham}
+    update = {"buffett": {"MSFT": {"signal": "bearish"}}}
+    merged = merge_signals(existing, update)
+
+    assert existing == {"buffett": {"AAPL": {"signal": "bullish"}}, "graham": {"AAPL": {"signal": "neutral"}}}
+    assert update == {"buffett": {"MSFT": {"signal": "bearish"}}}
+    # Agents that were not updated are not copied
+    assert merged["graham"] is graham
+
+
+def test_merge_with_empty_sides():
+    signals = {"buffett": {"AAPL": {"signal": "bullish"}}}
+    assert merge_signals({}, signals) == signals
+    assert merge_signals(signals, {}) == signals
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from src.data.cache import Cache
+from src.tools import api
+
+
+def _news(count):
+    return [{"ticker": "TEST", "title": f"News {i}", "author": "A", "source": "S", "date": f"2024-01-{i % 28 + 1:02d}", "url": f"https://example.com/{i}"} for i in range(count)]
+
+
+def test_news_is_cached_in_chunks_and_published_at_the_end(monkeypatch):
+    cache = Cache()
+    monkeypatch.setattr(api, "_cache", cache)
+    records = _news(250)
+
+    def stream(*args):
+        for i, record in enumerate(records):
+            if i == 220:
+                # Two chunks are staged, but not visible to lookups until the fetch completes
+                assert len(cache._pending[("company_news", "TEST_none_2024-02-01_1000", threading.get_ident())]) == 2 * api.CACHE_CHUNK_RECORDS
+                assert cache._company_news_cache == {}
+            yield record
+
+    monkeypatch.setattr(api, "_stream_records", stream)
+    news = api.get_company_news("TEST", "2024-02-01")
+
+    assert len(news) == 250
+    assert cache._company_news_cache["TEST_none_2024-02-01_1000"] == [item.model_dump() for item in news]
+    assert cache._pending == {}
+
+
+def test_failed_fetch_leaves_nothing_cached(monkeypatch):
+    cache = Cache()
+    monkeypatch.setattr(api, "_cache", cache)
+
+    def stream(*args):
+        yield from _news(150)
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(api, "_stream_records", stream)
+    with pytest.raises(ConnectionError):
+        api.get_company_news("TEST", "2024-02-01")
+    assert cache._company_news_cache == {} and cache._pending == {}
+
+
+def test_empty_result_is_cached(monkeypatch):
+    cache = Cache()
+    monkeypatch.setattr(api, "_cache", cache)
+    monkeypatch.setattr(api, "_stream_records", lambda *args: iter(()))
+    assert api.get_insider_trades("TEST", "2024-02-01") == []
+    assert cache._insider_trades_cache == {"TEST_none_2024-02-01_1000": []}
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Literal
+
+from pydantic import BaseModel
+
+from src.llm.metrics import get_llm_metrics, new_run_id
+from src.llm.stub import StubChatModel
+from src.utils.concurrency import gather_batched
+from src.utils.llm import BatchResponse, acall_llm
+
+
+class Signal(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float
+    reasoning: str = ""
+
+
+def test_batch_prompt_gets_an_answer_per_ticker():
+    prompt = """Answer each of the following 2 requests independently.
+
+=== AAPL ===
+{"score": 9, "max_score": 10}
+
+=== MSFT ===
+{"score": 1, "max_score": 10}
+
+Return a single JSON object with exactly one entry for each of these tickers: AAPL, MSFT"""
+    answer = StubChatModel().with_structured_output(BatchResponse).invoke([("system", "You are an analyst."), ("human", prompt)])
+    assert {ticker: Signal.model_validate(signal).signal for ticker, signal in answer.signals.items()} == {"AAPL": "bullish", "MSFT": "bearish"}
+
+
+def test_stub_requests_are_batched():
+    run_id = new_run_id()
+    state = {"metadata": {"model_name": "stub", "model_provider": "Stub", "run_id": run_id}}
+
+    def call(ticker, score):
+        prompt = [("system", "You are an analyst."), ("human", f'Analyze {ticker}: {{"score": {score}, "max_score": 10}}')]
+        return acall_llm(prompt, Signal, agent_name="warren_buffett_agent", state=state, use_cache=False, ticker=ticker)
+
+    results = asyncio.run(gather_batched([call("AAPL", 9), call("MSFT", 1)], limit=4, batch_size=2))
+    assert [result.signal for result in results] == ["bullish", "bearish"]
+    assert sorted((record["ticker"], record["batched"]) for record in get_llm_metrics().records(run_id) if record["ticker"]) == [("AAPL", True), ("MSFT", True)]
+    get_llm_metrics().discard_run(run_id)